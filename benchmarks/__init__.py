@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
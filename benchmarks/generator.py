@@ -0,0 +1,413 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import json
+import os
+import shutil
+import sys
+from argparse import ArgumentParser
+from os.path import join
+from typing import Dict, List, Optional
+
+# folder, group and file name of the bot module
+GROUPS = [
+    ('parsers', 'Parser', 'parser'),
+    ('experts', 'Expert', 'expert'),
+    ('collectors', 'Collector', 'collector'),
+    ('outputs', 'Output', 'output'),
+]
+# package of the synthetic IntelMQ bots, must not shadow intelmq itself
+PACKAGE = 'synthetic_intelmq'
+
+CLASS_TEMPLATE = '''# -*- coding: utf-8 -*-
+"""
+{description}
+"""
+from intelmq.lib.bot import Bot
+
+
+class {class_name}(Bot):
+    """{description}"""
+{attributes}
+    def process(self):
+        report = self.receive_message()
+
+        event = self.new_event(report)
+        event.add('source.ip', '127.0.0.1')
+
+        self.send_message(event)
+        self.acknowledge_message()
+
+
+BOT = {class_name}
+'''
+
+# same shape as bot_folder/bots/parsers/exampleparser, the defaults are only available in config.json
+CONFIG_TEMPLATE = '''# -*- coding: utf-8 -*-
+"""
+{description}
+"""
+from intelmq.lib.bot import Bot
+
+
+class {class_name}(Bot):
+    def process(self):
+        report = self.receive_message()
+
+        event = self.new_event(report)
+        event.add('source.ip', '127.0.0.1')
+
+        self.send_message(event)
+        self.acknowledge_message()
+
+
+BOT = {class_name}
+'''
+
+EXECUTABLE_TEMPLATE = '''#!/bin/python3
+import {0}
+import sys
+sys.exit(
+    {0}.BOT.run()
+)'''
+
+
+class SyntheticBot:
+
+    def __init__(self, index: int, custom: bool):
+        self.index = index
+        self.custom = custom
+        self.folder, self.group, self.file_name = GROUPS[index % len(GROUPS)]
+        prefix = 'Custom' if custom else 'Synthetic'
+        self.folder_name = '{}{:05d}'.format(prefix.lower(), index)
+        self.class_name = '{}{:05d}{}Bot'.format(prefix, index, self.group)
+        self.name = '{}{:05d}'.format(prefix, index)
+        self.description = '{} {} {:05d} generated for benchmarking.'.format(prefix, self.group.lower(), index)
+        # half of the bots declare their defaults in the class, the others in config.json
+        self.has_config = index % 2 == 1
+        self.parameters = {
+            'url': 'https://example.com/feeds/{}'.format(index),
+            'threshold': index % 100,
+            'enabled_checks': ['a', 'b'],
+        }
+        self.installed = True
+
+    @property
+    def module(self) -> str:
+        # import path under which the workbench finds the bot
+        if self.custom:
+            return '{}.{}.{}'.format(self.folder, self.folder_name, self.file_name)
+        return '{}.bots.{}.{}.{}'.format(PACKAGE, self.folder, self.folder_name, self.file_name)
+
+    def get_runtime_module(self, version: int) -> str:
+        # IntelMQ 3.x references the custom bots by their installed location
+        if self.custom and version >= 3:
+            return 'intelmq.bots.{}'.format(self.module)
+        return self.module
+
+    def get_executable_name(self, version: int) -> str:
+        if version >= 3:
+            return 'intelmq.bots.{}.{}.{}'.format(self.folder, self.folder_name, self.file_name)
+        return self.module
+
+    def get_source(self) -> str:
+        if self.has_config:
+            return CONFIG_TEMPLATE.format(description=self.description, class_name=self.class_name)
+        attributes = ''
+        for key, value in self.parameters.items():
+            attributes = '{}    {} = {!r}\n'.format(attributes, key, value)
+        return CLASS_TEMPLATE.format(description=self.description, class_name=self.class_name, attributes=attributes)
+
+    def get_config(self) -> dict:
+        return {
+            self.class_name: {
+                'description': self.description,
+                'parameters': dict(self.parameters)
+            }
+        }
+
+
+class InstallationGenerator:
+
+    def __init__(
+            self,
+            root: str,
+            bots: int = 100,
+            custom_bots: int = 10,
+            instances: int = 200,
+            drift: int = 10,
+            version: int = 3
+    ):
+        self.root = os.path.abspath(root)
+        self.version = version
+        # every drift-th item is modified so that the tools have issues to report and to fix, 0 disables it
+        self.drift = drift
+        self.instances = instances
+        self.bots = [SyntheticBot(index, False) for index in range(bots)]
+        self.custom_bots = [SyntheticBot(index, True) for index in range(custom_bots)]
+        for bot in self.custom_bots:
+            if self.__drifts(bot.index + 1):
+                bot.installed = False
+
+    def __drifts(self, index: int) -> bool:
+        return self.drift > 0 and index % self.drift == 0
+
+    @property
+    def lib_folder(self) -> str:
+        # has to be added to the PYTHONPATH
+        return join(self.root, 'lib')
+
+    @property
+    def bot_folder(self) -> str:
+        return join(self.lib_folder, PACKAGE, 'bots')
+
+    @property
+    def custom_bot_folder(self) -> str:
+        return join(self.root, 'custom', 'bots')
+
+    @property
+    def bin_folder(self) -> str:
+        # the workbench prefixes the configured /usr/bin with the fake root
+        return join(self.root, 'usr', 'bin')
+
+    @property
+    def etc_folder(self) -> str:
+        return join(self.root, 'opt', 'intelmq', 'etc')
+
+    @property
+    def output_folder(self) -> str:
+        return join(self.root, 'output')
+
+    @property
+    def config_file(self) -> str:
+        return join(self.root, 'workbench.ini')
+
+    @property
+    def runtime_yaml_file(self) -> str:
+        return join(self.etc_folder, 'runtime.yaml')
+
+    @property
+    def runtime_conf_file(self) -> str:
+        return join(self.etc_folder, 'runtime.conf')
+
+    @property
+    def pipeline_file(self) -> str:
+        return join(self.etc_folder, 'pipeline.conf')
+
+    @property
+    def default_BOTS_file(self) -> str:
+        return join(self.bot_folder, 'BOTS')
+
+    @property
+    def runtime_BOTS_file(self) -> str:
+        return join(self.etc_folder, 'BOTS')
+
+    def get_arguments(self) -> List[str]:
+        # global options of the workbench pointing it to the generated installation
+        return [
+            '--config', self.config_file,
+            '--default_bot_location', self.bot_folder,
+            '--runtime_yaml_file', self.runtime_yaml_file,
+            '--runtime_conf_file', self.runtime_conf_file,
+            '--pipeline_file', self.pipeline_file,
+            '--default_BOTS_file', self.default_BOTS_file,
+            '--runtime_BOTS_file', self.runtime_BOTS_file,
+        ]
+
+    def get_environment(self, environment: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        output = dict(os.environ if environment is None else environment)
+        python_path = [self.lib_folder]
+        if output.get('PYTHONPATH'):
+            python_path.append(output['PYTHONPATH'])
+        output['PYTHONPATH'] = os.pathsep.join(python_path)
+        return output
+
+    @property
+    def installed_bots(self) -> List[SyntheticBot]:
+        return self.bots + [bot for bot in self.custom_bots if bot.installed]
+
+    @staticmethod
+    def __write(path: str, text: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def __write_json(self, path: str, data: dict) -> None:
+        self.__write(path, '{}\n'.format(json.dumps(data, indent=4, sort_keys=True)))
+
+    def __write_package(self, folder: str) -> None:
+        self.__write(join(folder, '__init__.py'), '')
+
+    def write_bot(self, bot: SyntheticBot, folder: str) -> str:
+        bot_folder = join(folder, bot.folder, bot.folder_name)
+        self.__write_package(bot_folder)
+        self.__write(join(bot_folder, '{}.py'.format(bot.file_name)), bot.get_source())
+        if bot.has_config:
+            self.__write_json(join(bot_folder, 'config.json'), bot.get_config())
+        return bot_folder
+
+    def write_bots(self) -> None:
+        self.__write_package(join(self.lib_folder, PACKAGE))
+        for folder in [self.bot_folder, self.custom_bot_folder]:
+            self.__write_package(folder)
+            for group_folder, _, _ in GROUPS:
+                self.__write_package(join(folder, group_folder))
+        for bot in self.bots:
+            self.write_bot(bot, self.bot_folder)
+        for bot in self.custom_bots:
+            source = self.write_bot(bot, self.custom_bot_folder)
+            if bot.installed:
+                # the same symlinks botter -i creates
+                destination = join(self.bot_folder, bot.folder, bot.folder_name)
+                os.makedirs(destination, exist_ok=True)
+                for name in sorted(os.listdir(source)):
+                    os.symlink(join(source, name), join(destination, name))
+
+    def uninstall(self, bot: SyntheticBot) -> None:
+        # reverts botter -i of a custom bot
+        shutil.rmtree(join(self.bot_folder, bot.folder, bot.folder_name), ignore_errors=True)
+        path = join(self.bin_folder, bot.get_executable_name(self.version))
+        if os.path.lexists(path):
+            os.remove(path)
+        bot.installed = False
+
+    def get_runtime(self) -> Dict[str, dict]:
+        output = dict()
+        bots = self.installed_bots
+        if not bots:
+            return output
+        for index in range(self.instances):
+            bot = bots[index % len(bots)]
+            parameters = dict(bot.parameters)
+            if self.__drifts(index + 1):
+                parameters['threshold'] = parameters['threshold'] + 1
+                parameters['legacy_option'] = True
+            output['{}-{}'.format(bot.folder_name, index)] = {
+                'bot_id': '{}-{}'.format(bot.folder_name, index),
+                'description': bot.description,
+                'enabled': True,
+                'group': bot.group,
+                'groupname': bot.folder,
+                'module': bot.get_runtime_module(self.version),
+                'name': bot.name,
+                'parameters': parameters,
+                'run_mode': 'continuous'
+            }
+        return output
+
+    @staticmethod
+    def get_pipeline(runtime: Dict[str, dict]) -> Dict[str, dict]:
+        # every instance sends to the next one, the outputs end the chain
+        output = dict()
+        bot_ids = list(runtime.keys())
+        for position, bot_id in enumerate(bot_ids):
+            item = dict()
+            if runtime[bot_id]['group'] != 'Collector':
+                item['source-queue'] = '{}-queue'.format(bot_id)
+            if runtime[bot_id]['group'] != 'Output':
+                item['destination-queues'] = ['{}-queue'.format(bot_ids[(position + 1) % len(bot_ids)])]
+            output[bot_id] = item
+        return output
+
+    def write_configurations(self) -> None:
+        runtime = self.get_runtime()
+        pipeline = self.get_pipeline(runtime)
+        self.__write_json(self.runtime_conf_file, runtime)
+        self.__write_json(self.pipeline_file, pipeline)
+        runtime_v3 = {'global': {'destination_pipeline_broker': 'redis'}}
+        for bot_id, item in runtime.items():
+            item = dict(item)
+            item['parameters'] = dict(item['parameters'])
+            destinations = pipeline[bot_id].get('destination-queues')
+            if destinations:
+                item['parameters']['destination_queues'] = {'_default': destinations}
+            runtime_v3[bot_id] = item
+        # json is a subset of yaml, hence no yaml library is needed to write it
+        self.__write_json(self.runtime_yaml_file, runtime_v3)
+
+    def get_bots_file(self, running: bool) -> Dict[str, dict]:
+        output = dict()
+        for position, bot in enumerate(self.installed_bots):
+            parameters = dict(bot.parameters)
+            if running and self.__drifts(position + 1):
+                parameters['threshold'] = parameters['threshold'] + 1
+            output.setdefault(bot.group, dict())[bot.name] = {
+                'description': bot.description,
+                'module': bot.module,
+                'parameters': parameters
+            }
+        return output
+
+    def write_executables(self) -> None:
+        os.makedirs(self.bin_folder, exist_ok=True)
+        for position, bot in enumerate(self.installed_bots):
+            if self.__drifts(position + 1):
+                continue
+            path = join(self.bin_folder, bot.get_executable_name(self.version))
+            self.__write(path, EXECUTABLE_TEMPLATE.format(bot.module))
+            os.chmod(path, 0o755)
+        if self.drift > 0:
+            # left over of a removed bot
+            path = join(self.bin_folder, 'intelmq.bots.parsers.removed.parser')
+            self.__write(path, EXECUTABLE_TEMPLATE.format('intelmq.bots.parsers.removed.parser'))
+            os.chmod(path, 0o755)
+
+    def write_config_file(self) -> None:
+        self.__write(self.config_file, '[IntelMQ]\n'
+                                       'binFolder=/usr/bin\n'
+                                       'customBotFolder={}\n'
+                                       'fakeRoot={}\n'
+                                       'outputFolder={}\n'.format(self.custom_bot_folder, self.root, self.output_folder))
+
+    def generate(self) -> None:
+        if os.path.exists(self.root) and os.listdir(self.root):
+            raise FileExistsError('The folder "{}" is not empty'.format(self.root))
+        os.makedirs(self.output_folder, exist_ok=True)
+        self.write_bots()
+        self.write_configurations()
+        self.__write_json(self.default_BOTS_file, self.get_bots_file(False))
+        self.__write_json(self.runtime_BOTS_file, self.get_bots_file(True))
+        self.write_executables()
+        self.write_config_file()
+
+
+def get_arg_parser() -> ArgumentParser:
+    arg_parse = ArgumentParser(prog='generator', description='Generates a synthetic IntelMQ installation')
+    arg_parse.add_argument('root', help='Empty folder used as fake root', type=str)
+    arg_parse.add_argument('--bots', default=100, help='Number of IntelMQ bots (default: 100)', type=int)
+    arg_parse.add_argument('--custom-bots', default=10, dest='custom_bots',
+                           help='Number of custom bots (default: 10)', type=int)
+    arg_parse.add_argument('--instances', default=200, help='Number of runtime instances (default: 200)', type=int)
+    arg_parse.add_argument('--drift', default=10,
+                           help='Every n-th item is modified to cause issues, 0 disables it (default: 10)', type=int)
+    arg_parse.add_argument('--version', default=3, help='Major version of IntelMQ (default: 3)', type=int)
+    return arg_parse
+
+
+def main() -> int:
+    args = get_arg_parser().parse_args()
+    generator = InstallationGenerator(args.root, args.bots, args.custom_bots, args.instances, args.drift, args.version)
+    try:
+        generator.generate()
+    except FileExistsError as error:
+        print(error)
+        return 1
+    print('Generated {} bots and {} runtime instances in {}'.format(
+        len(generator.bots) + len(generator.custom_bots), args.instances, generator.root
+    ))
+    print('Run with: PYTHONPATH={} python intelmqworkbench.py {} <command>'.format(
+        generator.lib_folder, ' '.join(generator.get_arguments())
+    ))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
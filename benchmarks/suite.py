@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from argparse import ArgumentParser, Namespace
+from os.path import dirname, isfile, join
+from statistics import median
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.generator import InstallationGenerator
+
+SOURCE_FOLDER = join(dirname(dirname(os.path.abspath(__file__))), 'src')
+WORKBENCH = join(SOURCE_FOLDER, 'intelmqworkbench.py')
+# the startup of --help promised by the lazy tool registration
+HELP_BUDGET = 0.15
+# differences below are considered noise when comparing against a baseline
+NOISE_FLOOR = 0.05
+
+
+class Measurement:
+
+    def __init__(self, name: str):
+        self.name = name
+        self.seconds: List[float] = list()
+        self.exit_code: Optional[int] = None
+        self.error: Optional[str] = None
+
+    @property
+    def p50(self) -> float:
+        return median(self.seconds) if self.seconds else 0.0
+
+    def to_json(self) -> dict:
+        return {
+            'p50': self.p50,
+            'min': min(self.seconds) if self.seconds else 0.0,
+            'max': max(self.seconds) if self.seconds else 0.0,
+            'runs': len(self.seconds),
+            'exit_code': self.exit_code,
+            'error': self.error
+        }
+
+    def __repr__(self) -> str:
+        return '{} - ({:.3f}s)'.format(self.name, self.p50)
+
+
+def parse_size(value: str) -> Tuple[int, int]:
+    # BOTSxINSTANCES, e.g. 100x200
+    bots, _, instances = value.partition('x')
+    return int(bots), int(instances or int(bots) * 2)
+
+
+def get_commands(generator: InstallationGenerator) -> List[Tuple[str, List[str], Optional[Callable[[], None]]]]:
+    # name, arguments and the preparation done before every run
+    custom_bot = generator.custom_bots[0]
+    return [
+        ('list -a', ['list', '-a'], None),
+        ('check -r', ['check', '-r'], None),
+        ('check -b', ['check', '-b'], None),
+        ('check -s', ['check', '-s'], None),
+        ('fix --plan', ['fix', '--plan'], None),
+        ('converter', ['converter', '-o', join(generator.output_folder, 'runtime.yaml')], None),
+        # changes the installation, hence it is the last one and every run starts from an uninstalled bot
+        ('botter -i', ['botter', '-i', custom_bot.name], lambda: generator.uninstall(custom_bot)),
+    ]
+
+
+def run_command(argv: List[str], environment: Dict[str, str]) -> Tuple[float, int, Optional[str]]:
+    started = perf_counter()
+    process = subprocess.run(
+        [sys.executable, WORKBENCH] + argv,
+        cwd=SOURCE_FOLDER,
+        env=environment,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True
+    )
+    seconds = perf_counter() - started
+    error = None
+    if 'Traceback' in process.stderr:
+        error = process.stderr.strip().splitlines()[-1]
+    return seconds, process.returncode, error
+
+
+def measure(
+        name: str,
+        argv: List[str],
+        environment: Dict[str, str],
+        repeat: int,
+        prepare: Optional[Callable[[], None]] = None
+) -> Measurement:
+    measurement = Measurement(name)
+    for _ in range(repeat):
+        if prepare:
+            prepare()
+        seconds, exit_code, error = run_command(argv, environment)
+        measurement.seconds.append(seconds)
+        measurement.exit_code = exit_code
+        if error or exit_code != 0:
+            measurement.error = error or 'Exited with {}'.format(exit_code)
+            break
+    return measurement
+
+
+def run_size(root: str, bots: int, instances: int, args: Namespace) -> List[Measurement]:
+    generator = InstallationGenerator(root, bots, max(1, bots // 10), instances, args.drift, args.version)
+    generator.generate()
+    environment = generator.get_environment()
+    arguments = generator.get_arguments()
+    # fills the bytecode cache, otherwise the first command pays for the compilation of all bots
+    run_command(arguments + ['list', '-a'], environment)
+    output = list()
+    for name, argv, prepare in get_commands(generator):
+        measurement = measure(name, arguments + argv, environment, args.repeat, prepare)
+        print_measurement('{}x{}'.format(bots, instances), measurement)
+        output.append(measurement)
+    return output
+
+
+def print_measurement(size: str, measurement: Measurement, note: str = '') -> None:
+    data = measurement.to_json()
+    print('{:>12}  {:<12}  {:>8.3f}  {:>8.3f}  {:>8.3f}  {:>5}  {}'.format(
+        size, measurement.name, data['p50'], data['min'], data['max'], str(measurement.exit_code),
+        measurement.error or note
+    ))
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    regressions = list()
+    for size, commands in results['sizes'].items():
+        for name, data in commands.items():
+            reference = baseline.get('sizes', {}).get(size, {}).get(name)
+            if reference is None:
+                continue
+            difference = data['p50'] - reference['p50']
+            if difference > NOISE_FLOOR and data['p50'] > reference['p50'] * (1 + tolerance):
+                regressions.append('{} {}: {:.3f}s instead of {:.3f}s'.format(
+                    size, name, data['p50'], reference['p50']
+                ))
+    return regressions
+
+
+def get_arg_parser() -> ArgumentParser:
+    arg_parse = ArgumentParser(prog='suite', description='Measures the workbench on synthetic installations')
+    arg_parse.add_argument('--sizes', nargs='+', default=['50x100', '200x400', '800x1600'],
+                           help='Sizes as BOTSxINSTANCES (default: 50x100 200x400 800x1600)', type=str)
+    arg_parse.add_argument('--repeat', default=3, help='Runs per command (default: 3)', type=int)
+    arg_parse.add_argument('--drift', default=10,
+                           help='Every n-th item is modified to cause issues (default: 10)', type=int)
+    arg_parse.add_argument('--version', default=None,
+                           help='Major version of IntelMQ (default: the installed one)', type=int)
+    arg_parse.add_argument('--root', default=None,
+                           help='Folder in which the installations are generated (default: temporary folder)',
+                           type=str)
+    arg_parse.add_argument('--keep', default=False, help='Keep the generated installations', action='store_true')
+    arg_parse.add_argument('--output', default=None, help='Saves the results as json', type=str)
+    arg_parse.add_argument('--baseline', default=None,
+                           help='Results of a previous run, slower commands are reported as regression', type=str)
+    arg_parse.add_argument('--tolerance', default=0.25,
+                           help='Allowed slow down compared to the baseline (default: 0.25)', type=float)
+    return arg_parse
+
+
+def get_intelmq_version() -> int:
+    import intelmq.version
+    return int(intelmq.version.__version__.split('.')[0])
+
+
+def main() -> int:
+    args = get_arg_parser().parse_args()
+    if args.version is None:
+        args.version = get_intelmq_version()
+    sizes = [parse_size(size) for size in args.sizes]
+    root = args.root or tempfile.mkdtemp(prefix='intelmq-workbench-bench-')
+    results = {'python': platform.python_version(), 'intelmq': args.version, 'startup': None, 'sizes': dict()}
+    failed = False
+    print('{:>12}  {:<12}  {:>8}  {:>8}  {:>8}  {:>5}'.format('Size', 'Command', 'p50', 'min', 'max', 'Exit'))
+    try:
+        startup = measure('--help', ['--help'], dict(os.environ), max(args.repeat, 5))
+        note = ''
+        if startup.p50 > HELP_BUDGET:
+            note = 'over budget of {:.2f}s'.format(HELP_BUDGET)
+            failed = True
+        print_measurement('-', startup, note)
+        results['startup'] = startup.to_json()
+        for bots, instances in sizes:
+            size = '{}x{}'.format(bots, instances)
+            measurements = run_size(join(root, size), bots, instances, args)
+            results['sizes'][size] = dict((item.name, item.to_json()) for item in measurements)
+            if [item for item in measurements if item.error]:
+                failed = True
+    finally:
+        if args.keep:
+            print('Installations kept in {}'.format(root))
+        elif args.root is None:
+            shutil.rmtree(root, ignore_errors=True)
+        else:
+            for bots, instances in sizes:
+                shutil.rmtree(join(root, '{}x{}'.format(bots, instances)), ignore_errors=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+        print('Results saved to {}'.format(args.output))
+    if args.baseline:
+        if not isfile(args.baseline):
+            print('Baseline {} does not exist'.format(args.baseline))
+            return 1
+        with open(args.baseline, 'r') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print('Regression: {}'.format(regression))
+        if regressions:
+            failed = True
+        else:
+            print('No regressions compared to {}'.format(args.baseline))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
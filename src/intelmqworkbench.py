@@ -14,23 +14,35 @@ __license__ = 'GPL v3+'
 import sys
 
 from intelmqworkbench import IntelMQWorkbench, IntelMQWorkbenchException
-from intelmqworkbench.tools.checker import Checker
-from intelmqworkbench.tools.converter import Converter
-from intelmqworkbench.tools.fiddler import Fiddler
-from intelmqworkbench.tools.fixer import Fixer
-from intelmqworkbench.tools.botter import Botter
-from intelmqworkbench.tools.lister import Lister
 
 
 def main() -> None:
     try:
         workbench = IntelMQWorkbench()
-        workbench.register_tool(Converter)
-        workbench.register_tool(Checker)
-        workbench.register_tool(Lister)
-        workbench.register_tool(Fixer)
-        workbench.register_tool(Botter)
-        workbench.register_tool(Fiddler)
+        # tools are declared by name, their modules are only imported when the tool is run
+        workbench.register_tool('converter', 'intelmqworkbench.tools.converter.Converter',
+                                'Tool for converting 2.x to 3.x')
+        workbench.register_tool('check', 'intelmqworkbench.tools.checker.Checker',
+                                'Check installation of bots is still applicable')
+        workbench.register_tool('list', 'intelmqworkbench.tools.lister.Lister', 'Lists bots')
+        workbench.register_tool('fix', 'intelmqworkbench.tools.fixer.Fixer', 'Tool for fixing bot configurations')
+        workbench.register_tool('botter', 'intelmqworkbench.tools.botter.Botter', 'Tool for installing bots')
+        workbench.register_tool('query', 'intelmqworkbench.tools.querier.Querier',
+                                'Filters bots and runtime instances by an expression')
+        workbench.register_tool('export-sqlite', 'intelmqworkbench.tools.sqliteexporter.SQLiteExporter',
+                                'Writes the bots, configurations and issues into a SQLite database')
+        workbench.register_tool('fleet', 'intelmqworkbench.tools.fleet.Fleet',
+                                'Checks many mirrored IntelMQ roots in parallel')
+        workbench.register_tool('fiddler', 'intelmqworkbench.tools.fiddler.Fiddler',
+                                'Tool for developing/debugging bots')
+        workbench.register_tool('startup-bench', 'intelmqworkbench.tools.startupbencher.StartupBencher',
+                                'Measures the startup time of the installed bot executables')
+        workbench.register_tool('daemon', 'intelmqworkbench.tools.daemon.Daemon',
+                                'Keeps the workspace loaded and answers commands over a Unix socket')
+        workbench.register_tool('shell', 'intelmqworkbench.tools.shell.Shell',
+                                'Interactive shell running the tools on one loaded workspace')
+        workbench.register_tool('run', 'intelmqworkbench.tools.runner.Runner',
+                                'Runs the commands of a script in one process')
         sys.exit(workbench.start())
     except IntelMQWorkbenchException as error:
         print('HIGH ERROR: {}'.format(error))
@@ -14,23 +14,47 @@ import os
 import pathlib
 import sys
 import argparse
+import time
 from configparser import ConfigParser
+from importlib import import_module
 from os.path import isfile
-from typing import Dict, List, Type, Optional
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
 
-from intelmqworkbench.abstractbasetool import AbstractBaseTool
 from intelmqworkbench.classes.intelmqworkbenchconfig import IntelMQWorkbenchConfig
+from intelmqworkbench.classes.metrics import Metrics
 from intelmqworkbench.exceptions import IntelMQToolFactoryException, IncorrectArgumentException, \
     IntelMQWorkbenchException, IntelMQToolException, IntelMQWorkbenchConfigException
 
+if TYPE_CHECKING:
+    from intelmqworkbench.abstractbasetool import AbstractBaseTool
+    from intelmqworkbench.outputhandler import OutPutHandler
+    from intelmqworkbench.workspace import Workspace
+
+
+def __getattr__(name: str):
+    # the base tool pulls in the handlers, hence it is only imported when a tool module asks for it
+    if name == 'AbstractBaseTool':
+        from intelmqworkbench.abstractbasetool import AbstractBaseTool
+        return AbstractBaseTool
+    raise AttributeError('module {} has no attribute {}'.format(__name__, name))
+
 
 class ToolFactory:
 
     def __init__(self, logger: logging.Logger):
         self.logger = logger
-        self.__components: Dict[str, AbstractBaseTool] = dict()
+        # tool id -> (class path, description), the modules are only imported when the tool is used
+        self.__declarations: Dict[str, Tuple[str, str]] = dict()
+        self.__components: Dict[str, 'AbstractBaseTool'] = dict()
         self.intelmq_config = None
         self.config = None
+        # shared by all tools so that discovery and parsing are only done once per process
+        self.__workspace: Optional['Workspace'] = None
+        self.__output_handler: Optional['OutPutHandler'] = None
+        self.metrics = Metrics()
+        self.common = argparse.ArgumentParser(add_help=False)
+        self.common.add_argument('--verbose', '-v', action='count', default=0)
+        self.common.add_argument('-f', '--full', action='store_true', help='display full', default=False)
 
     def __setup_config_file(self, config_file: Optional[str]) -> None:
         internal_config = config_file
@@ -82,11 +106,11 @@ class ToolFactory:
             del args.runtime_yaml_file
 
         if args.default_BOTS_file:
-            self.config.default_BOTS_file = args.default_BOTS_file
+            self.config.default_BOTS = args.default_BOTS_file
             del args.default_BOTS_file
 
         if args.runtime_BOTS_file:
-            self.config.runtime_BOTS_file = args.runtime_BOTS_file
+            self.config.running_BOTS = args.runtime_BOTS_file
             del args.runtime_BOTS_file
 
         if args.default_logging_path:
@@ -98,13 +122,17 @@ class ToolFactory:
             del args.harmonization_conf_file
 
         if args.custom_bot_location:
-            self.config.custom_bot_location = args.custom_bot_location
+            self.config.custom_bot_folder = args.custom_bot_location
             del args.custom_bot_location
 
         if args.default_bot_location:
-            self.config.default_bot_location = args.default_bot_location
+            self.config.bot_folder = args.default_bot_location
             del args.default_bot_location
 
+        if args.intelmq_location:
+            self.config.intelmq_folder = args.intelmq_location
+            del args.intelmq_location
+
         if args.pipeline_file:
             self.config.pipeline_conf_file = args.pipeline_file
             del args.pipeline_file
@@ -130,49 +158,134 @@ class ToolFactory:
             raise IntelMQWorkbenchException(message)
 
     @property
-    def components(self) -> List[AbstractBaseTool]:
+    def workspace(self) -> 'Workspace':
+        if self.__workspace is None:
+            from intelmqworkbench.workspace import Workspace
+            self.__workspace = Workspace(self.logger, self.config)
+            self.__workspace.metrics = self.metrics
+        return self.__workspace
+
+    @property
+    def output_handler(self) -> 'OutPutHandler':
+        if self.__output_handler is None:
+            from intelmqworkbench.outputhandler import OutPutHandler
+            self.__output_handler = OutPutHandler(self.logger)
+            self.__output_handler.metrics = self.metrics
+        return self.__output_handler
+
+    @property
+    def declarations(self) -> List[Tuple[str, str]]:
         output = list()
-        for item in self.__components.values():
-            output.append(item)
+        for tool_id, declaration in self.__declarations.items():
+            output.append((tool_id, declaration[1]))
         return output
 
-    def register_component(self, clazz: Type[AbstractBaseTool]) -> None:
-        instance = clazz(self.logger, self.config)
-        tool_id = instance.get_arg_parser().prog
-        if tool_id in self.__components.keys():
+    def register_component(self, tool_id: str, class_path: str, description: str) -> None:
+        if tool_id in self.__declarations.keys():
             raise IntelMQToolFactoryException('Tool id "{}" is already existing. It is defined in "{}"'.format(
                 tool_id,
-                clazz.__name__
+                self.__declarations[tool_id][0]
                 )
             )
-        self.__components[tool_id] = instance
+        self.__declarations[tool_id] = (class_path, description)
 
-    def run_application(self, key: str, args: argparse.Namespace) -> int:
+    def get_component(self, key: str) -> 'AbstractBaseTool':
         instance = self.__components.get(key, None)
-        # is not set by registration as it may vary
-        instance.config = self.config
         if instance is None:
-            raise IntelMQToolFactoryException('Tool {} cannot be found'.format(key))
+            declaration = self.__declarations.get(key, None)
+            if declaration is None:
+                raise IntelMQToolFactoryException('Tool {} cannot be found'.format(key))
+            module_name, class_name = declaration[0].rsplit('.', 1)
+            self.logger.debug('Importing tool {} from {}'.format(class_name, module_name))
+            clazz = getattr(import_module(module_name), class_name)
+            instance = clazz(self.logger, self.config)
+            tool_id = instance.get_arg_parser().prog
+            if tool_id != key:
+                raise IntelMQToolFactoryException('Tool "{}" is registered as "{}"'.format(tool_id, key))
+            self.__components[key] = instance
+        return instance
+
+    def get_arg_parser(self, key: str, prog: Optional[str] = None) -> argparse.ArgumentParser:
+        arg_parser = self.get_component(key).get_arg_parser()
+        if prog:
+            prog = '{} {}'.format(prog, key)
         else:
-            if hasattr(args, 'version'):
-                if args.version:
-                    print('Version: {}', instance.get_version())
-                    return 0
-                else:
-                    del args.version
-            return instance.start(args)
+            prog = key
+        parser = argparse.ArgumentParser(
+            prog=prog,
+            parents=[self.common],
+            add_help=False,
+            description=arg_parser.description
+        )
+        # noinspection PyProtectedMember
+        parser._add_container_actions(arg_parser)
+        return parser
+
+    def run_application(self, key: str, args: argparse.Namespace) -> int:
+        instance = self.get_component(key)
+        # is not set by registration as it may vary
+        instance.config = self.config
+        self.workspace.config = self.config
+        instance.workspace = self.workspace
+        instance.output_handler = self.output_handler
+        instance.intelmq_handler.output_handler = self.output_handler
+        instance.tool_factory = self
+        if hasattr(args, 'version'):
+            if args.version:
+                print('Version: {}', instance.get_version())
+                return 0
+            else:
+                del args.version
+        return instance.start(args)
+
+    def run_command(self, argv: List[str]) -> int:
+        # runs a tool inside the current process, the argument parser may raise SystemExit (e.g. for -h)
+        if not argv:
+            raise IntelMQToolException('No command given')
+        key = argv[0]
+        parser = self.get_arg_parser(key)
+        args, unknown = parser.parse_known_args(argv[1:])
+        if unknown:
+            raise IntelMQToolException('Command {} is not defined'.format(unknown))
+        try:
+            return self.run_application(key, args)
+        except IncorrectArgumentException:
+            parser.print_help()
+            return -1
+
+    def execute(self, argv: List[str], invalidate: bool = True) -> int:
+        # as run_command but the errors are printed and returned as exit code
+        try:
+            return self.run_command(argv)
+        except SystemExit as error:
+            # raised by the argument parser for -h or wrong arguments
+            return error.code if isinstance(error.code, int) else 0
+        except IntelMQToolException as error:
+            print(error)
+            exit_code = -3
+        except IntelMQWorkbenchException as error:
+            print(error)
+            exit_code = -4
+        except Exception as error:
+            self.logger.exception('Command {} failed'.format(argv))
+            print('Error: {}'.format(error))
+            exit_code = -5
+        if invalidate:
+            # the command may have stopped half way through changing the parsed configurations
+            self.workspace.invalidate()
+        return exit_code
 
 
 class IntelMQWorkbench:
 
+    # options of the run itself, they are not passed to the tool
+    RUN_OPTIONS = ['profile', 'profile_top', 'profile_mem', 'metrics', 'metrics_prom']
+
     def __init__(self):
         self.logger = logging.getLogger(self.__class__.__name__)
         self.__tool_factory = ToolFactory(self.logger)
         self.__parser = argparse.ArgumentParser(formatter_class=argparse.RawTextHelpFormatter)
         self.__subparsers = self.__parser.add_subparsers(help='Available tools', dest='command')
-        self.__common = argparse.ArgumentParser(add_help=False)
-        self.__common.add_argument('--verbose', '-v', action='count', default=0)
-        self.__common.add_argument('-f', '--full', action='store_true', help='display full', default=False)
         self.__parser.add_argument('-d', '--details',
                                    default=None,
                                    help='Details of intelmq and this tools',
@@ -204,9 +317,43 @@ class IntelMQWorkbench:
                                    help='Configuration file\n'
                                         'Note: The default location is ./config/config.ini',
                                    default=None)
+        self.__parser.add_argument('--socket',
+                                   type=str,
+                                   help='Socket of a running workbench daemon.\n'
+                                        'Note: If set the command is answered by the daemon (check, list and query)',
+                                   default=None)
+        self.__parser.add_argument('--profile',
+                                   nargs='?',
+                                   const='',
+                                   type=str,
+                                   metavar='FILE',
+                                   help='Runs the tool under cProfile and prints the top entries by cumulative time.\n'
+                                        'Note: If FILE is given the statistics are saved as .pstats file instead',
+                                   default=None)
+        self.__parser.add_argument('--profile-top',
+                                   dest='profile_top',
+                                   type=int,
+                                   help='Number of entries printed by --profile and --profile-mem (default: 25)',
+                                   default=25)
+        self.__parser.add_argument('--profile-mem',
+                                   dest='profile_mem',
+                                   help='Traces the memory allocations and prints the top allocation sites',
+                                   action='store_true')
+        self.__parser.add_argument('--metrics',
+                                   type=str,
+                                   metavar='FILE',
+                                   help='Saves the duration of the phases and the counters of the run as json',
+                                   default=None)
+        self.__parser.add_argument('--metrics-prom',
+                                   dest='metrics_prom',
+                                   type=str,
+                                   metavar='FILE',
+                                   help='Saves the metrics of the run for the textfile collector of node-exporter.\n'
+                                        'Note: The file name has to end with .prom',
+                                   default=None)
 
-    def register_tool(self, clazz: Type[AbstractBaseTool]):
-        self.__tool_factory.register_component(clazz)
+    def register_tool(self, tool_id: str, class_path: str, description: str):
+        self.__tool_factory.register_component(tool_id, class_path, description)
 
     @staticmethod
     def __get_log_level(log_level: int) -> int:
@@ -230,26 +377,82 @@ class IntelMQWorkbench:
             console_handler.setLevel(self.__get_log_level(log_level))
             self.logger.addHandler(console_handler)
 
-    def start(self) -> int:
-
-        for tool in self.__tool_factory.components:
-            arg_parser = tool.get_arg_parser()
-            sub_parser = self.__subparsers.add_parser(
-                arg_parser.prog,
-                parents=[self.__common],
-                add_help=False,
-                help=arg_parser.description
+    def __run_profiled(self, key: str, args: argparse.Namespace, options: argparse.Namespace) -> int:
+        if options.profile is not None or options.profile_mem:
+            from intelmqworkbench.profilehandler import ProfileHandler
+            return ProfileHandler(self.logger).run(
+                lambda: self.__tool_factory.run_application(key, args),
+                options.profile is not None,
+                options.profile,
+                options.profile_top,
+                options.profile_mem
             )
+        return self.__tool_factory.run_application(key, args)
+
+    def __run_tool(self, key: str, args: argparse.Namespace, options: argparse.Namespace) -> int:
+        if not (options.metrics or options.metrics_prom):
+            return self.__run_profiled(key, args, options)
+        started = time.time()
+        exit_code = -4
+        try:
+            with self.__tool_factory.metrics.span('command'):
+                exit_code = self.__run_profiled(key, args, options)
+            return exit_code
+        except IntelMQToolException:
+            exit_code = -3
+            raise
+        finally:
+            # also written for failed runs as these are the ones to be graphed
+            from intelmqworkbench.metricshandler import MetricsHandler
+            metrics_handler = MetricsHandler(self.logger)
+            if options.metrics:
+                metrics_handler.save_json(options.metrics, self.__tool_factory.metrics, key, exit_code, started)
+            if options.metrics_prom:
+                metrics_handler.save_prometheus(
+                    options.metrics_prom, self.__tool_factory.metrics, key, exit_code, started
+                )
 
-            # noinspection PyProtectedMember
-            sub_parser._add_container_actions(arg_parser)
-            sub_parser.description = arg_parser.description
+    def start(self) -> int:
+
+        # only the names are known here, the arguments of a tool are parsed once it is selected
+        for tool_id, description in self.__tool_factory.declarations:
+            self.__subparsers.add_parser(tool_id, add_help=False, help=description)
 
         args, argv = self.__parser.parse_known_args()
+        if args.command is None and args.profile in [tool_id for tool_id, _ in self.__tool_factory.declarations]:
+            # "--profile check" the tool was taken as file name
+            args.command = args.profile
+            args.profile = ''
+        key = args.command
+        if args.socket:
+            if not key:
+                self.__parser.print_help()
+                return -10
+            # thin client, neither the tools nor intelmq are loaded
+            from intelmqworkbench.daemonhandler import send_command
+            try:
+                exit_code, output = send_command(args.socket, [key] + argv)
+            except IntelMQWorkbenchException as error:
+                print(error)
+                return -4
+            sys.stdout.write(output)
+            return exit_code
+        del args.socket
+        options = argparse.Namespace()
+        for name in IntelMQWorkbench.RUN_OPTIONS:
+            setattr(options, name, getattr(args, name))
+            delattr(args, name)
+        tool_parser = None
+        if key:
+            try:
+                tool_parser = self.__tool_factory.get_arg_parser(key, self.__parser.prog)
+            except IntelMQToolFactoryException as error:
+                print(error)
+                return -3
+            args, argv = tool_parser.parse_known_args(argv, namespace=args)
         self.__tool_factory.set_config(args)
         # be sure that the custom bots are in the path
         sys.path.append(self.__tool_factory.config.custom_bot_folder)
-        key = args.command
         if key:
             try:
                 # check if there are unknown commands
@@ -263,22 +466,10 @@ class IntelMQWorkbench:
                     self.__set_logger_parameters(args.verbose)
 
                     # check if environment is setup as expected
-                    return self.__tool_factory.run_application(key, args)
+                    return self.__run_tool(key, args, options)
             except IncorrectArgumentException:
-                sub_parser = None
-                for item in getattr(getattr(self.__parser, '_subparsers'), '_actions'):
-                    if isinstance(item, getattr(argparse, '_SubParsersAction')):
-                        sub_parser = item
-                if sub_parser:
-                    sub_parser = sub_parser.choices.get(key, None)
-                    if sub_parser:
-                        if sub_parser.prog.endswith(key):
-                            sub_parser.print_help()
-                            sys.exit(-1)
-                        sys.exit(-2)
-
-                print('No Tools are defined')
-                sys.exit(-40)
+                tool_parser.print_help()
+                sys.exit(-1)
             except IntelMQToolException as error:
                 print(error)
                 return -3
@@ -20,9 +20,11 @@ from intelmqworkbench.classes.intelmqworkbenchconfig import IntelMQWorkbenchConf
 from intelmqworkbench.classes.issues.intelmqbotinstallissue import IntelMQBotInstallIssue
 from intelmqworkbench.classes.issues.intelmqbotissue import IntelMQBotIssue
 from intelmqworkbench.classes.pipeline.pipelinie import Pipeline
+from intelmqworkbench.classes.query.queryindex import QueryIndex
 from intelmqworkbench.classes.runtime.runtime import Runtime
 from intelmqworkbench.outputhandler import OutPutHandler
 from intelmqworkbench.intelmqhandler import IntelMQHandler
+from intelmqworkbench.workspace import Workspace
 
 
 class AbstractBaseTool(ABC):
@@ -32,7 +34,10 @@ class AbstractBaseTool(ABC):
         self.config = config
         self.intelmq_handler = IntelMQHandler(logger)
         self.output_handler = OutPutHandler(logger)
-        self.__bots: List[IntelMQBot] = list()
+        # parsed configurations and discovered bots, shared between the tools when set by the ToolFactory
+        self.workspace = Workspace(logger, config)
+        # set by the ToolFactory, allows running other tools in the same process
+        self.tool_factory = None
 
     @abstractmethod
     def get_arg_parser(self) -> ArgumentParser:
@@ -65,78 +70,25 @@ class AbstractBaseTool(ABC):
             )
 
     def get_all_bots(self, force: bool) -> List[IntelMQBot]:
-        if len(self.__bots) == 0:
-            self.__bots = self.fetch_bots(force)
-        return self.__bots
+        return self.workspace.get_all_bots(force)
 
     def fetch_bots(self, force):
-        intelmq_bots = self.intelmq_handler.get_bots(self.config.bot_folder, False)
-        bots = self.get_default_bots(force)
-        if bots:
-            self.intelmq_handler.merge_bots_conf_and_bots(intelmq_bots, bots)
-        custom_bots = self.intelmq_handler.get_bots(self.config.custom_bot_folder, True)
-        # Mark bots as custom
-        for custom_bot in custom_bots:
-            custom_bot.custom = True
-        # mark custom bots and also remove them from the ones installed in the intelmq bots folder
-        all_bots = list()
-        for bot in intelmq_bots:
-            found = False
-            for custom_bot in custom_bots:
-                # the common denominator
-                if bot.class_name == custom_bot.class_name:
-                    found = True
-                    # if the bot can be found inside the installed ones then it is installed (only for IntelMQ 3.x)
-                    custom_bot.installed = True
-                    break
-            if not found:
-                all_bots.append(bot)
-        all_bots = all_bots + custom_bots
-        running_bots = self.get_running_bots(force)
-        if running_bots:
-            self.intelmq_handler.set_install_by_bots(all_bots, running_bots)
-        set_install_by_path = bots is None
-        runtime = self.get_runtime()
-        self.intelmq_handler.merge_bots_and_runtime(all_bots, runtime, self.config.bot_folder, set_install_by_path)
-        return all_bots
+        return self.workspace.fetch_bots(force)
 
     def get_runtime(self) -> Runtime:
-        if self.config.version.startswith('3'):
-            path = self.config.runtime_yaml_file
-            runtime = self.intelmq_handler.parse_runtime_yaml(path)
-        else:
-            path = self.config.runtime_conf_file
-            runtime = self.intelmq_handler.parse_runtime_conf(path)
-        runtime.location = path
-        return runtime
+        return self.workspace.get_runtime()
 
     def get_pipeline(self, force: bool = False) -> Optional[Pipeline]:
-        if self.config.version.startswith('3') and not force:
-            return None
-        pipeline = self.intelmq_handler.parse_pipeline(self.config.pipeline_conf_file)
-        return pipeline
+        return self.workspace.get_pipeline(force)
 
     def get_running_bots(self, force: bool = False) -> Optional[BOTS]:
-        if self.config.version.startswith('3') and not force:
-            return None
-        path = self.config.running_BOTS
-        bots = self.intelmq_handler.parse_bots(path)
-        bots.location = path
-        return bots
+        return self.workspace.get_running_bots(force)
 
     def get_default_bots(self, force: bool = False) -> Optional[BOTS]:
-        if self.config.version.startswith('3') and not force:
-            return None
-        path = self.config.default_BOTS
-        bots = self.intelmq_handler.parse_bots(path)
-        bots.location = path
-        return bots
+        return self.workspace.get_default_bots(force)
 
     def get_issues(self, force: bool = False) -> Optional[List[Union[IntelMQBotIssue, IntelMQBotInstallIssue]]]:
-        runtime = self.get_runtime()
-        bots = self.get_all_bots(force)
-        runtime_bots = self.get_running_bots(force)
-        issues = self.intelmq_handler.get_issues(
-            bots, self.config.bot_folder, self.config.bin_folder, runtime, runtime_bots
-        )
-        return issues
+        return self.workspace.get_issues(force)
+
+    def get_query_index(self, force: bool = False, instances: bool = True) -> QueryIndex:
+        return self.workspace.get_query_index(force, instances)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+from typing import List, Optional
+
+from intelmqworkbench.utils import get_percentile
+
+
+class BenchResult:
+
+    PERCENTILES = [50, 95, 99]
+
+    def __init__(self, bot_id: str):
+        self.bot_id = bot_id
+        self.warmup = 0
+        self.messages = 0
+        self.sent = 0
+        # wall time of the measured messages
+        self.seconds = 0.0
+        # duration of every process() call in nanoseconds
+        self.latencies: List[int] = list()
+        # cpu time spent in process() split into the bot and the fiddler (reading, decoding and encoding messages)
+        self.bot_cpu_ns = 0
+        self.fiddler_cpu_ns = 0
+        # file the bot class was loaded from
+        self.file_path: Optional[str] = None
+        # messages sent per measured message, only if captured
+        self.outputs: Optional[List[List[dict]]] = None
+
+    @property
+    def throughput(self) -> float:
+        if self.seconds:
+            return self.messages / self.seconds
+        return 0.0
+
+    @property
+    def cpu_ns(self) -> int:
+        return self.bot_cpu_ns + self.fiddler_cpu_ns
+
+    def get_latency(self, percentile: Optional[float] = None) -> float:
+        # in milliseconds, without percentile the maximum
+        if not self.latencies:
+            return 0.0
+        if percentile is None:
+            return max(self.latencies) / 1e6
+        return get_percentile(self.latencies, percentile) / 1e6
+
+    def get_latencies(self) -> dict:
+        output = dict(('p{}'.format(percentile), self.get_latency(percentile)) for percentile in self.PERCENTILES)
+        output['max'] = self.get_latency()
+        return output
+
+    def to_json(self) -> dict:
+        return {
+            'bot_id': self.bot_id,
+            'file_path': self.file_path,
+            'warmup': self.warmup,
+            'messages': self.messages,
+            'sent': self.sent,
+            'seconds': self.seconds,
+            'throughput': self.throughput,
+            'latency_ms': self.get_latencies(),
+            'cpu_seconds': {
+                'bot': self.bot_cpu_ns / 1e9,
+                'fiddler': self.fiddler_cpu_ns / 1e9
+            }
+        }
+
+    def __repr__(self) -> str:
+        return '{} - ({})'.format(self.bot_id, self.throughput)
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import math
+from statistics import mean, variance
+from typing import List, Optional, Tuple
+
+from intelmqworkbench.classes.benchresult import BenchResult
+from intelmqworkbench.utils import get_percentile
+
+# two sided 95% quantiles of the t distribution for 1 to 30 degrees of freedom
+T_QUANTILES = [
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228, 2.201, 2.179, 2.160, 2.145, 2.131,
+    2.120, 2.110, 2.101, 2.093, 2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042
+]
+
+
+class OutputDifference:
+
+    def __init__(self, position: int, description: str):
+        self.position = position
+        self.description = description
+
+    def to_json(self) -> dict:
+        return {'position': self.position, 'description': self.description}
+
+    def __repr__(self) -> str:
+        return '{} - ({})'.format(self.position, self.description)
+
+
+class ComparisonResult:
+
+    PERCENTILES = [50, 95, 99]
+
+    def __init__(self, bot_id: str, against: str):
+        self.bot_id = bot_id
+        self.against = against
+        # the path whose messages both versions read, a trusted run is not comparable with a validated one
+        self.path = '_default'
+        self.trusted = False
+        self.validate_every = 0
+        # one result per round and version, the rounds are run alternately
+        self.base: List[BenchResult] = list()
+        self.other: List[BenchResult] = list()
+        self.differences: List[OutputDifference] = list()
+        # number of messages whose output was compared
+        self.compared = 0
+
+    @staticmethod
+    def get_t_quantile(degrees: float) -> float:
+        if degrees < 1:
+            return T_QUANTILES[0]
+        if degrees > len(T_QUANTILES):
+            return 1.96
+        return T_QUANTILES[int(degrees) - 1]
+
+    def get_throughput_ratio(self) -> Tuple[float, Optional[float], Optional[float]]:
+        # ratio of the geometric mean throughput of the other version to the base with the 95% confidence interval
+        # computed on the log throughputs (welch), the interval is missing with less than two rounds
+        base = [math.log(result.throughput) for result in self.base if result.throughput]
+        other = [math.log(result.throughput) for result in self.other if result.throughput]
+        if not base or not other:
+            return 0.0, None, None
+        difference = mean(other) - mean(base)
+        if len(base) < 2 or len(other) < 2:
+            return math.exp(difference), None, None
+        base_error = variance(base) / len(base)
+        other_error = variance(other) / len(other)
+        error = math.sqrt(base_error + other_error)
+        if error == 0:
+            return math.exp(difference), math.exp(difference), math.exp(difference)
+        degrees = (base_error + other_error) ** 2 / (
+            base_error ** 2 / (len(base) - 1) + other_error ** 2 / (len(other) - 1)
+        )
+        margin = self.get_t_quantile(degrees) * error
+        return math.exp(difference), math.exp(difference - margin), math.exp(difference + margin)
+
+    @staticmethod
+    def get_throughput(results: List[BenchResult]) -> float:
+        if not results:
+            return 0.0
+        return mean([result.throughput for result in results])
+
+    @staticmethod
+    def get_latencies(results: List[BenchResult]) -> dict:
+        # milliseconds over the messages of all rounds
+        latencies = [latency for result in results for latency in result.latencies]
+        output = dict(
+            ('p{}'.format(percentile), get_percentile(latencies, percentile) / 1e6)
+            for percentile in ComparisonResult.PERCENTILES
+        )
+        output['max'] = max(latencies) / 1e6 if latencies else 0.0
+        return output
+
+    def get_latency_shift(self) -> dict:
+        # change of every percentile in percent
+        base = self.get_latencies(self.base)
+        other = self.get_latencies(self.other)
+        return dict(
+            (key, (other[key] - value) / value * 100.0 if value else 0.0) for key, value in base.items()
+        )
+
+    def to_json(self) -> dict:
+        ratio, low, high = self.get_throughput_ratio()
+        return {
+            'bot_id': self.bot_id,
+            'against': self.against,
+            'path': self.path,
+            'trusted': self.trusted,
+            'validate_every': self.validate_every,
+            'rounds': len(self.base),
+            'messages': self.base[0].messages if self.base else 0,
+            'base_file_path': self.base[0].file_path if self.base else None,
+            'against_file_path': self.other[0].file_path if self.other else None,
+            'throughput': {
+                'base': self.get_throughput(self.base),
+                'against': self.get_throughput(self.other),
+                'ratio': ratio,
+                'ratio_ci95': [low, high]
+            },
+            'latency_ms': {
+                'base': self.get_latencies(self.base),
+                'against': self.get_latencies(self.other),
+                'shift_percent': self.get_latency_shift()
+            },
+            'compared': self.compared,
+            'differences': [difference.to_json() for difference in self.differences]
+        }
+
+    def __repr__(self) -> str:
+        return '{} - ({})'.format(self.bot_id, self.against)
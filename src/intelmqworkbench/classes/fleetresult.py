@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+from typing import Dict, Optional
+
+
+class FleetResult:
+
+    def __init__(self, root: str):
+        self.root = root
+        self.bots = 0
+        self.instances = 0
+        # check (bots, runtime, strange) -> number of issues
+        self.checks: Dict[str, int] = dict()
+        # issue type -> number of issues
+        self.issue_types: Dict[str, int] = dict()
+        self.seconds = 0.0
+        # the discovery was taken from the cache shared by the roots
+        self.cached_discovery = False
+        self.error: Optional[str] = None
+
+    @property
+    def issues(self) -> int:
+        return sum(self.checks.values())
+
+    def add_issue(self, check: str, type_: str) -> None:
+        self.checks[check] = self.checks.get(check, 0) + 1
+        self.issue_types[type_] = self.issue_types.get(type_, 0) + 1
+
+    def to_json(self) -> dict:
+        return {
+            'root': self.root,
+            'bots': self.bots,
+            'instances': self.instances,
+            'issues': self.issues,
+            'checks': self.checks,
+            'issue_types': self.issue_types,
+            'seconds': self.seconds,
+            'cached_discovery': self.cached_discovery,
+            'error': self.error
+        }
+
+    def __repr__(self) -> str:
+        return '{} - ({})'.format(self.root, self.issues)
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+from typing import Dict
+
+
+class HopResult:
+
+    def __init__(self, bot_id: str):
+        self.bot_id = bot_id
+        # number of process() calls
+        self.processed = 0
+        # path -> messages sent
+        self.sent: Dict[str, int] = dict()
+        # 'path -> destination' -> messages passed, the destination is a bot_id or a queue no bot is reading
+        self.routes: Dict[str, int] = dict()
+        # messages written to the output as no bot of the chain receives them
+        self.exited = 0
+        # messages sent to a path without queues with path_permissive
+        self.dropped = 0
+        self.nanoseconds = 0
+
+    @property
+    def seconds(self) -> float:
+        return self.nanoseconds / 1e9
+
+    @property
+    def milliseconds_per_message(self) -> float:
+        if self.processed:
+            return self.nanoseconds / 1e6 / self.processed
+        return 0.0
+
+    def add_route(self, path: str, destination: str) -> None:
+        key = '{} -> {}'.format(path, destination)
+        self.routes[key] = self.routes.get(key, 0) + 1
+
+    def to_json(self) -> dict:
+        return {
+            'bot_id': self.bot_id,
+            'processed': self.processed,
+            'sent': self.sent,
+            'routes': self.routes,
+            'exited': self.exited,
+            'dropped': self.dropped,
+            'seconds': self.seconds
+        }
+
+    def __repr__(self) -> str:
+        return '{} - ({})'.format(self.bot_id, self.processed)
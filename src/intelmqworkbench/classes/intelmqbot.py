@@ -3,18 +3,19 @@
 """
 Created on 17.01.20
 """
-from typing import List, Optional, Type
+from typing import List, Optional, Type, TYPE_CHECKING
 
 __author__ = 'Weber Jean-Paul'
 __email__ = 'jean-paul.weber@restena.lu'
 __copyright__ = 'Copyright 2019-present, Restena CSIRT'
 __license__ = 'GPL v3+'
 
-from intelmq.lib.bot import Bot
-
 from intelmqworkbench.classes.parameters import Parameters
 from intelmqworkbench.classes.runtime.runtimeitem import RuntimeItem
 
+if TYPE_CHECKING:
+    from intelmq.lib.bot import Bot
+
 
 class IntelMQBot:
 
@@ -22,7 +23,7 @@ class IntelMQBot:
         self.bot_variable: Optional[str] = None
 
         # class/code details
-        self.clazz: Optional[Type[Bot]] = None
+        self.clazz: Optional[Type['Bot']] = None
         self.file_path: Optional[str] = None
 
         self.description: Optional[str] = None
@@ -48,6 +49,20 @@ class IntelMQBot:
     def __repr__(self) -> str:
         return '{} - ({})'.format(self.name, self.class_name)
 
+    def to_json(self) -> dict:
+        return {
+            'name': self.name,
+            'class_name': self.class_name,
+            'module': self.module,
+            'group': self.group,
+            'description': self.description,
+            'file_path': self.file_path,
+            'custom': self.custom,
+            'installed': self.installed,
+            'default_parameters': self.default_parameters.to_json() if self.default_parameters else None,
+            'runtime_instances': [item.bot_id for item in self.runtime_items]
+        }
+
     def get_runtime_item_by_id(self, bot_id: str) -> Optional[RuntimeItem]:
         for item in self.runtime_items:
             if item.bot_id == bot_id:
@@ -144,14 +144,14 @@ class IntelMQWorkbenchConfig:
 
     @property
     def running_BOTS(self) -> str:
-        if self.__default_BOTS_file:
-            return self.__default_BOTS_file
+        if self.__runtime_BOTS_file:
+            return self.__runtime_BOTS_file
         else:
             return os.path.join(self.config_dir, 'BOTS')
 
     @running_BOTS.setter
     def running_BOTS(self, value: str) -> None:
-        self.__default_BOTS_file = value
+        self.__runtime_BOTS_file = value
 
     @staticmethod
     def __check_folder(folder_path: str) -> None:
@@ -21,3 +21,9 @@ class Issue(ABC):
     @abstractmethod
     def description(self) -> str:
         raise NotImplementedError()
+
+    def to_json(self) -> dict:
+        return {
+            'type': self.__class__.__name__,
+            'description': self.description
+        }
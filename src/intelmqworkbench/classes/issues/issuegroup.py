@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import json
+from typing import List, Optional, Tuple
+
+from intelmqworkbench.classes.intelmqbot import IntelMQBot
+from intelmqworkbench.classes.issues import Issue
+from intelmqworkbench.classes.issues.issues import MismatchIssue, MissingIssue, AbsentIssue, AdditionalIssue
+from intelmqworkbench.classes.issues.issues import ReferenceIssue
+
+
+class IssueGroup:
+
+    def __init__(self):
+        self.bot: Optional[IntelMQBot] = None
+        self.module: Optional[str] = None
+        self.type_: Optional[str] = None
+        self.key: Optional[str] = None
+        self.expected: Optional[any] = None
+        self.issues: List[Issue] = list()
+        # runtime instances having the issue, in the order they were found
+        self.bot_ids: List[str] = list()
+
+    @staticmethod
+    def get_module(bot: Optional[IntelMQBot], issue: Issue) -> Optional[str]:
+        if bot:
+            return bot.module
+        issue_bot = getattr(issue, 'bot', None)
+        if issue_bot:
+            return issue_bot.module
+        return getattr(issue, 'module', None)
+
+    @staticmethod
+    def get_expected(issue: Issue) -> Optional[any]:
+        if isinstance(issue, MismatchIssue):
+            return issue.should_value
+        elif isinstance(issue, (MissingIssue, AbsentIssue)):
+            return issue.default_value
+        elif isinstance(issue, AdditionalIssue):
+            return issue.value
+        elif isinstance(issue, ReferenceIssue):
+            return issue.location.value
+        return None
+
+    @staticmethod
+    def get_group_key(bot: Optional[IntelMQBot], issue: Issue) -> Tuple[Optional[str], str, Optional[str], str]:
+        # (bot module, issue type, key, expected value), the values may be lists or dicts hence the json
+        if getattr(issue, 'key', None) is None and not isinstance(issue, ReferenceIssue):
+            # issues without key only group if they are the same
+            expected = issue.description
+        else:
+            expected = json.dumps(IssueGroup.get_expected(issue), sort_keys=True, default=str)
+        return IssueGroup.get_module(bot, issue), issue.__class__.__name__, getattr(issue, 'key', None), expected
+
+    def add(self, bot: Optional[IntelMQBot], bot_id: Optional[str], issue: Issue) -> None:
+        if not self.issues:
+            self.bot = bot
+            self.module = self.get_module(bot, issue)
+            self.type_ = issue.__class__.__name__
+            self.key = getattr(issue, 'key', None)
+            self.expected = self.get_expected(issue)
+        self.issues.append(issue)
+        if bot_id is not None and bot_id not in self.bot_ids:
+            self.bot_ids.append(bot_id)
+
+    @property
+    def count(self) -> int:
+        return len(self.issues)
+
+    @property
+    def description(self) -> str:
+        first = self.issues[0]
+        if isinstance(first, MismatchIssue):
+            values = list()
+            for issue in self.issues:
+                if issue.has_value not in values:
+                    values.append(issue.has_value)
+            return 'Key "{}" should be "{}" but has {}'.format(
+                self.key, self.expected, ', '.join('"{}"'.format(value) for value in values)
+            )
+        if isinstance(first, ReferenceIssue) and self.count > 1:
+            # the description of a single issue names its reference, these are listed as instances
+            return 'Bot "{}" ({}) is referenced in {} but not installed!'.format(
+                first.name, first.module, first.location.value
+            )
+        return first.description
+
+    def to_json(self) -> dict:
+        return {
+            'type': self.type_,
+            'bot_name': self.bot.name if self.bot else None,
+            'bot_module': self.module,
+            'key': self.key,
+            'expected': self.expected,
+            'count': self.count,
+            'bot_ids': self.bot_ids,
+            'description': self.description
+        }
+
+    def __repr__(self) -> str:
+        return '{} - ({})'.format(self.type_, self.count)
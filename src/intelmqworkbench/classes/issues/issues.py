@@ -14,6 +14,7 @@ from typing import Optional, Union
 
 from intelmqworkbench.classes.intelmqbot import IntelMQBot
 from intelmqworkbench.classes.issues import Issue
+from intelmqworkbench.classes.symlinkdrift import SymlinkDrift
 
 
 class MissingIssue(Issue):
@@ -29,6 +30,12 @@ class MissingIssue(Issue):
             self.key, self.default_value
         )
 
+    def to_json(self) -> dict:
+        output = super(MissingIssue, self).to_json()
+        output['key'] = self.key
+        output['default_value'] = self.default_value
+        return output
+
 
 class MismatchIssue(Issue):
 
@@ -44,6 +51,13 @@ class MismatchIssue(Issue):
             self.key, self.has_value, self.should_value
         )
 
+    def to_json(self) -> dict:
+        output = super(MismatchIssue, self).to_json()
+        output['key'] = self.key
+        output['has_value'] = self.has_value
+        output['should_value'] = self.should_value
+        return output
+
 
 class AdditionalIssue(Issue):
 
@@ -58,6 +72,12 @@ class AdditionalIssue(Issue):
             self.key, self.value
         )
 
+    def to_json(self) -> dict:
+        output = super(AdditionalIssue, self).to_json()
+        output['key'] = self.key
+        output['value'] = self.value
+        return output
+
 
 class AbsentIssue(Issue):
 
@@ -73,6 +93,12 @@ class AbsentIssue(Issue):
             self.default_value
         )
 
+    def to_json(self) -> dict:
+        output = super(AbsentIssue, self).to_json()
+        output['key'] = self.key
+        output['default_value'] = self.default_value
+        return output
+
 
 class MissingExecutable(Issue):
 
@@ -91,6 +117,14 @@ class MissingExecutable(Issue):
             self.bot.module
         )
 
+    def to_json(self) -> dict:
+        output = super(MissingExecutable, self).to_json()
+        output['path'] = self.path
+        output['file_name'] = self.file_name
+        output['bot_name'] = self.bot.name
+        output['bot_module'] = self.bot.module
+        return output
+
 
 class AvailableExecutableIssue(Issue):
 
@@ -106,6 +140,12 @@ class AvailableExecutableIssue(Issue):
             self.path
         )
 
+    def to_json(self) -> dict:
+        output = super(AvailableExecutableIssue, self).to_json()
+        output['path'] = self.path
+        output['file_name'] = self.file_name
+        return output
+
 
 class NotInstalledIssue(Issue):
 
@@ -120,6 +160,12 @@ class NotInstalledIssue(Issue):
             self.bot.group
         )
 
+    def to_json(self) -> dict:
+        output = super(NotInstalledIssue, self).to_json()
+        output['bot_name'] = self.bot.name
+        output['bot_module'] = self.bot.module
+        return output
+
 
 class MissingDefaultConfigurationIssue(Issue):
 
@@ -134,6 +180,12 @@ class MissingDefaultConfigurationIssue(Issue):
             self.bot.group
         )
 
+    def to_json(self) -> dict:
+        output = super(MissingDefaultConfigurationIssue, self).to_json()
+        output['bot_name'] = self.bot.name
+        output['bot_module'] = self.bot.module
+        return output
+
 
 class MissingDescriptionIssue(Issue):
 
@@ -148,6 +200,12 @@ class MissingDescriptionIssue(Issue):
             self.bot.group
         )
 
+    def to_json(self) -> dict:
+        output = super(MissingDescriptionIssue, self).to_json()
+        output['bot_name'] = self.bot.name
+        output['bot_module'] = self.bot.module
+        return output
+
 
 class InstallIssueLocations(Enum):
     BOTS = 'BOTS'
@@ -173,6 +231,14 @@ class ReferenceIssue(Issue):
             self.reference
         )
 
+    def to_json(self) -> dict:
+        output = super(ReferenceIssue, self).to_json()
+        output['name'] = self.name
+        output['module'] = self.module
+        output['location'] = self.location.value
+        output['reference'] = self.reference
+        return output
+
 
 class MismatchInstallIssue(Issue):
 
@@ -182,6 +248,7 @@ class MismatchInstallIssue(Issue):
         self.bot_folder: Optional[str] = None
         self.source: Optional[str] = None
         self.destination: Optional[str] = None
+        self.drift: Optional[SymlinkDrift] = None
 
     @property
     def description(self) -> str:
@@ -190,3 +257,12 @@ class MismatchInstallIssue(Issue):
             self.bot.module,
             self.bot_folder
         )
+
+    def to_json(self) -> dict:
+        output = super(MismatchInstallIssue, self).to_json()
+        output['bot_name'] = self.bot.name
+        output['bot_module'] = self.bot.module
+        output['source'] = str(self.source)
+        output['destination'] = str(self.destination)
+        output['drift'] = self.drift.to_json() if self.drift else None
+        return output
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+from typing import List, Optional, Tuple
+
+from intelmqworkbench.utils import get_linear_fit
+
+
+class MemorySample:
+
+    def __init__(self, messages: int, traced: int, rss: Optional[int]):
+        # number of messages processed after the warm-up
+        self.messages = messages
+        # bytes allocated by python and still alive, the resident set size without the memory of tracemalloc
+        self.traced = traced
+        self.rss = rss
+
+    def to_json(self) -> dict:
+        return {'messages': self.messages, 'traced': self.traced, 'rss': self.rss}
+
+    def __repr__(self) -> str:
+        return '{} - ({})'.format(self.messages, self.traced)
+
+
+class GrowingSite:
+
+    def __init__(self, file_name: str, line: int, sizes: List[int], count: int, slope: float):
+        self.file_name = file_name
+        self.line = line
+        # retained bytes at every sample
+        self.sizes = sizes
+        # blocks at the last sample
+        self.count = count
+        # bytes per message
+        self.slope = slope
+
+    @property
+    def growth(self) -> int:
+        return self.sizes[-1] - self.sizes[0] if self.sizes else 0
+
+    def to_json(self) -> dict:
+        return {
+            'file_name': self.file_name,
+            'line': self.line,
+            'growth': self.growth,
+            'bytes_per_message': self.slope,
+            'count': self.count,
+            'sizes': self.sizes
+        }
+
+    def __repr__(self) -> str:
+        return '{} - ({})'.format(self.file_name, self.line)
+
+
+class LeakResult:
+
+    # a trend with a lower coefficient of determination is not considered as growth, e.g. a cache filling up once
+    MIN_R2 = 0.8
+
+    def __init__(self, bot_id: str, messages: int, interval: int):
+        self.bot_id = bot_id
+        self.file_path: Optional[str] = None
+        self.messages = messages
+        self.interval = interval
+        self.warmup = 0
+        self.seconds = 0.0
+        # how often the messages were read from the start again
+        self.loops = 0
+        self.samples: List[MemorySample] = list()
+        # allocation sites whose retained size never decreased and grew, largest growth first
+        self.sites: List[GrowingSite] = list()
+
+    def get_trend(self, rss: bool = False) -> Tuple[float, float]:
+        # bytes per message and the coefficient of determination of the traced memory or the resident set size
+        samples = [sample for sample in self.samples if not rss or sample.rss is not None]
+        slope, intercept, r2 = get_linear_fit(
+            [sample.messages for sample in samples], [sample.rss if rss else sample.traced for sample in samples]
+        )
+        return slope, r2
+
+    def is_leaking(self, threshold: float) -> bool:
+        slope, r2 = self.get_trend()
+        return len(self.samples) >= 3 and slope > threshold and r2 >= LeakResult.MIN_R2
+
+    def to_json(self) -> dict:
+        traced_slope, traced_r2 = self.get_trend()
+        rss_slope, rss_r2 = self.get_trend(True)
+        return {
+            'bot_id': self.bot_id,
+            'file_path': self.file_path,
+            'messages': self.messages,
+            'interval': self.interval,
+            'warmup': self.warmup,
+            'seconds': self.seconds,
+            'loops': self.loops,
+            'trend': {
+                'traced': {'bytes_per_message': traced_slope, 'r2': traced_r2},
+                'rss': {'bytes_per_message': rss_slope, 'r2': rss_r2}
+            },
+            'samples': [sample.to_json() for sample in self.samples],
+            'sites': [site.to_json() for site in self.sites]
+        }
+
+    def __repr__(self) -> str:
+        return '{} - ({})'.format(self.bot_id, self.messages)
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Dict, Iterator
+
+
+class Metrics:
+
+    def __init__(self):
+        # phase -> wall-clock seconds and number of times the phase was entered
+        self.spans: Dict[str, float] = dict()
+        self.span_counts: Dict[str, int] = dict()
+        self.counters: Dict[str, int] = dict()
+        # phases currently measured, a nested phase of the same name is not counted twice
+        self.__active: Dict[str, int] = dict()
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        if self.__active.get(name, 0) > 0:
+            self.__active[name] += 1
+            try:
+                yield
+            finally:
+                self.__active[name] -= 1
+            return
+        self.__active[name] = 1
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.__active[name] = 0
+            self.spans[name] = self.spans.get(name, 0.0) + perf_counter() - started
+            self.span_counts[name] = self.span_counts.get(name, 0) + 1
+
+    def increment(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_counter(self, name: str, value: int) -> None:
+        self.counters[name] = value
+
+    def reset(self) -> None:
+        self.spans.clear()
+        self.span_counts.clear()
+        self.counters.clear()
+
+    def to_json(self) -> dict:
+        spans = dict()
+        for name, seconds in self.spans.items():
+            spans[name] = {'seconds': seconds, 'count': self.span_counts.get(name, 0)}
+        return {
+            'spans': spans,
+            'counters': dict(self.counters)
+        }
+
+    def __repr__(self) -> str:
+        return '{} - ({})'.format(self.__class__.__name__, ', '.join(
+            '{}: {:.3f}s'.format(name, seconds) for name, seconds in self.spans.items()
+        ))
@@ -28,6 +28,9 @@ class Pipeline:
     def add_item(self, runtime_item: PipelineItem) -> None:
         self.__items.append(runtime_item)
 
+    def get_items(self) -> List[PipelineItem]:
+        return self.__items
+
     def get_item_for(self, bot_id: str) -> Optional[PipelineItem]:
         for item in self.__items:
             if item.bot_id == bot_id:
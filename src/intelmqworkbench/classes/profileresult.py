@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+from typing import Dict, List, Optional
+
+
+class ProfiledFunction:
+
+    def __init__(self, name: str, category: str, calls: int, seconds: float, cumulative: float):
+        self.name = name
+        self.category = category
+        self.calls = calls
+        # time spent in the function itself and including the functions it called
+        self.seconds = seconds
+        self.cumulative = cumulative
+
+    def to_json(self) -> dict:
+        return {
+            'name': self.name,
+            'category': self.category,
+            'calls': self.calls,
+            'seconds': self.seconds,
+            'cumulative': self.cumulative
+        }
+
+    def __repr__(self) -> str:
+        return '{} - ({})'.format(self.name, self.seconds)
+
+
+class SlowMessage:
+
+    def __init__(self, position: int, nanoseconds: int, allocated: Optional[int] = None):
+        # position of the message in the input
+        self.position = position
+        self.nanoseconds = nanoseconds
+        # peak of the bytes allocated while processing the message, only with memory tracing
+        self.allocated = allocated
+
+    @property
+    def milliseconds(self) -> float:
+        return self.nanoseconds / 1e6
+
+    def to_json(self) -> dict:
+        return {'position': self.position, 'milliseconds': self.milliseconds, 'allocated': self.allocated}
+
+    def __repr__(self) -> str:
+        return '{} - ({})'.format(self.position, self.milliseconds)
+
+
+class AllocationSite:
+
+    def __init__(self, file_name: str, line: int, size: int, count: int):
+        self.file_name = file_name
+        self.line = line
+        self.size = size
+        self.count = count
+
+    def to_json(self) -> dict:
+        return {'file_name': self.file_name, 'line': self.line, 'size': self.size, 'count': self.count}
+
+    def __repr__(self) -> str:
+        return '{} - ({})'.format(self.file_name, self.line)
+
+
+class ProfileResult:
+
+    # the bot, the message classes and harmonization of intelmq, the reading and writing of the fiddler, the rest of
+    # intelmq and everything else (python and other libraries)
+    CATEGORIES = ['bot', 'harmonization', 'fiddler', 'intelmq', 'other']
+
+    def __init__(self, bot_id: str):
+        self.bot_id = bot_id
+        self.file_path: Optional[str] = None
+        self.messages = 0
+        # messages processed before by an other instance of the bot, they are not profiled
+        self.warmup = 0
+        # wall time of the process() calls
+        self.seconds = 0.0
+        # category -> seconds spent in the functions of the category
+        self.split: Dict[str, float] = dict((category, 0.0) for category in ProfileResult.CATEGORIES)
+        self.functions: List[ProfiledFunction] = list()
+        # slowest first
+        self.slowest: List[SlowMessage] = list()
+        # folder the slowest messages and the statistics are saved to
+        self.folder: Optional[str] = None
+        self.stats_file: Optional[str] = None
+        # only with memory tracing, bytes still allocated after the last message and the peak
+        self.memory_current: Optional[int] = None
+        self.memory_peak: Optional[int] = None
+        self.allocation_sites: List[AllocationSite] = list()
+
+    @property
+    def profiled_seconds(self) -> float:
+        return sum(self.split.values())
+
+    def to_json(self) -> dict:
+        return {
+            'bot_id': self.bot_id,
+            'file_path': self.file_path,
+            'messages': self.messages,
+            'warmup': self.warmup,
+            'seconds': self.seconds,
+            'split_seconds': self.split,
+            'functions': [function.to_json() for function in self.functions],
+            'slowest': [message.to_json() for message in self.slowest],
+            'folder': self.folder,
+            'stats_file': self.stats_file,
+            'memory': {
+                'current': self.memory_current,
+                'peak': self.memory_peak,
+                'allocation_sites': [site.to_json() for site in self.allocation_sites]
+            }
+        }
+
+    def __repr__(self) -> str:
+        return '{} - ({})'.format(self.bot_id, self.messages)
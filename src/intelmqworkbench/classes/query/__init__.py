@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+from abc import ABC, abstractmethod
+from typing import Optional, Set, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from intelmqworkbench.classes.query.queryindex import QueryIndex
+    from intelmqworkbench.classes.query.queryrecord import QueryRecord
+
+
+class Expression(ABC):
+
+    @abstractmethod
+    def evaluate(self, record: 'QueryRecord') -> bool:
+        raise NotImplementedError()
+
+    def get_candidates(self, index: 'QueryIndex') -> Optional[Set[int]]:
+        # positions of the records which may match, None if all of them have to be evaluated
+        return None
+
+    @property
+    @abstractmethod
+    def description(self) -> str:
+        raise NotImplementedError()
+
+    def __repr__(self) -> str:
+        return '{} - ({})'.format(self.__class__.__name__, self.description)
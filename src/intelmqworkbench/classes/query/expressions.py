@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import operator
+import re
+from typing import List, Optional, Set
+
+from intelmqworkbench.classes.query import Expression
+from intelmqworkbench.classes.query.queryindex import QueryIndex
+from intelmqworkbench.classes.query.queryrecord import QueryRecord
+from intelmqworkbench.exceptions import IntelMQQueryException
+
+
+class Comparison(Expression):
+
+    OPERATORS = {
+        '=': operator.eq,
+        '==': operator.eq,
+        '!=': operator.ne,
+        '<': operator.lt,
+        '<=': operator.le,
+        '>': operator.gt,
+        '>=': operator.ge,
+        '~': None,
+        'in': None
+    }
+
+    def __init__(self, field: str, operator_: str, value: Optional[any], default: bool = False):
+        if operator_ not in Comparison.OPERATORS:
+            raise IntelMQQueryException('Unknown operator "{}"'.format(operator_))
+        self.field = field
+        self.operator = operator_
+        self.value = value
+        # compares against the default of the bot instead of a value e.g. param.rate_limit != default
+        self.default = default
+        self.__resolve = QueryRecord.get_resolver(field)
+        self.__reference = None
+        self.__pattern = None
+        if default:
+            prefix, _, key = field.partition('.')
+            if prefix != 'param':
+                raise IntelMQQueryException('Only param.<key> can be compared to default, not "{}"'.format(field))
+            self.__reference = QueryRecord.get_resolver('default.{}'.format(key))
+        if operator_ == '~':
+            try:
+                self.__pattern = re.compile(str(value))
+            except re.error as error:
+                raise IntelMQQueryException('Invalid pattern "{}": {}'.format(value, error))
+        elif operator_ == 'in' and not isinstance(value, list):
+            raise IntelMQQueryException('"in" requires a list e.g. [1, 2]')
+
+    @staticmethod
+    def coerce(value: any, expected: any) -> any:
+        # configurations contain numbers as strings, these are compared as numbers
+        if isinstance(expected, (int, float)) and not isinstance(expected, bool) and isinstance(value, str):
+            try:
+                return float(value)
+            except ValueError:
+                return value
+        return value
+
+    def compare(self, value: any, expected: any) -> bool:
+        if self.operator == '~':
+            return value is not None and self.__pattern.search(str(value)) is not None
+        if self.operator == 'in':
+            return any(self.compare_values(operator.eq, value, item) for item in expected)
+        return self.compare_values(Comparison.OPERATORS[self.operator], value, expected)
+
+    @staticmethod
+    def compare_values(function, value: any, expected: any) -> bool:
+        if value is None or expected is None:
+            # missing values are only equal to null
+            if function is operator.eq:
+                return value is expected
+            if function is operator.ne:
+                return value is not expected
+            return False
+        value = Comparison.coerce(value, expected)
+        expected = Comparison.coerce(expected, value)
+        try:
+            return function(value, expected)
+        except TypeError:
+            return False
+
+    def evaluate(self, record: QueryRecord) -> bool:
+        expected = self.__reference(record) if self.__reference else self.value
+        return self.compare(self.__resolve(record), expected)
+
+    def get_candidates(self, index: QueryIndex) -> Optional[Set[int]]:
+        if self.default:
+            return None
+        values = self.value if self.operator == 'in' else [self.value]
+        if index.is_indexed(self.field) and self.operator in ['=', '==', 'in']:
+            # only strings and booleans, numbers may be equal to a differently written string
+            if all(isinstance(value, (str, bool)) for value in values):
+                output = set()
+                for value in values:
+                    output = output | index.lookup(self.field, value)
+                return output
+            return None
+        prefix, _, key = self.field.partition('.')
+        if key and prefix in QueryRecord.PREFIXES and self.operator != '!=' and None not in values:
+            # a missing parameter never matches
+            return index.with_parameter(key)
+        return None
+
+    @property
+    def description(self) -> str:
+        return '{} {} {}'.format(self.field, self.operator, 'default' if self.default else repr(self.value))
+
+
+class FieldExpression(Expression):
+
+    def __init__(self, field: str):
+        # true if the value is set and not empty, false or 0
+        self.field = field
+        self.__resolve = QueryRecord.get_resolver(field)
+
+    def evaluate(self, record: QueryRecord) -> bool:
+        return bool(self.__resolve(record))
+
+    def get_candidates(self, index: QueryIndex) -> Optional[Set[int]]:
+        if self.field in ['installed', 'custom']:
+            return index.lookup(self.field, True)
+        prefix, _, key = self.field.partition('.')
+        if key and prefix in QueryRecord.PREFIXES:
+            return index.with_parameter(key)
+        return None
+
+    @property
+    def description(self) -> str:
+        return self.field
+
+
+class AndExpression(Expression):
+
+    def __init__(self, expressions: List[Expression]):
+        self.expressions = expressions
+
+    def evaluate(self, record: QueryRecord) -> bool:
+        for expression in self.expressions:
+            if not expression.evaluate(record):
+                return False
+        return True
+
+    def get_candidates(self, index: QueryIndex) -> Optional[Set[int]]:
+        output = None
+        for expression in self.expressions:
+            candidates = expression.get_candidates(index)
+            if candidates is not None:
+                output = candidates if output is None else output & candidates
+        return output
+
+    @property
+    def description(self) -> str:
+        return '({})'.format(' and '.join(expression.description for expression in self.expressions))
+
+
+class OrExpression(Expression):
+
+    def __init__(self, expressions: List[Expression]):
+        self.expressions = expressions
+
+    def evaluate(self, record: QueryRecord) -> bool:
+        for expression in self.expressions:
+            if expression.evaluate(record):
+                return True
+        return False
+
+    def get_candidates(self, index: QueryIndex) -> Optional[Set[int]]:
+        output = set()
+        for expression in self.expressions:
+            candidates = expression.get_candidates(index)
+            if candidates is None:
+                return None
+            output = output | candidates
+        return output
+
+    @property
+    def description(self) -> str:
+        return '({})'.format(' or '.join(expression.description for expression in self.expressions))
+
+
+class NotExpression(Expression):
+
+    def __init__(self, expression: Expression):
+        self.expression = expression
+
+    def evaluate(self, record: QueryRecord) -> bool:
+        return not self.expression.evaluate(record)
+
+    @property
+    def description(self) -> str:
+        return 'not {}'.format(self.expression.description)
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+from typing import Dict, List, Optional, Set
+
+from intelmqworkbench.classes.intelmqbot import IntelMQBot
+from intelmqworkbench.classes.query.queryrecord import QueryRecord
+from intelmqworkbench.classes.runtime.runtimeitem import RuntimeItem
+
+
+class QueryIndex:
+
+    INDEXED_FIELDS = ['group', 'module', 'name', 'installed', 'custom', 'bot_id']
+
+    def __init__(self, bots: List[IntelMQBot], instances: bool = True):
+        # records are runtime instances or bots without instance
+        self.instances = instances
+        self.records: List[QueryRecord] = list()
+        # field -> value -> positions of the records
+        self.__indexes: Dict[str, Dict[str, Set[int]]] = dict((field, dict()) for field in QueryIndex.INDEXED_FIELDS)
+        # parameter key -> positions of the records having the key either as default or for the instance
+        self.__parameters: Dict[str, Set[int]] = dict()
+        for bot in bots:
+            if instances:
+                for item in bot.runtime_items:
+                    self.add(bot, item)
+            else:
+                self.add(bot)
+
+    @staticmethod
+    def get_key(value: any) -> str:
+        return str(value)
+
+    def add(self, bot: IntelMQBot, item: Optional[RuntimeItem] = None) -> QueryRecord:
+        record = QueryRecord(len(self.records), bot, item)
+        self.records.append(record)
+        for field in QueryIndex.INDEXED_FIELDS:
+            if field == 'bot_id':
+                value = item.bot_id if item else None
+            else:
+                value = getattr(bot, field)
+            if value is not None:
+                self.__indexes[field].setdefault(self.get_key(value), set()).add(record.position)
+        for key in record.get_parameter_keys():
+            self.__parameters.setdefault(key, set()).add(record.position)
+        return record
+
+    def is_indexed(self, field: str) -> bool:
+        return field in self.__indexes
+
+    def lookup(self, field: str, value: any) -> Set[int]:
+        return self.__indexes[field].get(self.get_key(value), set())
+
+    def with_parameter(self, key: str) -> Set[int]:
+        return self.__parameters.get(key, set())
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __repr__(self) -> str:
+        return '{} - ({})'.format('Instances' if self.instances else 'Bots', len(self.records))
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import re
+from typing import List, Optional, Tuple
+
+from intelmqworkbench.classes.query import Expression
+from intelmqworkbench.classes.query.expressions import AndExpression, Comparison, FieldExpression, NotExpression, \
+    OrExpression
+from intelmqworkbench.exceptions import IntelMQQueryException
+
+
+class QueryParser:
+
+    TOKENS = re.compile(
+        r'\s*(?:(?P<string>"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')'
+        r'|(?P<operator>==|!=|<=|>=|=|<|>|~)'
+        r'|(?P<punctuation>[()\[\],])'
+        r'|(?P<word>[^\s()\[\],=!<>~"\']+))'
+    )
+    KEYWORDS = ['and', 'or', 'not', 'in', 'true', 'false', 'null', 'default']
+
+    def __init__(self, text: str):
+        self.text = text
+        # (kind, value) where kind is string, operator, punctuation, word or keyword
+        self.tokens: List[Tuple[str, str]] = self.tokenize(text)
+        self.position = 0
+
+    @staticmethod
+    def tokenize(text: str) -> List[Tuple[str, str]]:
+        output = list()
+        position = 0
+        text = text.rstrip()
+        while position < len(text):
+            match = QueryParser.TOKENS.match(text, position)
+            if match is None or match.end() == position:
+                raise IntelMQQueryException('Unexpected character at position {}: "{}"'.format(
+                    position, text[position:]
+                ))
+            kind = match.lastgroup
+            value = match.group(kind)
+            if kind == 'word' and value.lower() in QueryParser.KEYWORDS:
+                kind, value = 'keyword', value.lower()
+            output.append((kind, value))
+            position = match.end()
+        return output
+
+    def peek(self) -> Optional[Tuple[str, str]]:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def next(self) -> Tuple[str, str]:
+        token = self.peek()
+        if token is None:
+            raise IntelMQQueryException('Unexpected end of query "{}"'.format(self.text))
+        self.position += 1
+        return token
+
+    def accept(self, kind: str, value: str) -> bool:
+        if self.peek() == (kind, value):
+            self.position += 1
+            return True
+        return False
+
+    def expect(self, kind: str, value: str) -> None:
+        token = self.next()
+        if token != (kind, value):
+            raise IntelMQQueryException('Expected "{}" but found "{}"'.format(value, token[1]))
+
+    def parse(self) -> Expression:
+        if not self.tokens:
+            raise IntelMQQueryException('The query is empty')
+        expression = self.parse_or()
+        token = self.peek()
+        if token is not None:
+            raise IntelMQQueryException('Unexpected "{}" in query "{}"'.format(token[1], self.text))
+        return expression
+
+    def parse_or(self) -> Expression:
+        expressions = [self.parse_and()]
+        while self.accept('keyword', 'or'):
+            expressions.append(self.parse_and())
+        return expressions[0] if len(expressions) == 1 else OrExpression(expressions)
+
+    def parse_and(self) -> Expression:
+        expressions = [self.parse_not()]
+        while self.accept('keyword', 'and'):
+            expressions.append(self.parse_not())
+        return expressions[0] if len(expressions) == 1 else AndExpression(expressions)
+
+    def parse_not(self) -> Expression:
+        if self.accept('keyword', 'not'):
+            return NotExpression(self.parse_not())
+        return self.parse_primary()
+
+    def parse_primary(self) -> Expression:
+        if self.accept('punctuation', '('):
+            expression = self.parse_or()
+            self.expect('punctuation', ')')
+            return expression
+        kind, field = self.next()
+        if kind != 'word':
+            raise IntelMQQueryException('Expected a field but found "{}"'.format(field))
+        token = self.peek()
+        if token is not None and (token[0] == 'operator' or token == ('keyword', 'in')):
+            self.position += 1
+            operator_ = token[1]
+            if operator_ == 'in':
+                return Comparison(field, operator_, self.parse_list())
+            if self.accept('keyword', 'default'):
+                return Comparison(field, operator_, None, True)
+            return Comparison(field, operator_, self.parse_value())
+        return FieldExpression(field)
+
+    def parse_list(self) -> List[any]:
+        self.expect('punctuation', '[')
+        output = list()
+        if self.accept('punctuation', ']'):
+            return output
+        output.append(self.parse_value())
+        while self.accept('punctuation', ','):
+            output.append(self.parse_value())
+        self.expect('punctuation', ']')
+        return output
+
+    def parse_value(self) -> Optional[any]:
+        kind, value = self.next()
+        if kind == 'string':
+            return re.sub(r'\\(["\'\\])', r'\1', value[1:-1])
+        if kind == 'keyword' and value in ['true', 'false', 'null']:
+            return {'true': True, 'false': False, 'null': None}[value]
+        if kind != 'word':
+            raise IntelMQQueryException('Expected a value but found "{}"'.format(value))
+        for type_ in [int, float]:
+            try:
+                return type_(value)
+            except ValueError:
+                pass
+        return value
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+from typing import Callable, List, Optional
+
+from intelmqworkbench.classes.intelmqbot import IntelMQBot
+from intelmqworkbench.classes.runtime.runtimeitem import RuntimeItem
+from intelmqworkbench.exceptions import IntelMQQueryException
+
+
+class QueryRecord:
+
+    BOT_FIELDS = ['name', 'class_name', 'module', 'group', 'description', 'file_path', 'installed', 'custom',
+                  'instances']
+    # None when the bots are queried
+    INSTANCE_FIELDS = ['bot_id', 'enabled', 'run_mode']
+    # param.<key> is the value the instance runs with, default.<key> the default of the bot
+    PREFIXES = ['param', 'default']
+
+    def __init__(self, position: int, bot: IntelMQBot, item: Optional[RuntimeItem] = None):
+        self.position = position
+        self.bot = bot
+        self.item = item
+
+    def get_default(self, key: str) -> Optional[any]:
+        parameters = self.bot.default_parameters
+        if parameters and parameters.has_key(key):
+            return parameters.get_value(key)
+        return None
+
+    def get_parameter(self, key: str) -> Optional[any]:
+        if self.item and self.item.parameters and self.item.parameters.has_key(key):
+            return self.item.parameters.get_value(key)
+        return self.get_default(key)
+
+    def get_parameter_keys(self) -> List[str]:
+        keys = list()
+        if self.bot.default_parameters:
+            keys.extend(self.bot.default_parameters.get_keys())
+        if self.item and self.item.parameters:
+            keys.extend(self.item.parameters.get_keys())
+        return keys
+
+    @staticmethod
+    def get_resolver(field: str) -> Callable[['QueryRecord'], Optional[any]]:
+        # resolved once when the query is compiled instead of for every record
+        if field == 'instances':
+            return lambda record: len(record.bot.runtime_items)
+        if field in QueryRecord.BOT_FIELDS:
+            return lambda record: getattr(record.bot, field)
+        if field in QueryRecord.INSTANCE_FIELDS:
+            return lambda record: getattr(record.item, field) if record.item else None
+        prefix, _, key = field.partition('.')
+        if key and prefix == 'param':
+            return lambda record: record.get_parameter(key)
+        if key and prefix == 'default':
+            return lambda record: record.get_default(key)
+        raise IntelMQQueryException('Unknown field "{}", use one of {}, {}.<key> or {}.<key>'.format(
+            field, ', '.join(QueryRecord.BOT_FIELDS + QueryRecord.INSTANCE_FIELDS), *QueryRecord.PREFIXES
+        ))
+
+    def to_json(self) -> dict:
+        output = {
+            'bot_id': self.item.bot_id if self.item else None,
+            'name': self.bot.name,
+            'module': self.bot.module,
+            'group': self.bot.group,
+            'installed': self.bot.installed,
+            'custom': self.bot.custom,
+            'enabled': self.item.enabled if self.item else None,
+            'run_mode': self.item.run_mode if self.item else None,
+            'parameters': dict((key, self.get_parameter(key)) for key in self.get_parameter_keys())
+        }
+        return output
+
+    def __repr__(self) -> str:
+        return '{} - ({})'.format(self.item.bot_id if self.item else self.bot.name, self.bot.module)
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+from typing import Dict, Optional
+
+
+class ShardResult:
+
+    def __init__(self, number: int, start: int, stop: int):
+        self.number = number
+        # positions of the input messages of the shard, stop is excluded
+        self.start = start
+        self.stop = stop
+        self.processed = 0
+        self.sent = 0
+        # path -> messages sent
+        self.paths: Dict[str, int] = dict()
+        self.seconds = 0.0
+        self.error: Optional[str] = None
+        # the worker ended without writing its result
+        self.crashed = False
+
+    @property
+    def failed(self) -> bool:
+        return self.crashed or self.error is not None
+
+    @property
+    def failed_position(self) -> Optional[int]:
+        # first input message not processed, for a crash all outputs are discarded and the whole shard is not processed
+        if self.crashed:
+            return self.start
+        if self.error is not None:
+            return self.start + self.processed
+        return None
+
+    def to_json(self) -> dict:
+        return {
+            'number': self.number,
+            'start': self.start,
+            'stop': self.stop,
+            'processed': self.processed,
+            'sent': self.sent,
+            'paths': self.paths,
+            'seconds': self.seconds,
+            'error': self.error,
+            'crashed': self.crashed
+        }
+
+    @staticmethod
+    def from_json(data: dict):
+        result = ShardResult(data.get('number', 0), data.get('start', 0), data.get('stop', 0))
+        result.processed = data.get('processed', 0)
+        result.sent = data.get('sent', 0)
+        result.paths = data.get('paths', dict())
+        result.seconds = data.get('seconds', 0.0)
+        result.error = data.get('error')
+        result.crashed = data.get('crashed', False)
+        return result
+
+    def __repr__(self) -> str:
+        return '{} - ({})'.format(self.number, self.processed)
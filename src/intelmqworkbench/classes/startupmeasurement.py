@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+from typing import Optional
+
+
+class StartupMeasurement:
+
+    def __init__(self):
+        self.bot_id: Optional[str] = None
+        self.executable: Optional[str] = None
+        # wall clock from spawning the process until init() returned
+        self.seconds: Optional[float] = None
+        self.import_seconds: Optional[float] = None
+        self.init_seconds: Optional[float] = None
+        # peak resident set size in kilobytes
+        self.peak_rss: Optional[int] = None
+        self.error: Optional[str] = None
+
+    @property
+    def successful(self) -> bool:
+        return self.error is None
+
+    def to_json(self) -> dict:
+        return {
+            'bot_id': self.bot_id,
+            'executable': self.executable,
+            'seconds': self.seconds,
+            'import_seconds': self.import_seconds,
+            'init_seconds': self.init_seconds,
+            'peak_rss': self.peak_rss,
+            'error': self.error,
+        }
+
+    def __repr__(self) -> str:
+        return '{} - ({})'.format(self.bot_id, self.seconds)
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+from typing import List, Optional
+
+from intelmqworkbench.classes.startupmeasurement import StartupMeasurement
+from intelmqworkbench.utils import get_percentile
+
+
+class StartupSummary:
+
+    METRICS = ['seconds', 'import_seconds', 'init_seconds']
+
+    def __init__(self):
+        self.bot_id: Optional[str] = None
+        self.executable: Optional[str] = None
+        self.runs: int = 0
+        self.failures: int = 0
+        self.errors: List[str] = list()
+        # metric -> {'p50': value, 'p95': value}
+        self.percentiles: dict = dict()
+        # peak resident set size in kilobytes over all runs
+        self.peak_rss: Optional[int] = None
+
+    def add_measurements(self, measurements: List[StartupMeasurement]) -> None:
+        successful = [item for item in measurements if item.successful]
+        self.runs = len(measurements)
+        self.failures = self.runs - len(successful)
+        self.errors = sorted(set(item.error for item in measurements if not item.successful))
+        if successful:
+            for metric in StartupSummary.METRICS:
+                values = [getattr(item, metric) for item in successful]
+                self.percentiles[metric] = {
+                    'p50': get_percentile(values, 50),
+                    'p95': get_percentile(values, 95),
+                }
+            rss = [item.peak_rss for item in successful if item.peak_rss is not None]
+            if rss:
+                self.peak_rss = max(rss)
+
+    def get_value(self, metric: str, percentile: str) -> Optional[float]:
+        values = self.percentiles.get(metric)
+        if values:
+            return values.get(percentile)
+        return None
+
+    def to_json(self) -> dict:
+        return {
+            'bot_id': self.bot_id,
+            'executable': self.executable,
+            'runs': self.runs,
+            'failures': self.failures,
+            'errors': self.errors,
+            'percentiles': self.percentiles,
+            'peak_rss': self.peak_rss,
+        }
+
+    @staticmethod
+    def from_json(data: dict):
+        summary = StartupSummary()
+        summary.bot_id = data.get('bot_id')
+        summary.executable = data.get('executable')
+        summary.runs = data.get('runs', 0)
+        summary.failures = data.get('failures', 0)
+        summary.errors = data.get('errors', list())
+        summary.percentiles = data.get('percentiles', dict())
+        summary.peak_rss = data.get('peak_rss')
+        return summary
+
+    def __repr__(self) -> str:
+        return '{} - ({})'.format(self.bot_id, self.get_value('seconds', 'p50'))
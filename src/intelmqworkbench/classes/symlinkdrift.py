@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+from typing import List, Optional
+
+
+class SymlinkDrift:
+
+    def __init__(self):
+        self.source: Optional[str] = None
+        self.destination: Optional[str] = None
+        # names which are in the source but have no link in the destination
+        self.missing: List[str] = list()
+        # names which are in the destination but not in the source anymore
+        self.stale: List[str] = list()
+        # names which are present but are no symlink or point to an other target
+        self.wrong: List[str] = list()
+        self.destination_exists: bool = False
+
+    def has_drift(self) -> bool:
+        return not self.destination_exists or \
+               len(self.missing) > 0 or \
+               len(self.stale) > 0 or \
+               len(self.wrong) > 0
+
+    def to_json(self) -> dict:
+        return {
+            'source': self.source,
+            'destination': self.destination,
+            'missing': self.missing,
+            'stale': self.stale,
+            'wrong': self.wrong,
+        }
+
+    def __repr__(self) -> str:
+        return '{} -> {} (missing: {}, stale: {}, wrong: {})'.format(
+            self.source, self.destination, len(self.missing), len(self.stale), len(self.wrong)
+        )
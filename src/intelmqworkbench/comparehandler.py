@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import importlib
+import io
+import logging
+import multiprocessing
+import subprocess
+import sys
+import tarfile
+from concurrent.futures import ProcessPoolExecutor
+from os.path import dirname, isdir, isfile, join, relpath
+from tempfile import TemporaryDirectory
+from typing import List, Optional, Tuple
+
+from intelmqworkbench.classes.benchresult import BenchResult
+from intelmqworkbench.classes.comparisonresult import ComparisonResult, OutputDifference
+from intelmqworkbench.classes.intelmqbot import IntelMQBot
+from intelmqworkbench.classes.intelmqworkbenchconfig import IntelMQWorkbenchConfig
+from intelmqworkbench.classes.runtime.runtimeitem import RuntimeItem
+from intelmqworkbench.exceptions import IntelMQToolException
+
+
+def set_up_version(import_root: Optional[str], package: str) -> None:
+    # runs first in the worker processes, the package of the bot is then imported from the given root
+    if import_root:
+        sys.path.insert(0, import_root)
+        for name in list(sys.modules.keys()):
+            if name == package or name.startswith('{}.'.format(package)):
+                del sys.modules[name]
+        importlib.invalidate_caches()
+
+
+def bench_version(
+        config: IntelMQWorkbenchConfig,
+        module_name: str,
+        class_name: str,
+        group: str,
+        runtime_item: RuntimeItem,
+        warmup: int,
+        path: str,
+        trusted: bool,
+        validate_every: int,
+        capture: bool
+) -> BenchResult:
+    # the fiddler is imported here as it imports intelmq, which may be the version compared against
+    from intelmqworkbench.fiddlehandler import FiddleHandler
+    module = importlib.import_module(module_name)
+    bot = IntelMQBot()
+    bot.clazz = getattr(module, class_name)
+    bot.file_path = module.__file__
+    bot.group = group
+    bot.runtime_items = [runtime_item]
+    fiddle_handler = FiddleHandler(logging.getLogger('CompareHandler'))
+    fiddle_handler.init([bot], config, path=path, trusted=trusted, validate_every=validate_every)
+    return fiddle_handler.bench(runtime_item.bot_id, warmup, capture)
+
+
+class CompareHandler:
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+
+    @staticmethod
+    def get_import_root(bot: IntelMQBot) -> str:
+        # the folder sys.path needs to contain to import the module of the bot
+        root = dirname(bot.file_path)
+        for count in range(0, bot.module.count('.'), 1):
+            root = dirname(root)
+        return root
+
+    def get_other_root(self, bot: IntelMQBot, against: str, checkout: str) -> str:
+        # against is either a folder holding the package of the bot or a git reference of the repository of the bot
+        if isdir(against):
+            return against
+        import_root = self.get_import_root(bot)
+        result = subprocess.run(
+            ['git', '-C', dirname(bot.file_path), 'rev-parse', '--show-toplevel'], capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise IntelMQToolException(
+                '"{}" is not a folder and {} is not in a git repository'.format(against, bot.file_path)
+            )
+        toplevel = result.stdout.strip()
+        result = subprocess.run(['git', '-C', toplevel, 'archive', '--format=tar', against], capture_output=True)
+        if result.returncode != 0:
+            raise IntelMQToolException('Cannot check out "{}": {}'.format(
+                against, result.stderr.decode('utf-8', 'replace').strip()
+            ))
+        self.logger.info('Checked out {} of {} into {}'.format(against, toplevel, checkout))
+        with tarfile.open(fileobj=io.BytesIO(result.stdout)) as archive:
+            if hasattr(tarfile, 'data_filter'):
+                archive.extractall(checkout, filter='data')
+            else:
+                archive.extractall(checkout)
+        return join(checkout, relpath(import_root, toplevel))
+
+    @staticmethod
+    def get_difference(base: List[dict], other: List[dict], ignore: List[str]) -> Optional[str]:
+        if len(base) != len(other):
+            return '{} messages sent instead of {}'.format(len(other), len(base))
+        output = list()
+        for number, (base_message, other_message) in enumerate(zip(base, other)):
+            prefix = '[{}] '.format(number) if len(base) > 1 else ''
+            for key in sorted(set(base_message.keys()) | set(other_message.keys())):
+                if key in ignore:
+                    continue
+                if key not in other_message:
+                    output.append('{}-{}'.format(prefix, key))
+                elif key not in base_message:
+                    output.append('{}+{}={!r}'.format(prefix, key, other_message[key]))
+                elif base_message[key] != other_message[key]:
+                    output.append('{}{}: {!r} -> {!r}'.format(prefix, key, base_message[key], other_message[key]))
+        if output:
+            return ', '.join(output)
+        return None
+
+    def compare(
+            self,
+            config: IntelMQWorkbenchConfig,
+            bot: IntelMQBot,
+            bot_id: str,
+            against: str,
+            rounds: int = 5,
+            warmup: int = 100,
+            ignore: Optional[List[str]] = None,
+            path: str = '_default',
+            trusted: bool = False,
+            validate_every: int = 0
+    ) -> ComparisonResult:
+        # path, trusted and validate_every select and create the messages like for a normal run of the fiddler
+        runtime_item = bot.get_runtime_item_by_id(bot_id)
+        if runtime_item is None:
+            raise IntelMQToolException('Cannot find Bot with ID "{}"'.format(bot_id))
+        result = ComparisonResult(bot_id, against)
+        result.path = path
+        result.trusted = trusted
+        result.validate_every = validate_every
+        package = bot.module.split('.')[0]
+        arguments = (config, bot.module, bot.class_name, bot.group, runtime_item, warmup, path, trusted, validate_every)
+        # every version runs in its own fresh interpreter, so that both can be imported under the same name
+        context = multiprocessing.get_context('spawn')
+        with TemporaryDirectory(prefix='fiddler-compare-') as checkout:
+            other_root = self.get_other_root(bot, against, checkout)
+            if not isfile(join(other_root, *bot.module.split('.')) + '.py'):
+                raise IntelMQToolException('Module {} not found in {}'.format(bot.module, other_root))
+            base_executor = ProcessPoolExecutor(
+                max_workers=1, mp_context=context, initializer=set_up_version, initargs=(None, package)
+            )
+            other_executor = ProcessPoolExecutor(
+                max_workers=1, mp_context=context, initializer=set_up_version, initargs=(other_root, package)
+            )
+            with base_executor, other_executor:
+                for count in range(0, rounds, 1):
+                    # the versions alternate so that a drift of the machine affects both
+                    capture = count == 0
+                    self.logger.info('Round {} of {}'.format(count + 1, rounds))
+                    result.base.append(base_executor.submit(bench_version, *arguments, capture).result())
+                    result.other.append(other_executor.submit(bench_version, *arguments, capture).result())
+        result.differences, result.compared = self.get_differences(result.base[0], result.other[0], ignore or [])
+        return result
+
+    def get_differences(
+            self,
+            base: BenchResult,
+            other: BenchResult,
+            ignore: List[str]
+    ) -> Tuple[List[OutputDifference], int]:
+        output = list()
+        for position, (base_messages, other_messages) in enumerate(zip(base.outputs, other.outputs)):
+            description = self.get_difference(base_messages, other_messages, ignore)
+            if description:
+                output.append(OutputDifference(position, description))
+        return output, min(len(base.outputs), len(other.outputs))
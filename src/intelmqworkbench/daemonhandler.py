@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+from contextlib import redirect_stdout, redirect_stderr
+from logging import Logger
+from os.path import exists, join
+from tempfile import gettempdir
+from typing import List, Optional, Tuple
+
+from intelmqworkbench.exceptions import IntelMQDaemonException
+
+DEFAULT_SOCKET = join(gettempdir(), 'intelmq-workbench.sock')
+
+
+def send_command(socket_path: str, argv: List[str], timeout: Optional[float] = None) -> Tuple[int, str]:
+    # one request per connection: a json line with the arguments, answered by a json line
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(timeout)
+            client.connect(socket_path)
+            client.sendall('{}\n'.format(json.dumps({'argv': argv})).encode('utf-8'))
+            with client.makefile('r', encoding='utf-8') as stream:
+                line = stream.readline()
+    except OSError as error:
+        raise IntelMQDaemonException('Cannot reach the daemon on "{}": {}'.format(socket_path, error))
+    if not line:
+        raise IntelMQDaemonException('The daemon on "{}" closed the connection without answer'.format(socket_path))
+    response = json.loads(line)
+    return response.get('exit_code', -4), response.get('output', '')
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        try:
+            argv = json.loads(line.decode('utf-8')).get('argv')
+            if not isinstance(argv, list) or not all(isinstance(item, str) for item in argv):
+                raise ValueError('argv has to be a list of strings')
+        except (ValueError, AttributeError) as error:
+            exit_code, output = -3, 'Invalid request: {}\n'.format(error)
+        else:
+            exit_code, output = self.server.daemon_handler.execute(argv)
+        response = json.dumps({'exit_code': exit_code, 'output': output})
+        self.wfile.write('{}\n'.format(response).encode('utf-8'))
+
+
+class DaemonHandler:
+
+    # only commands which do not change the installation are answered
+    COMMANDS = ['check', 'list', 'query']
+
+    def __init__(self, logger: Logger):
+        self.logger = logger
+        self.tool_factory = None
+        # the commands share the workspace and the redirected stdout, hence they run one after the other
+        self.__lock = threading.Lock()
+        self.__stopped = threading.Event()
+
+    @property
+    def workspace(self):
+        return self.tool_factory.workspace
+
+    def execute(self, argv: List[str]) -> Tuple[int, str]:
+        if not argv or argv[0] not in DaemonHandler.COMMANDS:
+            return -3, 'Command {} is not supported by the daemon. Supported are: {}\n'.format(
+                argv[:1], ', '.join(DaemonHandler.COMMANDS)
+            )
+        output = io.StringIO()
+        with self.__lock:
+            with redirect_stdout(output), redirect_stderr(output):
+                exit_code = self.tool_factory.execute(argv)
+        return exit_code, output.getvalue()
+
+    def warm_up(self) -> None:
+        # discovery, parsing and the issues are done before the first request arrives
+        try:
+            self.workspace.get_issues(False)
+        except Exception as error:
+            self.logger.error('Cannot load the workspace: {}'.format(error))
+            self.workspace.invalidate()
+
+    def __watch(self, interval: float) -> None:
+        while not self.__stopped.wait(interval):
+            with self.__lock:
+                changed = self.workspace.refresh()
+                if changed:
+                    self.logger.info('Changes detected for {}, reloading'.format(', '.join(changed)))
+                    self.warm_up()
+
+    @staticmethod
+    def __prepare_socket(socket_path: str) -> None:
+        if exists(socket_path):
+            try:
+                send_command(socket_path, [], timeout=1)
+            except IntelMQDaemonException:
+                # left over by a daemon which was not stopped properly
+                os.remove(socket_path)
+            else:
+                raise IntelMQDaemonException('A daemon is already listening on "{}"'.format(socket_path))
+
+    @staticmethod
+    def __stop(signum, frame) -> None:
+        raise KeyboardInterrupt()
+
+    def serve(self, socket_path: str, interval: float) -> None:
+        self.__prepare_socket(socket_path)
+        # only the user running the daemon may connect
+        umask = os.umask(0o177)
+        try:
+            server = socketserver.ThreadingUnixStreamServer(socket_path, DaemonRequestHandler)
+        finally:
+            os.umask(umask)
+        server.daemon_threads = True
+        server.daemon_handler = self
+        signal.signal(signal.SIGTERM, self.__stop)
+        try:
+            with self.__lock:
+                self.warm_up()
+            watcher = threading.Thread(target=self.__watch, args=(interval,), daemon=True)
+            watcher.start()
+            print('Listening on {}'.format(socket_path))
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.__stopped.set()
+            server.server_close()
+            if exists(socket_path):
+                os.remove(socket_path)
@@ -40,3 +40,11 @@ class IntelMQParsingException(IntelMQWorkbenchException):
 
 class IntelMQFileNotFound(IntelMQWorkbenchException):
     pass
+
+
+class IntelMQDaemonException(IntelMQWorkbenchException):
+    pass
+
+
+class IntelMQQueryException(IntelMQWorkbenchException):
+    pass
@@ -10,17 +10,35 @@ __copyright__ = 'Copyright 2019-present, Restena CSIRT'
 __license__ = 'GPL v3+'
 
 import base64
+import cProfile
+import gc
+import heapq
 import json
+import multiprocessing
+import pstats
+import re
+import tracemalloc
+from collections import deque
 from importlib import import_module
+from inspect import signature
+from itertools import chain
 from logging import Logger
-from os import listdir, makedirs, remove, rmdir
-from os.path import join, isfile, isdir
-from shutil import move, rmtree
+from os import listdir, makedirs, rename
+from os.path import dirname, join, isdir, isfile
+from shutil import rmtree
+from time import perf_counter, perf_counter_ns, process_time_ns
 
-from typing import List, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from intelmqworkbench.classes.benchresult import BenchResult
+from intelmqworkbench.classes.hopresult import HopResult
 from intelmqworkbench.classes.intelmqbot import IntelMQBot
 from intelmqworkbench.classes.intelmqworkbenchconfig import IntelMQWorkbenchConfig
+from intelmqworkbench.classes.leakresult import GrowingSite, LeakResult, MemorySample
+from intelmqworkbench.classes.pipeline.pipelinie import Pipeline
+from intelmqworkbench.classes.profileresult import AllocationSite, ProfiledFunction, ProfileResult, SlowMessage
+from intelmqworkbench.classes.runtime.runtime import Runtime
+from intelmqworkbench.classes.shardresult import ShardResult
 
 import intelmq
 try:
@@ -28,56 +46,153 @@ try:
 except ImportError:
     utils = None
 
-from intelmq.lib.message import Report, Event
+import intelmq.lib.harmonization
+from intelmq.lib.exceptions import InvalidKey
+from intelmq.lib.message import Message, Report, Event
+
+import intelmqworkbench
 
 from intelmqworkbench.exceptions import IntelMQToolException
-from intelmqworkbench.utils import pretty_json
+from intelmqworkbench.profilehandler import ProfileHandler
+from intelmqworkbench.utils import get_components, get_linear_fit, get_rss
+from intelmqworkbench.stores.filestore import FileStore
+from intelmqworkbench.stores.segmentstore import SegmentStore
 
 
 class FiddleHandler:
 
+    # legacy layout, one file per message directly in the output folder
     FILE_NAME = 'message'
     OLD_MESSAGES = 'old'
+    # the messages of the next run and the output of the running one, replacing the messages once the run succeeded
+    MESSAGES = 'messages'
+    NEXT_MESSAGES = 'messages.next'
+    DEFAULT_PATH = '_default'
+    ERROR_PATH = '_on_error'
+    # the paths are used as folder names
+    PATH_PATTERN = re.compile(r'^[\w.-]+$')
+    # output folders of the workers, merged into the next messages
+    SHARDS = 'messages.shards'
+    SHARD_RESULT = 'result.json'
+    # slowest messages and statistics of --profile
+    PROFILE = 'profile'
+    PROFILE_STATS = 'profile.pstats'
+    LIBRARY_SETTINGS = {'source_pipeline_broker': 'Pythonlistsimple', 'destination_pipeline_broker': 'Pythonlistsimple'}
 
     def __init__(self, logger: Logger):
         self.logger = logger
         self.config = None
         self.bots = None
+        self.compression: Optional[str] = None
         self.__message_count = 0
         self.__current_send_message = 0
         self.__current_load_message = 0
-        self.old_messages_path = None
-
-    def init(self, bots: List[IntelMQBot], config: IntelMQWorkbenchConfig) -> None:
+        self.path = FiddleHandler.DEFAULT_PATH
+        # messages are created from the stored dicts without validation, every validate_every message is validated
+        self.trusted = False
+        self.validate_every = 0
+        self.__input_store: Optional[SegmentStore] = None
+        # folder holding one store per path the bot sends messages to
+        self.__output_folder: Optional[str] = None
+        self.__output_stores: Dict[str, SegmentStore] = dict()
+        # path -> messages sent and dropped
+        self.__sent: Dict[str, int] = dict()
+        self.__dropped: Dict[str, int] = dict()
+        # paths of the destination queues of the bot, None if they are not configured in the runtime
+        self.__paths: Optional[List[str]] = None
+        self.__add_report_fields: Optional[Callable] = None
+        self.__reader: Optional[Iterator[dict]] = None
+        # cpu time in nanoseconds spent by the fiddler reading, decoding and encoding the messages
+        self.__fiddler_cpu = 0
+        self.__captured: Optional[List[dict]] = None
+
+    def init(
+            self,
+            bots: List[IntelMQBot],
+            config: IntelMQWorkbenchConfig,
+            compression: Optional[str] = None,
+            path: str = DEFAULT_PATH,
+            trusted: bool = False,
+            validate_every: int = 0
+    ) -> None:
         self.bots = bots
         self.config = config
+        self.compression = compression
+        self.path = path
+        self.trusted = trusted
+        self.validate_every = max(validate_every, 0)
         self.__set_up()
-        self.old_messages_path = join(self.config.output_folder, FiddleHandler.OLD_MESSAGES)
+        self.__input_store = self.get_store(FiddleHandler.MESSAGES, path)
         self.__message_count = self.__get_message_count()
+        if self.__message_count == -1:
+            paths = [other for other in self.get_paths() if other != path]
+            if paths:
+                self.logger.warning('No messages in path "{}", the messages are in {}. Use --path to select one'.format(
+                    path, ', '.join(paths)
+                ))
         self.__current_send_message = 0
         self.__current_load_message = 0
 
-    def __get_files_in_dir(self, directory: str) -> List[str]:
-        self.logger.debug('Scanning for files in {}'.format(directory))
-        message_files = [f for f in listdir(directory) if isfile(join(directory, f))]
-        return message_files
+    @staticmethod
+    def check_path(path: str) -> None:
+        if not FiddleHandler.PATH_PATTERN.match(path) or path in ['.', '..']:
+            raise IntelMQToolException('Path "{}" cannot be used as folder name'.format(path))
+
+    def get_store(self, folder: str, path: str = DEFAULT_PATH) -> SegmentStore:
+        self.check_path(path)
+        return SegmentStore(join(self.config.output_folder, folder, path), self.compression)
+
+    def get_paths(self) -> List[str]:
+        # the paths of the messages of the next run
+        folder = join(self.config.output_folder, FiddleHandler.MESSAGES)
+        if isdir(folder):
+            return sorted([name for name in listdir(folder) if isdir(join(folder, name))])
+        return list()
+
+    @property
+    def sent(self) -> Dict[str, int]:
+        return dict(self.__sent)
+
+    @property
+    def dropped(self) -> Dict[str, int]:
+        return dict(self.__dropped)
 
     def __get_message_count(self) -> int:
-        message_files = self.__get_files_in_dir(self.config.output_folder)
-        count = -1
-        for message_file in message_files:
-            if message_file.startswith(FiddleHandler.FILE_NAME):
-                count += 1
-        # move the files to an other directory so that files are not being overridden
-        makedirs(self.old_messages_path, exist_ok=True)
-        for message_file in message_files:
-            source_file = join(self.config.output_folder, message_file)
-            destination_file = join(self.old_messages_path, message_file)
-            move(source_file, destination_file)
-        if count >= 0:
-            count += 1
+        legacy = [
+            file_name for folder in [self.config.output_folder, join(self.config.output_folder, self.OLD_MESSAGES)]
+            if isdir(folder) for file_name in listdir(folder) if FileStore.FILE_PATTERN.match(file_name)
+        ]
+        if legacy:
+            self.logger.warning(
+                'Found {} messages in the old file layout, they are ignored. Use --import-messages to load them'.format(
+                    len(legacy)
+                )
+            )
+        count = self.__input_store.count()
+        if count == 0:
+            return -1
+        return count
+
+    def import_messages(self, folder: str) -> int:
+        # replaces the messages of the next run with the message-N.json files of the folder
+        source = FileStore(folder)
+        if source.count() == 0:
+            raise IntelMQToolException('No messages found in {}'.format(folder))
+        return self.write_messages(source.read())
+
+    def write_messages(self, messages: Iterable[dict]) -> int:
+        # replaces the messages of the next run
+        self.__input_store.clear()
+        with self.__input_store:
+            count = self.__input_store.extend(messages)
+        self.__message_count = count if count else -1
         return count
 
+    def export_messages(self, folder: str) -> int:
+        destination = FileStore(folder)
+        destination.clear()
+        return destination.extend(self.__input_store.read())
+
     def __set_up(self) -> None:
         setattr(intelmq, 'CONFIG_DIR', self.config.config_dir)
         setattr(intelmq, 'DEFAULT_LOGGING_PATH', self.config.default_logging_path)
@@ -127,13 +242,20 @@ class FiddleHandler:
         else:
             raise IntelMQToolException('Fiddler Handler Not initialized. Call init first')
 
-    def launch_bot(self, bot_id: str) -> None:
-        # import bot
-        bot = self.__get_bot_by_id(bot_id)
+    def __get_instance(self, bot: IntelMQBot, bot_id: str) -> object:
         module = import_module(bot.module)
         clazz = getattr(module, bot.class_name)
         setattr(clazz, 'logging_path', self.config.default_logging_path)
-        instance = clazz(bot_id)
+        if 'settings' in signature(getattr(intelmq.lib, 'bot').Bot.__init__).parameters:
+            # IntelMQ 3.x connects the pipelines in the constructor, the in memory brokers of the library mode are
+            # used so that no redis is needed
+            return clazz(bot_id, settings=FiddleHandler.LIBRARY_SETTINGS)
+        return clazz(bot_id)
+
+    def __load_bot(self, bot_id: str, output_folder: Optional[str] = None) -> Tuple[IntelMQBot, object]:
+        # import bot
+        bot = self.__get_bot_by_id(bot_id)
+        instance = self.__get_instance(bot, bot_id)
         setattr(instance, 'send_message', self.__send_message)
         setattr(instance, 'acknowledge_message', self.__acknowledge_message)
         if bot.group in ['Collector']:
@@ -143,70 +265,710 @@ class FiddleHandler:
         else:
             if self.__message_count == -1:
                 raise IntelMQToolException('You are running a tool on non existing messages!')
-            setattr(instance, 'receive_message', self.__receive_message_event)
-        # boot up
-        instance.init()
-        if instance.group == 'Collector':
-            self.logger.debug('Running Collector bot {}'.format(bot.class_name))
+            setattr(instance, 'receive_message', self.__get_receiver(bot, instance))
+        # collectors add the fields of the feed to the reports they send unless auto_add is disabled
+        self.__add_report_fields = getattr(instance, '_CollectorBot__add_report_fields', None)
+        self.__paths = self.__get_destination_paths(bot, bot_id)
+        if output_folder is None:
+            # the input is only read, the output is written next to it and replaces it once the run succeeded
+            output_folder = join(self.config.output_folder, FiddleHandler.NEXT_MESSAGES)
+            rmtree(output_folder, ignore_errors=True)
+        self.__set_output(output_folder)
+        self.__current_send_message = 0
+        self.__current_load_message = 0
+        self.__fiddler_cpu = 0
+        return bot, instance
+
+    @staticmethod
+    def __get_destination_paths(bot: IntelMQBot, bot_id: str) -> Optional[List[str]]:
+        runtime_item = bot.get_runtime_item_by_id(bot_id)
+        if runtime_item and runtime_item.parameters and runtime_item.parameters.has_key('destination_queues'):
+            queues = runtime_item.parameters.get_value('destination_queues')
+            if isinstance(queues, dict):
+                return list(queues.keys())
+        return None
+
+    def __set_output(self, folder: str) -> None:
+        self.__close_outputs()
+        self.__output_folder = folder
+        self.__output_stores = dict()
+        self.__sent = dict()
+        self.__dropped = dict()
+
+    def __get_output_store(self, path: str) -> SegmentStore:
+        store = self.__output_stores.get(path)
+        if store is None:
+            self.check_path(path)
+            store = SegmentStore(join(self.__output_folder, path), self.compression)
+            self.__output_stores[path] = store
+        return store
+
+    def __close_outputs(self) -> None:
+        for store in self.__output_stores.values():
+            store.close()
+
+    def launch_bot(self, bot_id: str) -> None:
+        self.__run_bot(bot_id, lambda instance: instance.process())
+
+    def __run_bot(
+            self,
+            bot_id: str,
+            process: Callable[[object], None],
+            finish: Optional[Callable[[], None]] = None
+    ) -> None:
+        # process is called instead of instance.process(), finish once all messages were processed while the input is
+        # still available
+        bot, instance = self.__load_bot(bot_id)
+        self.__reader = self.__input_store.read()
+        try:
+            # boot up
+            instance.init()
+            if instance.group == 'Collector':
+                self.logger.debug('Running Collector bot {}'.format(bot.class_name))
+                process(instance)
+            else:
+                for count in range(0, self.__message_count, 1):
+                    self.logger.debug('Running {} time of {}'.format(count, self.__message_count))
+                    process(instance)
+            self.__close_outputs()
+            if finish:
+                finish()
+        except Exception as error:
+            self.__discard_messages()
+            raise error
+        self.__replace_messages()
+
+    def profile(
+            self,
+            bot_id: str,
+            slowest: int = 10,
+            top: int = 25,
+            memory: bool = False,
+            warmup: int = 0
+    ) -> ProfileResult:
+        # runs the bot like launch_bot with every process() call under cProfile and optionally tracemalloc. The
+        # slowest messages are saved as message-N.json into the folder profile of the output folder, slowest first
+        bot = self.__get_bot_by_id(bot_id)
+        result = ProfileResult(bot_id)
+        result.file_path = bot.file_path
+        result.folder = join(self.config.output_folder, FiddleHandler.PROFILE)
+        profiler = cProfile.Profile()
+        # (nanoseconds, position, allocated) of the slowest messages as min heap
+        heap = list()
+        is_collector = bot.group in ['Collector']
+        if not is_collector:
+            result.warmup = self.__warm_up(bot_id, warmup)
+
+        def process(instance: object) -> None:
+            position = self.__current_load_message
+            allocated = None
+            if memory:
+                # started with the first message so that the allocations of init() are not reported
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                before = tracemalloc.get_traced_memory()[0]
+                if hasattr(tracemalloc, 'reset_peak'):
+                    tracemalloc.reset_peak()
+            started = perf_counter_ns()
+            profiler.enable()
             try:
                 instance.process()
-            except Exception as error:
-                self.__reset_messages()
-                raise error
-        else:
-            for count in range(0, self.__message_count, 1):
-                self.logger.debug('Running {} time of {}'.format(count, self.__message_count))
-                try:
-                    instance.process()
-                except Exception as error:
-                    self.__reset_messages()
-                    raise error
-
-        if isdir(self.old_messages_path):
-            rmtree(self.old_messages_path)
-
-    def __reset_messages(self):
-        # clear files in base
-        message_files = self.__get_files_in_dir(self.config.output_folder)
-        for message_file in message_files:
-            file_name = join(self.config.output_folder, message_file)
-            remove(file_name)
-        # move files back from old
-        message_files = self.__get_files_in_dir(self.old_messages_path)
-        for message_file in message_files:
-            destination_file = join(self.config.output_folder, message_file)
-            source_file = join(self.old_messages_path, message_file)
-            move(source_file, destination_file)
-        # directory must be empty remove it
-        rmdir(self.old_messages_path)
+            finally:
+                profiler.disable()
+                elapsed = perf_counter_ns() - started
+                if memory:
+                    allocated = max(tracemalloc.get_traced_memory()[1] - before, 0)
+                result.seconds += elapsed / 1e9
+                result.messages += 1
+                if len(heap) < slowest:
+                    heapq.heappush(heap, (elapsed, position, allocated))
+                elif heap and elapsed > heap[0][0]:
+                    heapq.heapreplace(heap, (elapsed, position, allocated))
+
+        def finish() -> None:
+            result.slowest = [
+                SlowMessage(position, elapsed, allocated) for elapsed, position, allocated in sorted(heap, reverse=True)
+            ]
+            store = FileStore(result.folder)
+            store.clear()
+            if not is_collector:
+                for message in result.slowest:
+                    store.extend(self.__input_store.read(message.position, message.position + 1))
+
+        try:
+            self.__run_bot(bot_id, process, finish)
+        finally:
+            if memory and tracemalloc.is_tracing():
+                snapshot = tracemalloc.take_snapshot().filter_traces(
+                    [tracemalloc.Filter(False, pattern) for pattern in ProfileHandler.IGNORED_FRAMES]
+                )
+                result.memory_current, result.memory_peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                result.allocation_sites = [
+                    AllocationSite(statistic.traceback[0].filename, statistic.traceback[0].lineno, statistic.size,
+                                   statistic.count)
+                    for statistic in snapshot.statistics('lineno')[:top]
+                ]
+        stats = pstats.Stats(profiler)
+        makedirs(result.folder, exist_ok=True)
+        result.stats_file = join(result.folder, FiddleHandler.PROFILE_STATS)
+        stats.dump_stats(result.stats_file)
+        attribution = self.get_attribution(getattr(stats, 'stats'), self.__get_categorizer(bot))
+        for function, values in getattr(stats, 'stats').items():
+            for category, fraction in attribution[function].items():
+                result.split[category] = result.split.get(category, 0.0) + values[2] * fraction
+        functions = sorted(getattr(stats, 'stats').items(), key=lambda item: item[1][2], reverse=True)
+        result.functions = [
+            ProfiledFunction(
+                pstats.func_std_string(function),
+                max(attribution[function].items(), key=lambda item: item[1])[0],
+                values[1],
+                values[2],
+                values[3]
+            )
+            for function, values in functions[:top]
+        ]
+        return result
+
+    def __warm_up(self, bot_id: str, warmup: int) -> int:
+        # an other instance processes the first messages and is dropped with its output, e.g. the regular expressions
+        # are compiled then while the state of the measured instance stays the one of a normal run
+        bot, instance = self.__load_bot(bot_id)
+        warmup = min(max(warmup, 0), self.__message_count)
+        if not warmup:
+            return 0
+        self.__reader = self.__input_store.read(0, warmup)
+        try:
+            instance.init()
+            for count in range(0, warmup, 1):
+                instance.process()
+        finally:
+            self.__discard_messages()
+        return warmup
+
+    @staticmethod
+    def __get_categorizer(bot: IntelMQBot) -> Callable[[str], Optional[str]]:
+        # the first matching folder or file gives the category of a function, None for builtins, other libraries and
+        # the helpers of intelmq.lib.utils, these are given to their callers
+        prefixes = [
+            ('bot', join(dirname(bot.file_path), '')),
+            ('harmonization', getattr(intelmq.lib, 'message').__file__),
+            ('harmonization', getattr(intelmq.lib, 'harmonization').__file__),
+            (None, utils.__file__ if utils else None),
+            ('fiddler', join(dirname(intelmqworkbench.__file__), '')),
+            ('intelmq', join(dirname(intelmq.__file__), ''))
+        ]
+
+        def get_category(file_name: str) -> Optional[str]:
+            for category, prefix in prefixes:
+                if prefix and file_name.startswith(prefix):
+                    return category
+            return None
+
+        return get_category
+
+    @staticmethod
+    def get_attribution(stats: dict, get_category: Callable[[str], Optional[str]]) -> Dict[tuple, Dict[str, float]]:
+        # function of the pstats -> category -> fraction of its own time. Functions without category (builtins, other
+        # libraries) are given to the categories of their callers, in proportion of the time spent for every caller.
+        # Everything called by the fiddler, e.g. to_dict() when a message is sent, counts for the fiddler. Recursive
+        # functions are resolved per strongly connected component, with the mix of the calls entering it
+        callers = dict((function, values[4]) for function, values in stats.items())
+        fractions: Dict[tuple, Dict[str, float]] = dict()
+
+        def get_mix(weighted: List[Tuple[Dict[str, float], float]]) -> Dict[str, float]:
+            total = sum([weight for _, weight in weighted])
+            output = dict()
+            for values, weight in weighted:
+                share = weight / total if total else 1.0 / len(weighted)
+                for key, value in values.items():
+                    output[key] = output.get(key, 0.0) + value * share
+            return output
+
+        def get_fractions(category: Optional[str], inherited: Dict[str, float]) -> Dict[str, float]:
+            if category == 'fiddler':
+                return {category: 1.0}
+            if category:
+                share = inherited.get('fiddler', 0.0)
+                return {category: 1.0 - share, 'fiddler': share} if share else {category: 1.0}
+            return inherited or {'other': 1.0}
+
+        # the components of the callers come first
+        for component in get_components(callers):
+            members = set(component)
+            entering = get_mix([
+                (fractions[caller], values[2] or values[3])
+                for function in component for caller, values in callers.get(function, {}).items()
+                if caller not in members
+            ])
+            categories = dict((function, get_category(function[0])) for function in component)
+            inside = dict((function, get_fractions(categories[function], entering)) for function in component)
+            for function in component:
+                if categories[function]:
+                    fractions[function] = inside[function]
+                else:
+                    fractions[function] = get_fractions(None, get_mix([
+                        (inside[caller] if caller in members else fractions[caller], values[2] or values[3])
+                        for caller, values in callers.get(function, {}).items()
+                    ]))
+        return fractions
+
+    def launch_workers(self, bot_id: str, workers: int) -> List[ShardResult]:
+        # every worker processes a contiguous part of the messages with its own bot instance, the outputs are merged
+        # in the order of the input. The messages a failed worker did not process are kept in the path _on_error
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            raise IntelMQToolException('Workers need the fork start method')
+        bot = self.__get_bot_by_id(bot_id)
+        if bot.group in ['Collector']:
+            raise IntelMQToolException('Collectors cannot be run with workers as they do not receive messages')
+        if self.__message_count == -1:
+            raise IntelMQToolException('You are running a tool on non existing messages!')
+        next_messages = join(self.config.output_folder, FiddleHandler.NEXT_MESSAGES)
+        shards_folder = join(self.config.output_folder, FiddleHandler.SHARDS)
+        rmtree(next_messages, ignore_errors=True)
+        rmtree(shards_folder, ignore_errors=True)
+        size = -(-self.__message_count // max(1, workers))
+        results = [
+            ShardResult(number, start, min(start + size, self.__message_count))
+            for number, start in enumerate(range(0, self.__message_count, size))
+        ]
+        # the workers inherit the imported and patched intelmq, the bot is created in the worker
+        context = multiprocessing.get_context('fork')
+        processes = list()
+        for result in results:
+            process = context.Process(
+                target=self.__run_shard, args=(bot_id, result, join(shards_folder, '{:04d}'.format(result.number)))
+            )
+            process.start()
+            processes.append(process)
+        for process in processes:
+            process.join()
+        for number, result in enumerate(results):
+            result_file = join(shards_folder, '{:04d}'.format(result.number), FiddleHandler.SHARD_RESULT)
+            if isfile(result_file):
+                with open(result_file, 'r') as f:
+                    results[number] = ShardResult.from_json(json.load(f))
+            else:
+                result.crashed = True
+                result.error = 'Worker exited with code {}'.format(processes[number].exitcode)
+        self.__merge_shards(results, shards_folder)
+        self.__replace_messages()
+        return results
+
+    def __run_shard(self, bot_id: str, result: ShardResult, folder: str) -> None:
+        # runs in the worker process, a failing message stops the worker but not the others
+        started = perf_counter()
+        try:
+            bot, instance = self.__load_bot(bot_id, folder)
+            self.__reader = self.__input_store.read(result.start, result.stop)
+            instance.init()
+            for count in range(result.start, result.stop, 1):
+                instance.process()
+                result.processed += 1
+        except BaseException as error:
+            # the bots call sys.exit on fatal errors
+            self.logger.debug('Worker {} failed'.format(result.number), exc_info=True)
+            result.error = '{}: {}'.format(error.__class__.__name__, error)
+        self.__close_outputs()
+        result.sent = self.__current_send_message
+        result.paths = self.sent
+        result.seconds = perf_counter() - started
+        makedirs(folder, exist_ok=True)
+        with open(join(folder, FiddleHandler.SHARD_RESULT), 'w') as f:
+            json.dump(result.to_json(), f)
+
+    def __merge_shards(self, results: List[ShardResult], shards_folder: str) -> None:
+        outputs: Dict[str, SegmentStore] = dict()
+        failed = self.get_store(FiddleHandler.NEXT_MESSAGES, FiddleHandler.ERROR_PATH)
+        for result in results:
+            folder = join(shards_folder, '{:04d}'.format(result.number))
+            # without result it is unknown which messages were processed, the outputs of the shard are dropped
+            if not result.crashed and isdir(folder):
+                for path in sorted(listdir(folder)):
+                    if isdir(join(folder, path)):
+                        if path not in outputs:
+                            outputs[path] = self.get_store(FiddleHandler.NEXT_MESSAGES, path)
+                        outputs[path].move_segments(SegmentStore(join(folder, path)))
+            if result.failed:
+                for line in self.__input_store.read_raw(result.failed_position, result.stop):
+                    failed.append_raw(line)
+        for output in outputs.values():
+            output.close()
+        failed.close()
+        # an empty output still replaces the messages
+        makedirs(join(self.config.output_folder, FiddleHandler.NEXT_MESSAGES), exist_ok=True)
+        rmtree(shards_folder, ignore_errors=True)
+
+    @staticmethod
+    def get_routes(
+            runtime: Runtime,
+            pipeline: Optional[Pipeline] = None
+    ) -> Tuple[Dict[str, str], Dict[str, Dict[str, List[str]]]]:
+        # queue -> bot_id reading it and bot_id -> path -> queues the messages are sent to
+        sources = dict()
+        destinations = dict()
+        for item in runtime.get_items():
+            if item.module is None:
+                # global section of the runtime.yaml
+                continue
+            source = None
+            queues = None
+            if item.parameters:
+                if item.parameters.has_key('source_queue'):
+                    source = item.parameters.get_value('source_queue')
+                if item.parameters.has_key('destination_queues'):
+                    queues = item.parameters.get_value('destination_queues')
+            sources[source or '{}-queue'.format(item.bot_id)] = item.bot_id
+            if isinstance(queues, dict):
+                destinations[item.bot_id] = dict(
+                    (path, [value] if isinstance(value, str) else list(value or [])) for path, value in queues.items()
+                )
+        if pipeline:
+            # IntelMQ 2.x keeps the queues in the pipeline.conf
+            for item in pipeline.get_items():
+                sources[item.source or '{}-queue'.format(item.bot_id)] = item.bot_id
+                destinations[item.bot_id] = {FiddleHandler.DEFAULT_PATH: list(item.destinations)}
+        return sources, destinations
+
+    @staticmethod
+    def get_chain(bot_id: str, sources: Dict[str, str], destinations: Dict[str, Dict[str, List[str]]]) -> List[str]:
+        # the bots reachable from bot_id, every bot is placed before the ones it sends messages to
+        order = list()
+        visiting = set()
+
+        def visit(current: str) -> None:
+            if current in order:
+                return
+            if current in visiting:
+                raise IntelMQToolException('The pipeline contains a cycle at "{}"'.format(current))
+            visiting.add(current)
+            for queues in destinations.get(current, dict()).values():
+                for queue in queues:
+                    if queue in sources:
+                        visit(sources[queue])
+            visiting.discard(current)
+            order.append(current)
+
+        visit(bot_id)
+        return list(reversed(order))
+
+    def launch_pipeline(self, bot_id: str, runtime: Runtime, pipeline: Optional[Pipeline] = None) -> List[HopResult]:
+        # runs the bots following bot_id in one process, the messages are passed in memory. Messages sent to a queue
+        # no bot of the chain is reading are written to the output
+        sources, destinations = self.get_routes(runtime, pipeline)
+        bot_ids = self.get_chain(bot_id, sources, destinations)
+        hops = dict((current, HopResult(current)) for current in bot_ids)
+        inboxes = dict((current, deque()) for current in bot_ids)
+        instances = dict()
+        is_collector = False
+        for current in bot_ids:
+            bot = self.__get_bot_by_id(current)
+            instance = self.__get_instance(bot, current)
+            setattr(instance, 'send_message', self.__get_pipeline_sender(
+                hops[current], destinations.get(current), sources, inboxes
+            ))
+            setattr(instance, 'acknowledge_message', self.__acknowledge_message)
+            if current != bot_id:
+                setattr(instance, 'receive_message', inboxes[current].popleft)
+            elif bot.group in ['Collector']:
+                is_collector = True
+                setattr(instance, 'receive_message', None)
+            elif self.__message_count == -1:
+                raise IntelMQToolException('You are running a tool on non existing messages!')
+            else:
+                setattr(instance, 'receive_message', self.__get_receiver(bot, instance))
+            instances[current] = instance
+        next_messages = join(self.config.output_folder, FiddleHandler.NEXT_MESSAGES)
+        rmtree(next_messages, ignore_errors=True)
+        self.__set_output(next_messages)
+        self.__reader = self.__input_store.read()
+        try:
+            for instance in instances.values():
+                instance.init()
+            for count in range(0, 1 if is_collector else self.__message_count, 1):
+                self.__process_hop(instances[bot_id], hops[bot_id])
+                # the order of the chain ensures that every bot received all its messages of this round
+                for current in bot_ids[1:]:
+                    while inboxes[current]:
+                        self.__process_hop(instances[current], hops[current])
+            self.__close_outputs()
+        except Exception as error:
+            self.__discard_messages()
+            raise error
+        self.__replace_messages()
+        return [hops[current] for current in bot_ids]
+
+    @staticmethod
+    def __process_hop(instance: object, hop: HopResult) -> None:
+        started = perf_counter_ns()
+        instance.process()
+        hop.nanoseconds += perf_counter_ns() - started
+        hop.processed += 1
+
+    def __get_pipeline_sender(
+            self,
+            hop: HopResult,
+            routes: Optional[Dict[str, List[str]]],
+            sources: Dict[str, str],
+            inboxes: Dict[str, deque]
+    ) -> Callable:
+        # without destination queues every message leaves the chain, else the paths are checked like __send_message
+
+        def send_message(*messages, path: str = FiddleHandler.DEFAULT_PATH, auto_add=None,
+                         path_permissive: bool = False) -> None:
+            for message in messages:
+                if not message:
+                    self.logger.warning("Ignoring empty message at sending. Possible bug in bot.")
+                    continue
+                if routes is not None and path not in routes and not path_permissive:
+                    # like IntelMQ, a path without destination queues is an error unless the bot permits it
+                    raise IntelMQToolException('Path "{}" is not in the destination queues'.format(path))
+                hop.sent[path] = hop.sent.get(path, 0) + 1
+                if routes is not None and path not in routes:
+                    hop.dropped += 1
+                    continue
+                queues = routes.get(path, list()) if routes is not None else list()
+                passed = False
+                exited = not queues
+                for queue in queues:
+                    destination = sources.get(queue)
+                    if destination in inboxes:
+                        # every bot receives its own message like with real queues
+                        inboxes[destination].append(message.deep_copy() if passed else message)
+                        passed = True
+                        hop.add_route(path, destination)
+                    else:
+                        exited = True
+                        hop.add_route(path, queue)
+                if exited:
+                    # the exits keep the path they were sent to
+                    self.__get_output_store(path).append(message.to_dict())
+                    self.__sent[path] = self.__sent.get(path, 0) + 1
+                    hop.exited += 1
+
+        return send_message
+
+    def bench(self, bot_id: str, warmup: int = 100, capture: bool = False) -> BenchResult:
+        # runs the bot over all messages without replacing them, the first messages are processed before as warm-up
+        # with capture the messages sent for every measured message are kept in the result
+        bot, instance = self.__load_bot(bot_id)
+        if bot.group in ['Collector']:
+            raise IntelMQToolException('Collectors cannot be benchmarked as they do not receive messages')
+        result = BenchResult(bot_id)
+        result.file_path = bot.file_path
+        result.warmup = min(max(warmup, 0), self.__message_count)
+        result.messages = self.__message_count
+        self.__reader = chain(self.__input_store.read(0, result.warmup), self.__input_store.read())
+        try:
+            instance.init()
+            for count in range(0, result.warmup, 1):
+                instance.process()
+            self.__fiddler_cpu = 0
+            self.__current_send_message = 0
+            latencies = list()
+            cpu = 0
+            if capture:
+                result.outputs = list()
+                self.__captured = list()
+            started = perf_counter_ns()
+            for count in range(0, result.messages, 1):
+                cpu_started = process_time_ns()
+                process_started = perf_counter_ns()
+                instance.process()
+                latencies.append(perf_counter_ns() - process_started)
+                cpu += process_time_ns() - cpu_started
+                if capture:
+                    result.outputs.append(self.__captured)
+                    self.__captured = list()
+            result.seconds = (perf_counter_ns() - started) / 1e9
+        finally:
+            self.__captured = None
+            self.__discard_messages()
+        result.latencies = latencies
+        result.sent = self.__current_send_message
+        result.fiddler_cpu_ns = self.__fiddler_cpu
+        result.bot_cpu_ns = max(cpu - self.__fiddler_cpu, 0)
+        return result
+
+    def check_leaks(
+            self,
+            bot_id: str,
+            messages: int,
+            interval: int = 1000,
+            warmup: int = 100,
+            top: int = 25
+    ) -> LeakResult:
+        # runs the bot over the messages, read again from the start until the number of messages is reached, without
+        # replacing them. Every interval messages the memory retained by python and the resident set size are sampled
+        bot, instance = self.__load_bot(bot_id)
+        if bot.group in ['Collector']:
+            raise IntelMQToolException('Collectors cannot be checked for leaks as they do not receive messages')
+        if interval < 1 or messages < interval:
+            raise IntelMQToolException('The interval must be at least 1 and at most the number of messages')
+        result = LeakResult(bot_id, messages, interval)
+        result.file_path = bot.file_path
+        result.warmup = max(warmup, 0)
+        # allocation site -> retained bytes per sample
+        sizes: Dict[Tuple[str, int], List[int]] = dict()
+        counts: Dict[Tuple[str, int], int] = dict()
+        self.__reader = self.__read_repeated(result)
+        started = perf_counter()
+        try:
+            instance.init()
+            for count in range(0, result.warmup, 1):
+                instance.process()
+            # the allocations of init() and the warm-up, e.g. caches, are not traced
+            tracemalloc.start()
+            self.__take_sample(result, 0, sizes, counts)
+            for count in range(1, messages + 1, 1):
+                instance.process()
+                if count % interval == 0 or count == messages:
+                    self.__take_sample(result, count, sizes, counts)
+        finally:
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+            self.__discard_messages()
+        result.seconds = perf_counter() - started
+        positions = [sample.messages for sample in result.samples]
+        for (file_name, line), values in sizes.items():
+            # never decreasing and growing in at least half of the intervals, a single step is a cache or a lazy import
+            steps = [later - earlier for earlier, later in zip(values, values[1:])]
+            if len(values) >= 3 and min(steps) >= 0 and len([step for step in steps if step > 0]) * 2 >= len(steps):
+                slope = get_linear_fit(positions, values)[0]
+                result.sites.append(GrowingSite(file_name, line, values, counts.get((file_name, line), 0), slope))
+        result.sites = sorted(result.sites, key=lambda site: site.growth, reverse=True)[:top]
+        return result
+
+    def __read_repeated(self, result: LeakResult) -> Iterator[dict]:
+        while True:
+            yield from self.__input_store.read()
+            result.loops += 1
+
+    @staticmethod
+    def __take_sample(
+            result: LeakResult,
+            messages: int,
+            sizes: Dict[Tuple[str, int], List[int]],
+            counts: Dict[Tuple[str, int], int]
+    ) -> None:
+        # only what is still referenced after a collection is of interest
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, pattern)
+            for pattern in ProfileHandler.IGNORED_FRAMES + [join(dirname(intelmqworkbench.__file__), '*')]
+        ])
+        index = len(result.samples)
+        counts.clear()
+        for statistic in snapshot.statistics('lineno'):
+            key = (statistic.traceback[0].filename, statistic.traceback[0].lineno)
+            sizes.setdefault(key, [0] * index).append(statistic.size)
+            counts[key] = statistic.count
+        for values in sizes.values():
+            if len(values) == index:
+                values.append(0)
+        rss = get_rss()
+        if rss is not None:
+            rss -= tracemalloc.get_tracemalloc_memory()
+        result.samples.append(MemorySample(messages, tracemalloc.get_traced_memory()[0], rss))
+
+    def __discard_messages(self) -> None:
+        self.__reader = None
+        self.__close_outputs()
+        rmtree(join(self.config.output_folder, FiddleHandler.NEXT_MESSAGES), ignore_errors=True)
+
+    def __replace_messages(self) -> None:
+        self.__reader = None
+        messages = join(self.config.output_folder, FiddleHandler.MESSAGES)
+        old_messages = join(self.config.output_folder, '{}.old'.format(FiddleHandler.MESSAGES))
+        next_messages = join(self.config.output_folder, FiddleHandler.NEXT_MESSAGES)
+        # a run without any message sent still replaces the messages, before the input is moved away
+        makedirs(next_messages, exist_ok=True)
+        rmtree(old_messages, ignore_errors=True)
+        if isdir(messages):
+            rename(messages, old_messages)
+        rename(next_messages, messages)
+        rmtree(old_messages, ignore_errors=True)
+        self.__input_store = self.get_store(FiddleHandler.MESSAGES, self.path)
+        self.__message_count = self.__get_message_count()
 
     def __acknowledge_message(self):
         self.logger.debug('ACK Message')
 
     def __send_message(self, *messages, path: str = "_default", auto_add=None, path_permissive: bool = False) -> None:
         self.logger.info('Sending Message')
+        started = process_time_ns()
         counter = self.__current_send_message
         for message in messages:
             if not message:
                 self.logger.warning("Ignoring empty message at sending. Possible bug in bot.")
                 continue
-            file_name = join(self.config.output_folder, '{}-{}.json'.format(FiddleHandler.FILE_NAME, counter))
-            self.logger.debug('Saving Message to {}'.format(file_name))
-            with open(file_name, 'w+') as f:
-                f.write(pretty_json(message.to_dict()))
+            if self.__paths is not None and path not in self.__paths:
+                # like IntelMQ, a path without destination queues is an error unless the bot permits it
+                if not path_permissive:
+                    raise IntelMQToolException('Path "{}" is not in the destination queues'.format(path))
+                self.__dropped[path] = self.__dropped.get(path, 0) + 1
+                continue
+            if self.__add_report_fields and auto_add is not False:
+                self.__add_report_fields(message)
+            data = message.to_dict()
+            position = self.__get_output_store(path).append(data)
+            if self.__captured is not None:
+                self.__captured.append(data)
+            self.logger.debug('Saved Message {} to path {}'.format(position, path))
+            self.__sent[path] = self.__sent.get(path, 0) + 1
             counter += 1
         self.__current_send_message = counter
+        self.__fiddler_cpu += process_time_ns() - started
 
     def __get_file_data(self) -> Optional[dict]:
-        file_name = join(self.old_messages_path, '{}-{}.json'.format(FiddleHandler.FILE_NAME, self.__current_load_message))
-        self.logger.debug('Loading data from {}'.format(file_name))
-        with open(file_name, 'r') as f:
-            data = json.loads(f.read())
+        self.logger.debug('Loading message {}'.format(self.__current_load_message))
+        data = next(self.__reader)
         self.__current_load_message += 1
         return data
 
+    def __get_receiver(self, bot: IntelMQBot, instance: object) -> Callable[[], Message]:
+        if not self.trusted:
+            return self.__receive_message_event
+        # the stored dicts are the flat items of messages sent before, so they are the content of the message as is,
+        # raw stays base64 encoded. The harmonization is the one the bot loaded
+        harmonization = getattr(instance, 'harmonization', None)
+        if not harmonization:
+            with open(self.config.harmonization_conf_file, 'r') as f:
+                harmonization = json.load(f)
+        classes = {'Event': Event, 'Report': Report}
+        default_class = Report if bot.group in ['Parser'] else Event
+
+        def receive_message() -> Message:
+            started = process_time_ns()
+            data = self.__get_file_data()
+            clazz = classes.get(data.pop('__type', None), default_class)
+            message = clazz.__new__(clazz)
+            message.harmonization_config = harmonization[clazz.__name__.lower()]
+            message.iterable = data
+            dict.update(message, data)
+            position = self.__current_load_message - 1
+            if self.validate_every and position % self.validate_every == 0:
+                self.__validate_message(message, position)
+            self.__fiddler_cpu += process_time_ns() - started
+            return message
+
+        return receive_message
+
+    @staticmethod
+    def __validate_message(message: Message, position: int) -> None:
+        for key, value in message.items():
+            try:
+                valid = message.is_valid(key, value, sanitize=False)
+            except InvalidKey:
+                valid = False
+            if not valid:
+                raise IntelMQToolException('Message {} is not valid, {}={!r} does not match the harmonization'.format(
+                    position, key, value
+                ))
+
     def __receive_message_report(self) -> Report:
         self.logger.info('Receive Message')
+        started = process_time_ns()
         report = Report()
         data = self.__get_file_data()
         for key, value in data.items():
@@ -216,10 +978,12 @@ class FiddleHandler:
             else:
                 report.add(key, value, overwrite=True)
         self.logger.debug('Sending Message')
+        self.__fiddler_cpu += process_time_ns() - started
         return report
 
     def __receive_message_event(self) -> Event:
         self.logger.info('Receive Message (Event)')
+        started = process_time_ns()
         event = Event()
         data = self.__get_file_data()
         for key, value in data.items():
@@ -229,6 +993,7 @@ class FiddleHandler:
             else:
                 event.add(key, value, overwrite=True)
         self.logger.debug('Sending Message')
+        self.__fiddler_cpu += process_time_ns() - started
         return event
 
 
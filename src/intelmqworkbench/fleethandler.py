@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from copy import deepcopy
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from intelmqworkbench.classes.fleetresult import FleetResult
+from intelmqworkbench.classes.intelmqbot import IntelMQBot
+from intelmqworkbench.classes.intelmqworkbenchconfig import IntelMQWorkbenchConfig
+from intelmqworkbench.exceptions import IntelMQWorkbenchException
+from intelmqworkbench.intelmqhandler import IntelMQHandler
+from intelmqworkbench.tools.checker import Checker
+from intelmqworkbench.workspace import Workspace
+
+# discovery stamp of the bot folders -> (intelmq bots, custom bots), filled before the workers are forked
+DISCOVERY_CACHE: Dict[object, Tuple[List[IntelMQBot], List[IntelMQBot]]] = dict()
+
+
+def get_root_config(config: IntelMQWorkbenchConfig, root: str) -> IntelMQWorkbenchConfig:
+    # the paths below fake_root are rewritten, the bot folders stay the same for all roots
+    root_config = deepcopy(config)
+    root_config.fake_root = os.path.abspath(root)
+    return root_config
+
+
+def discover(workspace: Workspace, logger: logging.Logger) -> bool:
+    # returns True if the bots were taken from the cache
+    stamp = workspace.get_discovery_stamp()
+    cached = stamp in DISCOVERY_CACHE
+    if not cached:
+        intelmq_handler = IntelMQHandler(logger)
+        DISCOVERY_CACHE[stamp] = (
+            intelmq_handler.get_bots(workspace.config.bot_folder, False),
+            intelmq_handler.get_bots(workspace.config.custom_bot_folder, True)
+        )
+    workspace.set_discovered_bots(*DISCOVERY_CACHE[stamp], stamp)
+    return cached
+
+
+def check_root(config: IntelMQWorkbenchConfig, root: str, force: bool) -> FleetResult:
+    # runs in the worker processes, hence everything is created here and only the summary is returned
+    logger = logging.getLogger('FleetHandler')
+    result = FleetResult(root)
+    started = perf_counter()
+    try:
+        root_config = get_root_config(config, root)
+        root_config.validate()
+        checker = Checker(logger, root_config)
+        result.cached_discovery = discover(checker.workspace, logger)
+        bots = checker.get_all_bots(force)
+        result.bots = len(bots)
+        result.instances = len([item for item in checker.get_runtime().get_items() if item.module])
+        for check, bot, bot_id, issue in checker.iter_all_issues(force):
+            result.add_issue(check, issue.__class__.__name__)
+    except IntelMQWorkbenchException as error:
+        result.error = str(error)
+    except Exception as error:
+        # one broken mirror must not stop the others
+        logger.debug('Checking {} failed'.format(root), exc_info=True)
+        result.error = '{}: {}'.format(error.__class__.__name__, error)
+    result.seconds = perf_counter() - started
+    return result
+
+
+class FleetHandler:
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+
+    @staticmethod
+    def read_roots(path: str) -> List[str]:
+        # one root per line, "#" starts a comment
+        output = list()
+        with open(path, 'r') as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if line:
+                    output.append(line)
+        return output
+
+    def prepare(self, config: IntelMQWorkbenchConfig, roots: List[str]) -> int:
+        # discovers every distinct bot tree once in this process, the forked workers inherit the cache and the imports
+        discovered = 0
+        for root in roots:
+            try:
+                root_config = get_root_config(config, root)
+                if not discover(Workspace(self.logger, root_config), self.logger):
+                    discovered += 1
+            except Exception as error:
+                self.logger.debug('Discovery for {} failed: {}'.format(root, error))
+        return discovered
+
+    def check(
+            self,
+            config: IntelMQWorkbenchConfig,
+            roots: List[str],
+            force: bool = False,
+            workers: Optional[int] = None,
+            callback: Optional[Callable[[FleetResult], None]] = None
+    ) -> List[FleetResult]:
+        workers = max(1, min(workers or os.cpu_count() or 1, len(roots)))
+        self.logger.info('Checking {} roots with {} workers'.format(len(roots), workers))
+        if workers == 1:
+            output = list()
+            for root in roots:
+                result = check_root(config, root, force)
+                output.append(result)
+                if callback:
+                    callback(result)
+            return output
+        context = None
+        if 'fork' in multiprocessing.get_all_start_methods():
+            # the workers inherit the discovery cache, other start methods discover once per worker
+            context = multiprocessing.get_context('fork')
+        results: Dict[str, FleetResult] = dict()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = [executor.submit(check_root, config, root, force) for root in roots]
+            for future in as_completed(futures):
+                result = future.result()
+                results[result.root] = result
+                if callback:
+                    callback(result)
+        return [results[root] for root in roots]
+
+    @staticmethod
+    def get_issue_types(results: List[FleetResult]) -> List[Tuple[str, int, int]]:
+        # (issue type, number of issues, number of roots having it), most frequent first
+        totals: Dict[str, List[int]] = dict()
+        for result in results:
+            for type_, count in result.issue_types.items():
+                total = totals.setdefault(type_, [0, 0])
+                total[0] += count
+                total[1] += 1
+        return sorted(
+            [(type_, total[0], total[1]) for type_, total in totals.items()],
+            key=lambda item: (-item[1], item[0])
+        )
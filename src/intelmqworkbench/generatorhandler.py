@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import base64
+import ipaddress
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from logging import Logger
+from typing import Dict, Iterator, List, Optional, Union
+
+from intelmq.lib.exceptions import InvalidKey
+from intelmq.lib.message import Event
+
+from intelmqworkbench.exceptions import IntelMQToolException
+
+
+class GeneratorHandler:
+
+    FEED_NAME = 'Synthetic'
+    # the times are spread over 30 days from a fixed start, so that a seed always gives the same messages
+    START_TIME = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    TIME_RANGE = 30 * 24 * 3600
+    # documentation ranges of RFC 5737
+    DEFAULT_IP_RANGES = ['192.0.2.0/24', '198.51.100.0/24', '203.0.113.0/24']
+    DEFAULT_CLASSIFICATIONS = {'scanner': 4, 'spam': 2, 'phishing': 2, 'infected-system': 1, 'brute-force': 1}
+    DEFAULT_FQDNS = 1000
+    TRANSPORTS = ['tcp', 'udp']
+    PORTS = [22, 23, 25, 53, 80, 123, 443, 445, 3389, 8080]
+    # the first ASN given to the ranges, one per range
+    FIRST_ASN = 64512
+
+    def __init__(self, logger: Logger):
+        self.logger = logger
+
+    @staticmethod
+    def load_harmonization(harmonization_file: str) -> dict:
+        try:
+            with open(harmonization_file, 'r') as f:
+                harmonization = json.load(f)
+        except (OSError, ValueError) as error:
+            raise IntelMQToolException('Cannot read harmonization {}: {}'.format(harmonization_file, error))
+        if 'event' not in harmonization:
+            raise IntelMQToolException('Harmonization {} has no event section'.format(harmonization_file))
+        return harmonization
+
+    @staticmethod
+    def get_networks(ip_ranges: List[str]) -> List[Union[ipaddress.IPv4Network, ipaddress.IPv6Network]]:
+        try:
+            return [ipaddress.ip_network(ip_range, strict=False) for ip_range in ip_ranges]
+        except ValueError as error:
+            raise IntelMQToolException('Invalid IP range: {}'.format(error))
+
+    @staticmethod
+    def check_value(event: Event, key: str, value: object) -> None:
+        # the type, the length and the regex of the harmonization
+        try:
+            valid = event.is_valid(key, value, sanitize=False)
+        except InvalidKey:
+            valid = False
+        if not valid:
+            raise IntelMQToolException('Generated {}={!r} does not match the harmonization'.format(key, value))
+
+    def generate(
+            self,
+            harmonization_file: str,
+            count: int,
+            seed: int = 0,
+            ip_ranges: Optional[List[str]] = None,
+            fqdns: int = DEFAULT_FQDNS,
+            classifications: Optional[Dict[str, float]] = None,
+            validate: int = 1000
+    ) -> Iterator[dict]:
+        # events as stored by the fiddler, fields missing in the harmonization are left out. The first validate
+        # events are validated against the harmonization, the others come from the same generators
+        harmonization = self.load_harmonization(harmonization_file)
+        keys = harmonization['event']
+        event = Event(harmonization=harmonization)
+        networks = self.get_networks(ip_ranges or GeneratorHandler.DEFAULT_IP_RANGES)
+        classifications = classifications or GeneratorHandler.DEFAULT_CLASSIFICATIONS
+        if fqdns < 1:
+            raise IntelMQToolException('The number of FQDNs must be at least 1')
+        if not classifications or min(classifications.values()) < 0 or sum(classifications.values()) <= 0:
+            raise IntelMQToolException('The weights of the classifications must be positive')
+        types = list(classifications.keys())
+        for classification in types:
+            self.check_value(event, 'classification.type', classification)
+        cumulative = list(accumulate(classifications.values()))
+        rng = random.Random(seed)
+        self.logger.debug('Generating {} events with seed {}'.format(count, seed))
+        for position in range(0, count, 1):
+            number = rng.randrange(len(networks))
+            network = networks[number]
+            ip = str(network[rng.randrange(network.num_addresses)])
+            fqdn = 'host-{:06d}.example.com'.format(rng.randrange(fqdns))
+            classification = rng.choices(types, cum_weights=cumulative)[0]
+            port = rng.choice(GeneratorHandler.PORTS)
+            transport = rng.choice(GeneratorHandler.TRANSPORTS)
+            source_time = GeneratorHandler.START_TIME + timedelta(seconds=rng.randrange(GeneratorHandler.TIME_RANGE))
+            observation_time = source_time + timedelta(seconds=rng.randrange(3600))
+            raw = '{},{},{},{},{}'.format(source_time.isoformat(), ip, port, fqdn, classification)
+            data = {
+                'feed.name': GeneratorHandler.FEED_NAME,
+                'feed.accuracy': 100.0,
+                'time.source': source_time.isoformat(),
+                'time.observation': observation_time.isoformat(),
+                'classification.type': classification,
+                'source.ip': ip,
+                'source.network': str(network),
+                'source.asn': GeneratorHandler.FIRST_ASN + number,
+                'source.fqdn': fqdn,
+                'source.port': rng.randrange(1024, 65536),
+                'destination.port': port,
+                'protocol.transport': transport,
+                'raw': base64.b64encode(raw.encode('utf-8')).decode('ascii')
+            }
+            output = dict((key, value) for key, value in data.items() if key in keys)
+            if position < validate:
+                for key, value in output.items():
+                    self.check_value(event, key, value)
+            yield output
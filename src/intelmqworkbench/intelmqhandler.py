@@ -16,12 +16,9 @@ import re
 from importlib import import_module
 from logging import Logger
 from os import listdir, remove
-from os.path import isfile, join, islink
+from os.path import isfile, join
 from pathlib import Path
-from typing import List, Type, Optional, Union
-
-from intelmq.lib.bot import Bot, ParserBot, CollectorBot, OutputBot, SQLBot
-from ruamel import yaml
+from typing import List, Type, Optional, Union, Tuple, TYPE_CHECKING
 
 from intelmqworkbench.classes.bots.bots import BOTS
 from intelmqworkbench.classes.bots.botsitem import BOTSItem
@@ -40,25 +37,61 @@ from intelmqworkbench.classes.pipeline.pipelinie import Pipeline
 from intelmqworkbench.classes.runtime.runtime import Runtime
 from intelmqworkbench.classes.runtime.runtimeitem import RuntimeItem
 from intelmqworkbench.exceptions import IntelMQFileNotFound, IntelMQParsingException
-from intelmqworkbench.utils import get_executable_filename, get_paths, is_intelmq_2
+from intelmqworkbench.utils import get_executable_filename, get_paths, is_intelmq_2, get_symlink_drift
+
+if TYPE_CHECKING:
+    from intelmq.lib.bot import Bot
+    from intelmqworkbench.outputhandler import OutPutHandler
 
 
 class IntelMQHandler:
-    try:
-        from intelmq.lib.bot import ExpertBot
-        BOT_CLASSES = (ParserBot, CollectorBot, ParserBot, OutputBot, ExpertBot, SQLBot, Bot)
-    except ImportError:
-        BOT_CLASSES = (ParserBot, CollectorBot, ParserBot, OutputBot, SQLBot, Bot)
 
-    BOT_PARAMETERS = dir(Bot)
+    # the order matters for the type detection, ExpertBot and SQLBot are not present in every version
+    BOT_CLASS_NAMES = ['ParserBot', 'CollectorBot', 'OutputBot', 'ExpertBot', 'SQLBot', 'Bot']
+    # classes which do not tell the type of the bot
+    GENERIC_BOT_CLASS_NAMES = ['Bot', 'SQLBot']
     IGNORE_KEYS = ['destination_queues', 'search_subject_like', 'username', 'password', 'search_owner']
 
+    # intelmq.lib.bot is slow to import, hence it is only loaded once bots are really handled
+    __bot_classes: Optional[Tuple[Type['Bot'], ...]] = None
+    __bot_parameters: Optional[List[str]] = None
+
     def __init__(self, logger: Logger):
         self.logger = logger
+        # if set the executables are removed through it so that deferred writes are respected
+        self.output_handler: Optional['OutPutHandler'] = None
+
+    def __remove_executable(self, path: str) -> None:
+        if self.output_handler:
+            self.output_handler.remove_path(path)
+        elif isfile(path):
+            self.logger.debug('Executable "{}" exists'.format(path))
+            remove(path)
+
+    @property
+    def bot_classes(self) -> Tuple[Type['Bot'], ...]:
+        if IntelMQHandler.__bot_classes is None:
+            self.logger.debug('Importing intelmq.lib.bot')
+            bot_module = import_module('intelmq.lib.bot')
+            IntelMQHandler.__bot_classes = tuple(
+                getattr(bot_module, name) for name in IntelMQHandler.BOT_CLASS_NAMES if hasattr(bot_module, name)
+            )
+        return IntelMQHandler.__bot_classes
+
+    @property
+    def base_bot_class(self) -> Type['Bot']:
+        return self.bot_classes[-1]
+
+    @property
+    def bot_parameters(self) -> List[str]:
+        if IntelMQHandler.__bot_parameters is None:
+            IntelMQHandler.__bot_parameters = dir(self.base_bot_class)
+        return IntelMQHandler.__bot_parameters
 
     def __get_data_yaml(self, file_path: str) -> dict:
         self.logger.debug('Reading Data of "{}"'.format(file_path))
         if isfile(file_path):
+            from ruamel import yaml
             data = None
             with open(file_path, 'r') as f:
                 try:
@@ -152,7 +185,7 @@ class IntelMQHandler:
             output.add_item(pipeline_item)
         return output
 
-    def __get_default_parameters(self, clazz: Type[Bot], file_path: str) -> Parameters:
+    def __get_default_parameters(self, clazz: Type['Bot'], file_path: str) -> Parameters:
         self.logger.info('Getting parameters')
         output = Parameters()
         variables = sorted(key for key in dir(clazz) if not key.isupper() and not key.startswith('_'))
@@ -160,7 +193,7 @@ class IntelMQHandler:
             value = getattr(clazz, key)
             if (not inspect.ismethod(value) and not inspect.isfunction(value) and
                     not inspect.isclass(value) and not inspect.isroutine(value) and
-                    not (key in IntelMQHandler.BOT_PARAMETERS and getattr(Bot, key) == value)):
+                    not (key in self.bot_parameters and getattr(self.base_bot_class, key) == value)):
                 # small check to prevent usage of parent variables
                 add = True
                 for parent in clazz.__bases__:
@@ -191,10 +224,10 @@ class IntelMQHandler:
 
         return output
 
-    def __get_name(self, clazz: Type[Bot]) -> str:
+    def __get_name(self, clazz: Type['Bot']) -> str:
         self.logger.info('Getting name of bot')
         name = clazz.__name__
-        for type_ in IntelMQHandler.BOT_CLASSES:
+        for type_ in self.bot_classes:
             name = name.replace(type_.__name__, '')
         # try also to replace the detection by the folder structre
         type_ = clazz.__module__.split('.')[-3].title()
@@ -202,12 +235,12 @@ class IntelMQHandler:
             type_ = type_[:-1]
         return name.replace(type_, '')
 
-    def __get_type(self, clazz: Type[Bot]) -> str:
+    def __get_type(self, clazz: Type['Bot']) -> str:
         self.logger.info('Getting type of bot')
         clazz_parents = inspect.getmro(clazz)
-        for type_ in IntelMQHandler.BOT_CLASSES:
+        for type_ in self.bot_classes:
             if type_ in clazz_parents:
-                if type_ == Bot or type_ == SQLBot:
+                if type_.__name__ in IntelMQHandler.GENERIC_BOT_CLASS_NAMES:
                     # possible expert but can be everything
                     continue
                 return type_.__name__.replace('Bot', '')
@@ -218,7 +251,7 @@ class IntelMQHandler:
         else:
             return type_
 
-    def __get_description(self, clazz: Type[Bot], file_path: str) -> str:
+    def __get_description(self, clazz: Type['Bot'], file_path: str) -> str:
         description = clazz.description
         if description is None:
             description = clazz.__doc__
@@ -258,8 +291,8 @@ class IntelMQHandler:
                     # look for classes in module
                     for attr_name, type_ in inspect.getmembers(module):
                         if inspect.isclass(type_) and \
-                                type_ not in IntelMQHandler.BOT_CLASSES and \
-                                issubclass(type_, IntelMQHandler.BOT_CLASSES) and \
+                                type_ not in self.bot_classes and \
+                                issubclass(type_, self.bot_classes) and \
                                 type_ not in found_classes:
                             found_classes.append(type_)
 
@@ -268,8 +301,8 @@ class IntelMQHandler:
                     self.logger.debug(error)
         for clazz in found_classes:
             # Check if the class is a instantiable bot
-            if issubclass(clazz, IntelMQHandler.BOT_CLASSES) and \
-                    clazz not in IntelMQHandler.BOT_CLASSES:
+            if issubclass(clazz, self.bot_classes) and \
+                    clazz not in self.bot_classes:
                 # find the Called variable often denoted by 'BOT'
                 launch_name = None
                 module = sys.modules[clazz.__module__]
@@ -531,18 +564,17 @@ class IntelMQHandler:
         else:
             self.logger.info('Checking if installation is the same')
             source, destination = get_paths(bot, bot_folder)
-            # check if the files are present in the
-            files = listdir(source)
-            for f in files:
-                file_name = join(destination, f)
-                self.logger.debug('Checking if {} is a symlink'.format(file_name))
-                if not islink(file_name):
-                    issue = MismatchInstallIssue()
-                    issue.bot = bot
-                    issue.bot_folder = bot_folder
-                    issue.source = source
-                    issue.destination = destination
-                    return issue
+            # check if the files are present in the destination and point to the source
+            drift = get_symlink_drift(source, destination)
+            if drift.has_drift():
+                self.logger.debug('Detected drift {}'.format(drift))
+                issue = MismatchInstallIssue()
+                issue.bot = bot
+                issue.bot_folder = bot_folder
+                issue.source = source
+                issue.destination = destination
+                issue.drift = drift
+                return issue
             return None
 
     def merge_bots_conf_and_bots(self, intelmq_bots: List[IntelMQBot], bots: BOTS) -> None:
@@ -585,6 +617,9 @@ class IntelMQHandler:
         # check Runtime
         output = IntelMQBotInstallIssue()
         for item in runtime.get_items():
+            if item.module is None:
+                # e.g. the global section of the runtime.yaml
+                continue
             found = False
             for bot in bots:
                 # if the module is existing so is the bot
@@ -673,10 +708,8 @@ class IntelMQHandler:
             runtime_item = runtime.get_item_by_id(bot_id)
             runtime.remove_by_bot_id(bot_id)
             # remove also executable
-            path = join(bin_folder, runtime_item.module)
-            if isfile(path):
-                self.logger.debug('Executable "{}" exists'.format(path))
-                remove(path)
+            if runtime_item.module:
+                self.__remove_executable(join(bin_folder, runtime_item.module))
             return True
         else:
             self.logger.error('Bot with ID "{}" cannot be deleted as it is still referenced in a pipe.'.format(bot_id))
@@ -702,10 +735,7 @@ class IntelMQHandler:
             if do_remove:
                 bots.remove_element(type_, module, name)
                 # remove also executable
-                path = join(bin_folder, module)
-                if isfile(path):
-                    self.logger.debug('Executable "{}" exists'.format(path))
-                    remove(path)
+                self.__remove_executable(join(bin_folder, module))
                 return True
             else:
                 self.logger.error(
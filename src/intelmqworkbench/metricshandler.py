@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import json
+import os
+from logging import Logger
+from os.path import abspath, dirname
+from tempfile import NamedTemporaryFile
+from typing import List
+
+from intelmqworkbench.classes.metrics import Metrics
+
+PREFIX = 'intelmq_workbench'
+
+
+class MetricsHandler:
+
+    COUNTER_HELP = {
+        'bots_imported': 'Number of bots found by the discovery',
+        'runtime_items': 'Number of bots configured in the runtime configuration',
+        'issues_found': 'Number of issues detected',
+        'files_written': 'Number of files written or removed',
+    }
+
+    def __init__(self, logger: Logger):
+        self.logger = logger
+
+    @staticmethod
+    def get_data(metrics: Metrics, command: str, exit_code: int, started: float) -> dict:
+        data = metrics.to_json()
+        data['command'] = command
+        data['exit_code'] = exit_code
+        data['started'] = started
+        return data
+
+    @staticmethod
+    def __escape(value: str) -> str:
+        return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    def get_prometheus_text(self, metrics: Metrics, command: str, exit_code: int, started: float) -> str:
+        labels = 'command="{}"'.format(self.__escape(command))
+        lines: List[str] = [
+            '# HELP {}_phase_seconds Wall-clock seconds spent per phase of the last run'.format(PREFIX),
+            '# TYPE {}_phase_seconds gauge'.format(PREFIX),
+        ]
+        for name, seconds in sorted(metrics.spans.items()):
+            lines.append('{}_phase_seconds{{{},phase="{}"}} {:.6f}'.format(
+                PREFIX, labels, self.__escape(name), seconds
+            ))
+        for name, value in sorted(metrics.counters.items()):
+            lines.append('# HELP {}_{} {}'.format(PREFIX, name, MetricsHandler.COUNTER_HELP.get(name, name)))
+            lines.append('# TYPE {}_{} gauge'.format(PREFIX, name))
+            lines.append('{}_{}{{{}}} {}'.format(PREFIX, name, labels, value))
+        lines.append('# HELP {}_exit_code Exit code of the last run'.format(PREFIX))
+        lines.append('# TYPE {}_exit_code gauge'.format(PREFIX))
+        lines.append('{}_exit_code{{{}}} {}'.format(PREFIX, labels, exit_code))
+        lines.append('# HELP {}_last_run_timestamp_seconds Start of the last run'.format(PREFIX))
+        lines.append('# TYPE {}_last_run_timestamp_seconds gauge'.format(PREFIX))
+        lines.append('{}_last_run_timestamp_seconds{{{}}} {:.3f}'.format(PREFIX, labels, started))
+        return '{}\n'.format('\n'.join(lines))
+
+    def __write_atomic(self, file_path: str, text: str) -> None:
+        # the textfile collector must never read a half written file, hence write aside and rename
+        folder = dirname(abspath(file_path))
+        with NamedTemporaryFile('w', dir=folder, prefix='.{}.'.format(os.path.basename(file_path)),
+                                delete=False) as f:
+            f.write(text)
+            temporary_path = f.name
+        try:
+            os.chmod(temporary_path, 0o644)
+            os.replace(temporary_path, file_path)
+        except OSError:
+            os.remove(temporary_path)
+            raise
+        self.logger.info('Saved metrics to {}'.format(file_path))
+
+    def save_json(self, file_path: str, metrics: Metrics, command: str, exit_code: int, started: float) -> None:
+        data = self.get_data(metrics, command, exit_code, started)
+        self.__write_atomic(file_path, '{}\n'.format(json.dumps(data, indent=4, sort_keys=True)))
+
+    def save_prometheus(self, file_path: str, metrics: Metrics, command: str, exit_code: int, started: float) -> None:
+        self.__write_atomic(file_path, self.get_prometheus_text(metrics, command, exit_code, started))
@@ -9,26 +9,69 @@ __email__ = 'jean-paul.weber@restena.lu'
 __copyright__ = 'Copyright 2019-present, Restena CSIRT'
 __license__ = 'GPL v3+'
 
+import compileall
+import sys
 from logging import Logger
-from os import chmod, makedirs, symlink, listdir
-from os.path import join, exists
+from os import chmod, makedirs, symlink, remove
+from os.path import join, isdir, islink, lexists
 from pathlib import Path
 from shutil import rmtree
-from typing import Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 from intelmqworkbench.classes.bots.bots import BOTS
 from intelmqworkbench.classes.bots.botsitem import BOTSItem
 from intelmqworkbench.classes.intelmqbot import IntelMQBot
+from intelmqworkbench.classes.metrics import Metrics
+from intelmqworkbench.classes.query.queryrecord import QueryRecord
 from intelmqworkbench.classes.issues.intelmqbotissue import IntelMQBotIssue
+from intelmqworkbench.classes.issues.issuegroup import IssueGroup
 from intelmqworkbench.classes.runtime.runtime import Runtime
+from intelmqworkbench.classes.symlinkdrift import SymlinkDrift
 from intelmqworkbench.exceptions import IntelMQToolException
-from intelmqworkbench.utils import colorize_text, pretty_json, get_executable_filename, get_paths
+from intelmqworkbench.utils import colorize_text, pretty_json, get_executable_filename, get_paths, get_symlink_drift
 
 
 class OutPutHandler:
 
     def __init__(self, logger: Logger):
         self.logger = logger
+        self.metrics = Metrics()
+        # if set the writes are kept until commit(), a later write to the same path replaces the earlier one
+        self.defer_writes = False
+        self.__pending: Dict[str, Callable[[], None]] = dict()
+
+    @property
+    def pending(self) -> List[str]:
+        return list(self.__pending.keys())
+
+    def __write(self, path: str, operation: Callable[[], None]) -> None:
+        if self.defer_writes:
+            self.logger.debug('Deferring write of {}'.format(path))
+            # the last operation on a path wins and is executed in the order of the last change
+            self.__pending.pop(path, None)
+            self.__pending[path] = operation
+        else:
+            self.__execute(operation)
+
+    def __execute(self, operation: Callable[[], None]) -> None:
+        with self.metrics.span('writes'):
+            operation()
+        self.metrics.increment('files_written')
+
+    def commit(self) -> List[str]:
+        written = list()
+        while self.__pending:
+            path = next(iter(self.__pending))
+            # the operation is only removed once done, a failing one is kept with the ones after it
+            self.__execute(self.__pending[path])
+            del self.__pending[path]
+            written.append(path)
+        return written
+
+    def discard(self) -> List[str]:
+        discarded = self.pending
+        self.__pending.clear()
+        return discarded
 
     def print_bot_meta(self, bot_detail: IntelMQBot) -> None:
         self.logger.debug('OutPut Bot Meta')
@@ -70,34 +113,96 @@ class OutPutHandler:
         self.logger.debug('OutPut Issue')
         print(' - {}'.format(issue.description))
 
-    def create_executable(self, bot: IntelMQBot, bin_folder: str) -> None:
+    def print_issue_group(self, group: IssueGroup, full: bool = False, limit: int = 5) -> None:
+        self.logger.debug('OutPut Issue Group')
+        if group.count > 1:
+            print(' - {} {}'.format(group.description, colorize_text('[{}x]'.format(group.count), 'Magenta')))
+        else:
+            print(' - {}'.format(group.description))
+        if group.bot_ids:
+            bot_ids = group.bot_ids if full else group.bot_ids[:limit]
+            text = ', '.join(bot_ids)
+            if len(bot_ids) < len(group.bot_ids):
+                text = '{} (+{} more)'.format(text, len(group.bot_ids) - len(bot_ids))
+            print('   Instances: {}'.format(text))
+
+    def print_query_record(self, record: QueryRecord, full: bool = False) -> None:
+        if record.item:
+            print('{:<40} {}'.format(colorize_text(record.item.bot_id, 'LightGreen'), record.bot.module))
+        else:
+            print('{:<40} {}'.format(colorize_text(record.bot.name, 'LightGreen'), record.bot.module))
+        if full:
+            print('    Parameters: {}'.format(pretty_json(record.to_json()['parameters'])))
+
+    def create_executable(
+            self,
+            bot: IntelMQBot,
+            bin_folder: str,
+            fast_start: bool = False,
+            custom_bot_folder: Optional[str] = None
+    ) -> None:
         file_name = self.get_executable_filename(bot, bin_folder)
         self.logger.info('Creating file {} in {}'.format(file_name, bin_folder))
         executable_path = join(bin_folder, file_name)
-        text = "#!/bin/python3\n" \
-               "import {0}\n" \
-               "import sys\n" \
-               "sys.exit(\n" \
-               "    {0}.{1}.run()\n" \
-               ")".format(bot.module, bot.bot_variable)
+        if fast_start:
+            # Note: the isolated mode ignores PYTHON* variables hence the custom bots have to be set in the script
+            text = "#!{0} -I\n" \
+                   "import sys\n".format(sys.executable)
+            if bot.custom and custom_bot_folder:
+                text = "{0}sys.path.append({1!r})\n".format(text, custom_bot_folder)
+            text = "{0}import {1}\n" \
+                   "sys.exit(\n" \
+                   "    {1}.{2}.run()\n" \
+                   ")".format(text, bot.module, bot.bot_variable)
+        else:
+            text = "#!/bin/python3\n" \
+                   "import {0}\n" \
+                   "import sys\n" \
+                   "sys.exit(\n" \
+                   "    {0}.{1}.run()\n" \
+                   ")".format(bot.module, bot.bot_variable)
+        self.__write(executable_path, lambda: self.__write_executable(executable_path, text))
+
+    def __write_executable(self, executable_path: str, text: str) -> None:
         with open(executable_path, 'w+') as f:
             f.write(text)
         # Note: must be in octal (771_8 = 457_10)
         chmod(executable_path, 493)
 
+    def compile_bot(self, bot: IntelMQBot, custom_bot_folder: Optional[str] = None) -> bool:
+        # precompile so that a restart of the bot does not pay for the compilation of the bytecode
+        folders = [Path(bot.file_path).parent.as_posix()]
+        if bot.custom and custom_bot_folder:
+            # the custom bots may share modules which are not part of the package of the bot
+            folders = [custom_bot_folder]
+        success = True
+        for folder in folders:
+            # not deferred as the bytecode is not part of the installation and a failure has to stop the install
+            if not self.__compile_folder(folder):
+                success = False
+        return success
+
+    def __compile_folder(self, folder: str) -> bool:
+        self.logger.info('Compiling {}'.format(folder))
+        if not compileall.compile_dir(folder, quiet=1):
+            self.logger.error('Could not compile all files in {}'.format(folder))
+            return False
+        return True
+
+    def __write_text(self, location: str, text: str) -> None:
+        with open(location, 'w') as f:
+            f.write(text)
+
     def save_runtime(self, runtime: Runtime) -> None:
-        output = pretty_json(runtime.to_json())
         location = runtime.location
-        with open(location, 'w') as f:
-            f.write(output)
+        # serialized when written, a deferred write contains the changes done until then
+        self.__write(location, lambda: self.__write_text(location, pretty_json(runtime.to_json())))
         self.logger.info('Saved Runtime to {}'.format(location))
 
     def save_bots(self, bots: BOTS) -> None:
         if bots:
-            output = pretty_json(bots.to_json())
             location = bots.location
-            with open(location, 'w') as f:
-                f.write(output)
+            self.__write(location, lambda: self.__write_text(location, pretty_json(bots.to_json())))
             self.logger.info('Saved BOTS to {}'.format(location))
 
     def install_bot(
@@ -105,12 +210,17 @@ class OutPutHandler:
             bot: IntelMQBot,
             bin_folder: str,
             bot_folder: str,
-            bots_conf: BOTS
+            bots_conf: BOTS,
+            fast_start: bool = False,
+            custom_bot_folder: Optional[str] = None
     ) -> int:
         self.logger.info('Installing "{}" ({})'.format(bot.name, bot.module))
         if bot.installed:
             raise IntelMQToolException('Bot "{}" ({}) is already installed'.format(bot.name, bot.module))
         module = bot.module
+        # compiled before anything is written so that a bot which does not compile is not installed half
+        if fast_start and not self.compile_bot(bot, custom_bot_folder):
+            raise IntelMQToolException('Bot "{}" ({}) cannot be compiled'.format(bot.name, bot.module))
         if bots_conf:
             self.logger.debug('IntelMQ 2.x installation')
             # register in bots
@@ -137,7 +247,8 @@ class OutPutHandler:
 
             # Note: The executable name is different during calls due it's location which in intelmq/bots!!!
 
-        self.create_executable(bot, bin_folder)
+        self.create_executable(bot, bin_folder, fast_start, custom_bot_folder)
+        bot.installed = True
         print('BOT "{}" ({}) installed.'.format(bot.name, bot.module))
         return 0
 
@@ -150,17 +261,55 @@ class OutPutHandler:
         self.logger.debug('Getting paths for bots')
         return get_paths(bot, bot_folder)
 
-    def sync_folders(self, source: str, destination: str) -> None:
-        if exists(destination):
-            rmtree(destination)
-        # Note: Must be a folder else it will not be recognised
-        makedirs(destination, exist_ok=True)
-        self.logger.debug('Create symlinks from {} to {}'.format(source, destination))
-
+    def sync_folders(self, source: str, destination: str, verify: bool = False) -> SymlinkDrift:
         # Creating symlinks to simplify bot updates as one has not to fiddle inside the intelmq/bots folder
+        # Note: only the differences are written as the folders may reside on slow (network) file systems
+        drift = get_symlink_drift(source, destination)
+        if verify or not drift.has_drift():
+            self.logger.debug('Symlinks of {} in {}: {}'.format(source, destination, drift))
+            return drift
+        if self.defer_writes:
+            # the drift is determined again when written
+            self.__write(str(destination), lambda: self.sync_folders(source, destination))
+            return drift
+        self.logger.debug('Syncing symlinks from {} to {}'.format(source, destination))
 
-        files = listdir(source)
-        for f in files:
-            file_name = join(destination, f)
+        if not drift.destination_exists:
+            if lexists(destination):
+                self.__remove_entry(str(destination))
+            # Note: Must be a folder else it will not be recognised
+            makedirs(destination, exist_ok=True)
+
+        for name in drift.stale:
+            self.__remove_entry(join(destination, name))
+        for name in drift.wrong:
+            self.__remove_entry(join(destination, name))
+        for name in drift.wrong + drift.missing:
+            file_name = join(destination, name)
             self.logger.debug('Created symlink to {}'.format(file_name))
-            symlink(join(source, f), file_name)
\ No newline at end of file
+            symlink(join(source, name), file_name)
+        return drift
+
+    def remove_path(self, path: str) -> None:
+        self.__write(str(path), lambda: self.__remove_entry(str(path)))
+
+    def __remove_entry(self, path: str) -> None:
+        if not lexists(path):
+            self.logger.debug('{} does not exist anymore'.format(path))
+            return
+        self.logger.debug('Removing {}'.format(path))
+        if isdir(path) and not islink(path):
+            rmtree(path)
+        else:
+            remove(path)
+
+    def print_symlink_drift(self, bot: IntelMQBot, drift: SymlinkDrift) -> None:
+        print('BOT "{}" ({}) in {}:'.format(bot.name, bot.module, drift.destination))
+        if not drift.destination_exists:
+            print(' - {}'.format(colorize_text('Folder is missing', 'Red')))
+        for name in drift.missing:
+            print(' - Link "{}" is missing'.format(name))
+        for name in drift.stale:
+            print(' - Link "{}" is stale'.format(name))
+        for name in drift.wrong:
+            print(' - Link "{}" does not point to {}'.format(name, join(drift.source, name)))
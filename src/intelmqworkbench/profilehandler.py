@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import cProfile
+import pstats
+import sys
+import tracemalloc
+from logging import Logger
+from typing import Callable, Optional
+
+
+class ProfileHandler:
+
+    # frames of the profiling itself and of the import machinery are not of interest
+    IGNORED_FRAMES = [tracemalloc.__file__, '<frozen importlib._bootstrap>', '<frozen importlib._bootstrap_external>',
+                      '<unknown>']
+
+    def __init__(self, logger: Logger):
+        self.logger = logger
+
+    def run(
+            self,
+            function: Callable[[], int],
+            profile: bool = True,
+            profile_file: Optional[str] = None,
+            top: int = 25,
+            memory: bool = False
+    ) -> int:
+        profiler = cProfile.Profile() if profile else None
+        if memory:
+            tracemalloc.start()
+        if profiler:
+            profiler.enable()
+        try:
+            return function()
+        finally:
+            # also reported if the tool fails, the output is then the evidence needed
+            if profiler:
+                profiler.disable()
+            if memory:
+                snapshot = tracemalloc.take_snapshot()
+                current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                self.print_memory(snapshot, current, peak, top)
+            if profiler:
+                self.print_profile(profiler, profile_file, top)
+
+    def print_profile(self, profiler: cProfile.Profile, profile_file: Optional[str], top: int) -> None:
+        if profile_file:
+            profiler.dump_stats(profile_file)
+            print('Profile saved to {} (use python -m pstats {})'.format(profile_file, profile_file))
+        else:
+            print('\nProfile (top {} by cumulative time):'.format(top))
+            stats = pstats.Stats(profiler, stream=sys.stdout)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+
+    def print_memory(self, snapshot: tracemalloc.Snapshot, current: int, peak: int, top: int) -> None:
+        snapshot = snapshot.filter_traces(
+            [tracemalloc.Filter(False, pattern) for pattern in ProfileHandler.IGNORED_FRAMES]
+        )
+        statistics = snapshot.statistics('lineno')
+        print('\nMemory (top {} allocation sites still allocated at the end):'.format(top))
+        print('Current: {:.1f} KiB, Peak: {:.1f} KiB'.format(current / 1024, peak / 1024))
+        for index, statistic in enumerate(statistics[:top], start=1):
+            frame = statistic.traceback[0]
+            print('{:>3}. {}:{}: {:.1f} KiB in {} blocks'.format(
+                index, frame.filename, frame.lineno, statistic.size / 1024, statistic.count
+            ))
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+from logging import Logger
+from typing import Dict, List, Optional
+
+from intelmqworkbench.classes.query import Expression
+from intelmqworkbench.classes.query.queryindex import QueryIndex
+from intelmqworkbench.classes.query.queryparser import QueryParser
+from intelmqworkbench.classes.query.queryrecord import QueryRecord
+
+
+class QueryHandler:
+
+    def __init__(self, logger: Logger):
+        self.logger = logger
+        # query text -> compiled expression, the shell and the daemon run the same queries repeatedly
+        self.__compiled: Dict[str, Expression] = dict()
+
+    def compile(self, text: str) -> Expression:
+        expression = self.__compiled.get(text, None)
+        if expression is None:
+            expression = QueryParser(text).parse()
+            self.logger.debug('Compiled query {}'.format(expression.description))
+            self.__compiled[text] = expression
+        return expression
+
+    def execute(self, index: QueryIndex, expression: Expression, limit: Optional[int] = None) -> List[QueryRecord]:
+        candidates = expression.get_candidates(index)
+        if candidates is None:
+            positions = range(len(index))
+        else:
+            positions = sorted(candidates)
+        self.logger.debug('Evaluating {} of {} records'.format(len(positions), len(index)))
+        output = list()
+        for position in positions:
+            record = index.records[position]
+            if expression.evaluate(record):
+                output.append(record)
+                if limit is not None and len(output) >= limit:
+                    break
+        return output
+
+    def query(self, index: QueryIndex, text: str, limit: Optional[int] = None) -> List[QueryRecord]:
+        return self.execute(index, self.compile(text), limit)
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import csv
+import json
+import sys
+from logging import Logger
+from typing import List, Optional, TextIO
+
+from intelmqworkbench.classes.intelmqbot import IntelMQBot
+from intelmqworkbench.classes.issues import Issue
+from intelmqworkbench.exceptions import IntelMQToolException
+
+
+class RecordHandler:
+
+    FORMATS = ['text', 'jsonl', 'json', 'csv']
+
+    # stable columns, the values are taken from Issue.to_json and IntelMQBot.to_json
+    ISSUE_FIELDS = [
+        'check', 'type', 'bot_name', 'bot_module', 'bot_id', 'key', 'value', 'default_value', 'has_value',
+        'should_value', 'path', 'file_name', 'name', 'module', 'location', 'reference', 'source', 'destination',
+        'drift', 'description'
+    ]
+    GROUP_FIELDS = ['check', 'type', 'bot_name', 'bot_module', 'key', 'expected', 'count', 'bot_ids', 'description']
+    QUERY_FIELDS = ['bot_id', 'name', 'module', 'group', 'installed', 'custom', 'enabled', 'run_mode', 'parameters']
+    FLEET_FIELDS = ['root', 'bots', 'instances', 'issues', 'checks', 'issue_types', 'seconds', 'cached_discovery',
+                    'error']
+    BOT_FIELDS = [
+        'name', 'class_name', 'module', 'group', 'description', 'file_path', 'custom', 'installed', 'strange',
+        'default_parameters', 'runtime_instances', 'issues'
+    ]
+
+    def __init__(self, logger: Logger):
+        self.logger = logger
+        self.format = 'text'
+        self.stream: TextIO = sys.stdout
+        self.count = 0
+        self.__fields: List[str] = list()
+        self.__csv_writer: Optional[csv.DictWriter] = None
+
+    @property
+    def is_text(self) -> bool:
+        return self.format == 'text'
+
+    def start(self, format_: str, fields: List[str], stream: Optional[TextIO] = None) -> None:
+        if format_ not in RecordHandler.FORMATS:
+            raise IntelMQToolException('Format "{}" is not supported'.format(format_))
+        self.format = format_
+        self.stream = stream or sys.stdout
+        self.count = 0
+        self.__fields = fields
+        if self.format == 'csv':
+            self.__csv_writer = csv.DictWriter(self.stream, fieldnames=fields, extrasaction='ignore')
+            self.__csv_writer.writeheader()
+        elif self.format == 'json':
+            # written as array element by element so that nothing is buffered
+            self.stream.write('[')
+
+    @staticmethod
+    def get_issue_record(check: str, issue: Issue, bot: Optional[IntelMQBot] = None,
+                         bot_id: Optional[str] = None) -> dict:
+        record = {
+            'check': check,
+            'bot_name': bot.name if bot else None,
+            'bot_module': bot.module if bot else None,
+            'bot_id': bot_id
+        }
+        record.update(issue.to_json())
+        return record
+
+    @staticmethod
+    def get_bot_record(bot: IntelMQBot, strange: Optional[bool] = None,
+                       issues: Optional[List[Issue]] = None) -> dict:
+        record = bot.to_json()
+        record['strange'] = strange
+        if issues is not None:
+            record['issues'] = [issue.to_json() for issue in issues]
+        return record
+
+    def __get_row(self, record: dict) -> dict:
+        output = dict()
+        for field in self.__fields:
+            value = record.get(field)
+            if isinstance(value, (dict, list, bool)):
+                value = json.dumps(value, sort_keys=True)
+            output[field] = value
+        return output
+
+    def write(self, record: dict) -> None:
+        if self.format == 'jsonl':
+            self.stream.write('{}\n'.format(json.dumps(record, sort_keys=True, default=str)))
+        elif self.format == 'json':
+            separator = ',\n' if self.count > 0 else '\n'
+            self.stream.write('{}{}'.format(separator, json.dumps(record, sort_keys=True, default=str)))
+        elif self.format == 'csv':
+            self.__csv_writer.writerow(self.__get_row(record))
+        else:
+            raise IntelMQToolException('Records cannot be written as text')
+        self.count += 1
+        # consumers read the records while the remaining ones are computed
+        self.stream.flush()
+
+    def finish(self) -> int:
+        if self.format == 'json':
+            self.stream.write('\n]\n' if self.count > 0 else ']\n')
+            self.stream.flush()
+        self.__csv_writer = None
+        return self.count
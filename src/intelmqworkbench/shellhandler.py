@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import cmd
+import shlex
+from logging import Logger
+from os.path import isfile
+from typing import List, Optional
+
+from intelmqworkbench.utils import colorize_text
+
+
+class WorkbenchShell(cmd.Cmd):
+
+    intro = 'IntelMQ Workbench shell. Type help or ? to list the commands.'
+    prompt = 'workbench> '
+    # tools which cannot run inside the shell
+    EXCLUDED_TOOLS = ['shell', 'daemon']
+
+    def __init__(self, logger: Logger, tool_factory, history_file: Optional[str] = None):
+        super().__init__()
+        self.logger = logger
+        self.tool_factory = tool_factory
+        self.history_file = history_file
+        self.exit_code = 0
+
+    @property
+    def tool_ids(self) -> List[str]:
+        return [tool_id for tool_id, description in self.tool_factory.declarations
+                if tool_id not in WorkbenchShell.EXCLUDED_TOOLS]
+
+    def run_tool(self, argv: List[str]) -> int:
+        workspace = self.tool_factory.workspace
+        try:
+            exit_code = self.tool_factory.execute(argv)
+        except KeyboardInterrupt:
+            print('Interrupted')
+            exit_code = -6
+            workspace.invalidate()
+        # files written by the command itself are read again before the next one
+        workspace.refresh()
+        return exit_code
+
+    def default(self, line: str) -> Optional[bool]:
+        try:
+            argv = shlex.split(line)
+        except ValueError as error:
+            print('Cannot parse "{}": {}'.format(line, error))
+            return None
+        if not argv:
+            return None
+        if argv[0] not in self.tool_ids:
+            print('Unknown command "{}". Available: {}'.format(argv[0], ', '.join(self.tool_ids)))
+            self.exit_code = -3
+            return None
+        self.exit_code = self.run_tool(argv)
+        if self.exit_code != 0:
+            print(colorize_text('Exit code {}'.format(self.exit_code), 'Red'))
+        return None
+
+    def emptyline(self) -> Optional[bool]:
+        # do not repeat the last command
+        return None
+
+    def completenames(self, text: str, *ignored) -> List[str]:
+        names = super().completenames(text, *ignored)
+        return names + [tool_id for tool_id in self.tool_ids if tool_id.startswith(text)]
+
+    def completedefault(self, text: str, line: str, begidx: int, endidx: int) -> List[str]:
+        argv = line.split()
+        if not argv or argv[0] not in self.tool_ids:
+            return list()
+        # noinspection PyProtectedMember
+        options = self.tool_factory.get_arg_parser(argv[0])._option_string_actions.keys()
+        return sorted(option for option in options if option.startswith(text))
+
+    def do_help(self, arg: str) -> Optional[bool]:
+        """Shows the help of a command or tool"""
+        if arg in self.tool_ids:
+            self.tool_factory.get_arg_parser(arg).print_help()
+            return None
+        super().do_help(arg)
+        if not arg:
+            print('Tools (use help <tool>):')
+            for tool_id, description in self.tool_factory.declarations:
+                if tool_id not in WorkbenchShell.EXCLUDED_TOOLS:
+                    print('  {:<16}{}'.format(tool_id, description))
+            print()
+        return None
+
+    def do_reload(self, arg: str) -> Optional[bool]:
+        """Reads again the files which changed since they were loaded, use "reload all" to load everything again"""
+        workspace = self.tool_factory.workspace
+        if arg.strip() == 'all':
+            reloaded = workspace.invalidate(list(workspace.DEPENDENTS.keys()))
+        else:
+            reloaded = workspace.refresh()
+        if reloaded:
+            print('Reloaded: {}'.format(', '.join(reloaded)))
+        else:
+            print('Nothing changed')
+        return None
+
+    def do_status(self, arg: str) -> Optional[bool]:
+        """Shows the exit code of the last tool"""
+        print('Last exit code: {}'.format(self.exit_code))
+        return None
+
+    def do_exit(self, arg: str) -> Optional[bool]:
+        """Leaves the shell"""
+        return True
+
+    def do_quit(self, arg: str) -> Optional[bool]:
+        """Leaves the shell"""
+        return True
+
+    def do_EOF(self, arg: str) -> Optional[bool]:
+        """Leaves the shell (Ctrl-D)"""
+        print()
+        return True
+
+    def __get_readline(self):
+        if not self.history_file:
+            return None
+        try:
+            import readline
+        except ImportError:
+            return None
+        return readline
+
+    def loop(self) -> int:
+        readline = self.__get_readline()
+        if readline and isfile(self.history_file):
+            readline.read_history_file(self.history_file)
+        try:
+            while True:
+                try:
+                    self.cmdloop()
+                    break
+                except KeyboardInterrupt:
+                    print('^C')
+                    self.intro = None
+        finally:
+            if readline:
+                try:
+                    readline.write_history_file(self.history_file)
+                except OSError as error:
+                    self.logger.error('Cannot write history to {}: {}'.format(self.history_file, error))
+        return self.exit_code
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import hashlib
+import json
+import sqlite3
+from logging import Logger
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from intelmqworkbench.classes.bots.bots import BOTS
+from intelmqworkbench.classes.intelmqbot import IntelMQBot
+from intelmqworkbench.classes.issues import Issue
+from intelmqworkbench.classes.parameters import Parameters
+from intelmqworkbench.classes.pipeline.pipelinie import Pipeline
+from intelmqworkbench.classes.runtime.runtime import Runtime
+from intelmqworkbench.exceptions import IntelMQToolException
+
+
+class SQLiteHandler:
+
+    # table -> (key columns, value columns), every table has in addition the column hash of the row content
+    TABLES = {
+        'bots': (
+            ['module'],
+            ['name', 'class_name', 'bot_group', 'description', 'file_path', 'custom', 'installed']
+        ),
+        'instances': (
+            ['bot_id'],
+            ['module', 'name', 'description', 'bot_group', 'enabled', 'run_mode']
+        ),
+        # owner_type is default (owner is the module), instance (owner is the bot_id) or the BOTS file
+        'parameters': (
+            ['owner_type', 'owner', 'key'],
+            ['value', 'number']
+        ),
+        # location is default or running
+        'bots_entries': (
+            ['location', 'bot_group', 'name'],
+            ['module', 'description']
+        ),
+        'pipeline_edges': (
+            ['bot_id', 'path', 'queue'],
+            []
+        ),
+        # the key is the hash of the issue as the same issue has no other identity
+        'issues': (
+            ['issue_hash'],
+            ['check_name', 'type', 'module', 'bot_id', 'key', 'description', 'data']
+        ),
+        'meta': (
+            ['key'],
+            ['value']
+        )
+    }
+    INDEXES = [
+        ('instances', 'module'),
+        ('parameters', 'key'),
+        ('parameters', 'owner'),
+        ('bots_entries', 'module'),
+        ('pipeline_edges', 'queue'),
+        ('issues', 'module'),
+        ('issues', 'bot_id'),
+        ('issues', 'type'),
+    ]
+
+    def __init__(self, logger: Logger):
+        self.logger = logger
+        self.connection: Optional[sqlite3.Connection] = None
+
+    @staticmethod
+    def get_hash(values: List[any]) -> str:
+        return hashlib.sha1(json.dumps(values, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def get_row(table: str, data: dict) -> Tuple[any, ...]:
+        # key columns, value columns and the hash of the values in the order of the table
+        keys, columns = SQLiteHandler.TABLES[table]
+        values = [data.get(column) for column in keys + columns]
+        return tuple(values + [SQLiteHandler.get_hash(values)])
+
+    def open(self, path: str) -> None:
+        try:
+            self.connection = sqlite3.connect(path)
+        except sqlite3.Error as error:
+            raise IntelMQToolException('Database "{}" cannot be opened: {}'.format(path, error))
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        with self.connection:
+            for table, (keys, columns) in SQLiteHandler.TABLES.items():
+                self.connection.execute(
+                    'CREATE TABLE IF NOT EXISTS {} ({}, hash TEXT NOT NULL, PRIMARY KEY ({}))'.format(
+                        table, ', '.join(keys + columns), ', '.join(keys)
+                    )
+                )
+            for table, column in SQLiteHandler.INDEXES:
+                self.connection.execute('CREATE INDEX IF NOT EXISTS {0}_{1} ON {0} ({1})'.format(table, column))
+
+    def close(self) -> None:
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+    def sync(self, table: str, rows: List[Tuple[any, ...]]) -> Tuple[int, int, int, int]:
+        # upserts the rows whose hash changed and deletes the ones which are gone
+        # returns the number of inserted, updated, deleted and unchanged rows
+        keys, columns = SQLiteHandler.TABLES[table]
+        width = len(keys)
+        existing = dict(
+            (tuple(row[:width]), row[width]) for row in self.connection.execute(
+                'SELECT {}, hash FROM {}'.format(', '.join(keys), table)
+            )
+        )
+        wanted = dict((tuple(row[:width]), row) for row in rows)
+        inserts = [row for key, row in wanted.items() if key not in existing]
+        updates = [row for key, row in wanted.items() if key in existing and existing[key] != row[-1]]
+        deletes = [key for key in existing.keys() if key not in wanted]
+        if inserts or updates:
+            self.connection.executemany('INSERT OR REPLACE INTO {} ({}, hash) VALUES ({})'.format(
+                table, ', '.join(keys + columns), ', '.join(['?'] * (len(keys) + len(columns) + 1))
+            ), inserts + updates)
+        if deletes:
+            self.connection.executemany('DELETE FROM {} WHERE {}'.format(
+                table, ' AND '.join('{} IS ?'.format(key) for key in keys)
+            ), deletes)
+        return len(inserts), len(updates), len(deletes), len(wanted) - len(inserts) - len(updates)
+
+    def export(
+            self,
+            tables: Dict[str, List[Tuple[any, ...]]],
+            full_refresh: bool = False
+    ) -> Dict[str, Tuple[int, ...]]:
+        # everything in one transaction, a failing export leaves the previous one untouched
+        output = dict()
+        with self.connection:
+            for table, rows in tables.items():
+                if full_refresh:
+                    self.connection.execute('DELETE FROM {}'.format(table))
+                output[table] = self.sync(table, rows)
+        return output
+
+    @staticmethod
+    def get_parameter_rows(owner_type: str, owner: str, parameters: Optional[Parameters]) -> Iterator[tuple]:
+        if parameters is None:
+            return
+        for key in parameters.get_keys():
+            value = parameters.get_value(key)
+            number = None
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                number = value
+            yield SQLiteHandler.get_row('parameters', {
+                'owner_type': owner_type,
+                'owner': owner,
+                'key': key,
+                'value': json.dumps(value, sort_keys=True, default=str),
+                'number': number
+            })
+
+    def get_tables(
+            self,
+            bots: List[IntelMQBot],
+            runtime: Runtime,
+            issues: List[Tuple[str, Optional[IntelMQBot], Optional[str], Issue]],
+            default_bots: Optional[BOTS] = None,
+            running_bots: Optional[BOTS] = None,
+            pipeline: Optional[Pipeline] = None,
+            meta: Optional[dict] = None
+    ) -> Dict[str, List[tuple]]:
+        tables = dict((table, list()) for table in SQLiteHandler.TABLES.keys())
+        for bot in bots:
+            tables['bots'].append(self.get_row('bots', {
+                'module': bot.module,
+                'name': bot.name,
+                'class_name': bot.class_name,
+                'bot_group': bot.group,
+                'description': bot.description,
+                'file_path': bot.file_path,
+                'custom': bot.custom,
+                'installed': bot.installed
+            }))
+            tables['parameters'].extend(self.get_parameter_rows('default', bot.module, bot.default_parameters))
+        for item in runtime.get_items():
+            if item.module is None:
+                # global section of the runtime.yaml
+                continue
+            tables['instances'].append(self.get_row('instances', {
+                'bot_id': item.bot_id,
+                'module': item.module,
+                'name': item.name,
+                'description': item.description,
+                'bot_group': item.group,
+                'enabled': item.enabled,
+                'run_mode': item.run_mode
+            }))
+            tables['parameters'].extend(self.get_parameter_rows('instance', item.bot_id, item.parameters))
+            destinations = item.parameters.get_value('destination_queues') if item.parameters and \
+                item.parameters.has_key('destination_queues') else None
+            if isinstance(destinations, dict):
+                for path, queues in destinations.items():
+                    for queue in queues or []:
+                        tables['pipeline_edges'].append(
+                            self.get_row('pipeline_edges', {'bot_id': item.bot_id, 'path': path, 'queue': queue})
+                        )
+        if pipeline:
+            # IntelMQ 2.x keeps the queues in the pipeline.conf
+            for item in pipeline.get_items():
+                for queue in item.destinations:
+                    tables['pipeline_edges'].append(
+                        self.get_row('pipeline_edges', {'bot_id': item.bot_id, 'path': '_default', 'queue': queue})
+                    )
+        for location, bots_file in [('default', default_bots), ('running', running_bots)]:
+            if bots_file is None:
+                continue
+            for bots_item in bots_file.get_items():
+                tables['bots_entries'].append(self.get_row('bots_entries', {
+                    'location': location,
+                    'bot_group': bots_item.type_,
+                    'name': bots_item.name,
+                    'module': bots_item.module,
+                    'description': bots_item.description
+                }))
+                tables['parameters'].extend(self.get_parameter_rows(
+                    'bots_{}'.format(location), '{}/{}'.format(bots_item.type_, bots_item.name), bots_item.parameters
+                ))
+        for check, bot, bot_id, issue in issues:
+            data = issue.to_json()
+            module = bot.module if bot else data.get('module', None)
+            values = [check, data['type'], module, bot_id, data.get('key', None), data['description']]
+            tables['issues'].append(self.get_row('issues', {
+                'issue_hash': self.get_hash(values + [data]),
+                'check_name': check,
+                'type': data['type'],
+                'module': module,
+                'bot_id': bot_id,
+                'key': data.get('key', None),
+                'description': data['description'],
+                'data': json.dumps(data, sort_keys=True, default=str)
+            }))
+        for key, value in (meta or dict()).items():
+            tables['meta'].append(self.get_row('meta', {'key': key, 'value': value}))
+        return tables
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import json
+import shlex
+import sys
+import time
+from logging import Logger
+from os import environ
+from os.path import isfile
+from subprocess import Popen, PIPE, TimeoutExpired
+from typing import List, Optional
+
+from intelmqworkbench import startupharness
+from intelmqworkbench.classes.intelmqbot import IntelMQBot
+from intelmqworkbench.classes.intelmqworkbenchconfig import IntelMQWorkbenchConfig
+from intelmqworkbench.classes.startupmeasurement import StartupMeasurement
+
+
+class StartupHandler:
+
+    def __init__(self, logger: Logger):
+        self.logger = logger
+        self.__harness: Optional[str] = None
+
+    @property
+    def harness(self) -> str:
+        if self.__harness is None:
+            with open(startupharness.__file__, 'r') as f:
+                self.__harness = f.read()
+        return self.__harness
+
+    def get_interpreter(self, executable_path: str) -> List[str]:
+        # the interpreter including its flags as written in the shebang of the executable
+        with open(executable_path, 'r') as f:
+            first_line = f.readline().strip()
+        if first_line.startswith('#!'):
+            command = shlex.split(first_line[2:])
+            if command and isfile(command[0]):
+                return command
+            self.logger.warning('Interpreter of {} does not exist using {}'.format(executable_path, sys.executable))
+            return [sys.executable] + command[1:]
+        self.logger.warning('{} has no shebang using {}'.format(executable_path, sys.executable))
+        return [sys.executable]
+
+    def get_settings(self, bot: IntelMQBot, config: IntelMQWorkbenchConfig, sandbox: Optional[str] = None) -> dict:
+        logging_path = config.default_logging_path
+        if sandbox:
+            # the logs of the bot are written into the sandbox and not next to the ones of the running bots
+            logging_path = sandbox
+        constants = {
+            'CONFIG_DIR': config.config_dir,
+            'DEFAULT_LOGGING_PATH': logging_path,
+            'HARMONIZATION_CONF_FILE': config.harmonization_conf_file,
+        }
+        if config.version.startswith('2'):
+            constants['RUNTIME_CONF_FILE'] = config.runtime_conf_file
+            constants['PIPELINE_CONF_FILE'] = config.pipeline_conf_file
+        else:
+            constants['RUNTIME_CONF_FILE'] = config.runtime_yaml_file
+        paths = list()
+        if bot.custom:
+            paths.append(config.custom_bot_folder)
+        return {
+            'constants': constants,
+            'paths': paths
+        }
+
+    @staticmethod
+    def get_environment(sandbox: str) -> dict:
+        environment = {
+            'HOME': sandbox,
+            'TMPDIR': sandbox,
+        }
+        for key in ['PATH', 'LANG', 'LC_ALL', 'PYTHONPATH']:
+            if key in environ:
+                environment[key] = environ[key]
+        return environment
+
+    def measure(
+            self,
+            bot: IntelMQBot,
+            bot_id: str,
+            executable_path: str,
+            config: IntelMQWorkbenchConfig,
+            timeout: float,
+            sandbox: Optional[str] = None
+    ) -> StartupMeasurement:
+        measurement = StartupMeasurement()
+        measurement.bot_id = bot_id
+        measurement.executable = executable_path
+        command = self.get_interpreter(executable_path) + [
+            '-c', self.harness, bot.module, bot.bot_variable, bot_id,
+            json.dumps(self.get_settings(bot, config, sandbox))
+        ]
+        environment = None
+        if sandbox:
+            environment = self.get_environment(sandbox)
+        self.logger.debug('Launching {} for {}'.format(executable_path, bot_id))
+        started = time.perf_counter()
+        process = Popen(command, stdout=PIPE, stderr=PIPE, universal_newlines=True, cwd=sandbox, env=environment)
+        try:
+            output, errors = process.communicate(timeout=timeout)
+        except TimeoutExpired:
+            process.kill()
+            process.communicate()
+            measurement.error = 'Timeout after {}s'.format(timeout)
+            return measurement
+        measurement.seconds = time.perf_counter() - started
+        data = None
+        for line in output.splitlines():
+            if line.startswith(startupharness.MARKER):
+                data = json.loads(line[len(startupharness.MARKER):])
+        if data is None:
+            self.logger.debug(errors)
+            measurement.error = 'No result (exit code {})'.format(process.returncode)
+        elif 'error' in data:
+            self.logger.debug(errors)
+            measurement.error = data['error']
+        else:
+            measurement.import_seconds = data['import']
+            measurement.init_seconds = data['init']
+            measurement.peak_rss = data.get('rss')
+        return measurement
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+
+Launched by the StartupHandler with the interpreter of a bot executable. It must not import anything of the
+workbench as it runs with the same startup as the bot.
+
+Arguments: <module> <launch variable> <bot_id> <json settings>
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import json
+import os
+import resource
+import sys
+import time
+from importlib import import_module
+
+MARKER = 'STARTUP-BENCH'
+
+
+def report(data: dict) -> None:
+    sys.stdout.write('{} {}\n'.format(MARKER, json.dumps(data)))
+    sys.stdout.flush()
+
+
+def set_constants(constants: dict) -> None:
+    # the same modifications as done by the fiddler
+    for module_name in ['intelmq', 'intelmq.lib.bot', 'intelmq.lib.utils', 'intelmq.lib.message']:
+        module = sys.modules.get(module_name)
+        if module:
+            for key, value in constants.items():
+                if hasattr(module, key):
+                    setattr(module, key, value)
+
+
+def set_pipeline_stand_in() -> None:
+    # no broker is contacted, the bot gets an in memory pipeline
+    from intelmq.lib import pipeline
+    create = pipeline.PipelineFactory.create
+
+    def create_stand_in(*args, **kwargs):
+        pipeline_args = kwargs.get('pipeline_args')
+        if pipeline_args is None:
+            pipeline_args = dict()
+            kwargs['pipeline_args'] = pipeline_args
+        pipeline_args['source_pipeline_broker'] = 'pythonlist'
+        pipeline_args['destination_pipeline_broker'] = 'pythonlist'
+        kwargs['broker'] = 'pythonlist'
+        return create(*args, **kwargs)
+
+    pipeline.PipelineFactory.create = staticmethod(create_stand_in)
+
+
+def main() -> None:
+    started = time.perf_counter()
+    module_name, variable, bot_id = sys.argv[1], sys.argv[2], sys.argv[3]
+    settings = json.loads(sys.argv[4])
+    for path in settings.get('paths', []):
+        sys.path.append(path)
+    try:
+        module = import_module(module_name)
+    except Exception as error:
+        report({'error': 'Import failed: {}'.format(error)})
+        os._exit(2)
+    imported = time.perf_counter()
+    set_constants(settings.get('constants', {}))
+    set_pipeline_stand_in()
+    clazz = getattr(module, variable)
+    if 'DEFAULT_LOGGING_PATH' in settings.get('constants', {}):
+        setattr(clazz, 'logging_path', settings['constants']['DEFAULT_LOGGING_PATH'])
+    original_init = clazz.init
+
+    def init(self) -> None:
+        original_init(self)
+        initialized = time.perf_counter()
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            # bytes instead of kilobytes
+            rss = rss // 1024
+        report({
+            'import': imported - started,
+            'init': initialized - imported,
+            'rss': rss
+        })
+        # do not start the bot, nor run any shutdown hooks
+        os._exit(0)
+
+    clazz.init = init
+    try:
+        clazz(bot_id)
+    except BaseException as error:
+        report({'error': 'Initialization failed: {}'.format(error)})
+        os._exit(3)
+    report({'error': 'init() was never called'})
+    os._exit(4)
+
+
+if __name__ == '__main__':
+    main()
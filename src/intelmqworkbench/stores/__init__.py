@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+from abc import ABC, abstractmethod
+from typing import Iterable, Iterator, Optional
+
+
+class MessageStore(ABC):
+
+    def __init__(self, folder: str):
+        self.folder = folder
+
+    @abstractmethod
+    def append(self, data: dict) -> int:
+        # returns the position of the message
+        raise NotImplementedError()
+
+    def extend(self, messages: Iterable[dict]) -> int:
+        count = 0
+        for data in messages:
+            self.append(data)
+            count += 1
+        return count
+
+    @abstractmethod
+    def read(self, start: int = 0, stop: Optional[int] = None) -> Iterator[dict]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def count(self) -> int:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def clear(self) -> None:
+        raise NotImplementedError()
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __enter__(self) -> 'MessageStore':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return '{} - ({})'.format(self.__class__.__name__, self.folder)
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import json
+import re
+from os import listdir, makedirs, remove
+from os.path import isdir, join
+from typing import Iterator, List, Optional
+
+from intelmqworkbench.stores import MessageStore
+from intelmqworkbench.utils import pretty_json
+
+
+class FileStore(MessageStore):
+
+    # the layout of the fiddler up to 0.7, one pretty printed file per message. Only used for import and export
+    FILE_NAME = 'message'
+    FILE_PATTERN = re.compile(r'^message-(\d+)\.json$')
+
+    def __init__(self, folder: str):
+        super().__init__(folder)
+        self.__count: Optional[int] = None
+
+    def get_numbers(self) -> List[int]:
+        if not isdir(self.folder):
+            return list()
+        numbers = list()
+        for file_name in listdir(self.folder):
+            match = FileStore.FILE_PATTERN.match(file_name)
+            if match:
+                numbers.append(int(match.group(1)))
+        return sorted(numbers)
+
+    def get_file_name(self, position: int) -> str:
+        return join(self.folder, '{}-{}.json'.format(FileStore.FILE_NAME, position))
+
+    def count(self) -> int:
+        if self.__count is None:
+            # the messages are numbered without gaps starting at 0
+            numbers = self.get_numbers()
+            self.__count = 0
+            while self.__count < len(numbers) and numbers[self.__count] == self.__count:
+                self.__count += 1
+        return self.__count
+
+    def append(self, data: dict) -> int:
+        position = self.count()
+        makedirs(self.folder, exist_ok=True)
+        with open(self.get_file_name(position), 'w') as f:
+            f.write(pretty_json(data))
+        self.__count = position + 1
+        return position
+
+    def read(self, start: int = 0, stop: Optional[int] = None) -> Iterator[dict]:
+        stop = self.count() if stop is None else min(stop, self.count())
+        for position in range(start, stop):
+            with open(self.get_file_name(position), 'r') as f:
+                yield json.loads(f.read())
+
+    def clear(self) -> None:
+        for number in self.get_numbers():
+            remove(self.get_file_name(number))
+        self.__count = 0
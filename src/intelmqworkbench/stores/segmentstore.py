@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import gzip
+import json
+import lzma
+import mmap
+import re
+import sys
+from array import array
+from os import listdir, makedirs, rename
+from os.path import getsize, isdir, isfile, join
+from shutil import rmtree
+from typing import BinaryIO, Iterator, List, Optional
+
+from intelmqworkbench.exceptions import IntelMQToolException
+from intelmqworkbench.stores import MessageStore
+
+
+class Segment:
+
+    def __init__(self, folder: str, number: int, compression: Optional[str] = None):
+        self.number = number
+        self.compression = compression
+        base = join(folder, 'segment-{:06d}'.format(number))
+        self.data_path = '{}.jsonl{}'.format(base, SegmentStore.EXTENSIONS[compression])
+        # little endian uint64 per message, the offset of the end of its line in the uncompressed data
+        self.index_path = '{}.idx'.format(base)
+
+    @property
+    def count(self) -> int:
+        if isfile(self.index_path):
+            return getsize(self.index_path) // 8
+        return 0
+
+    def get_offsets(self) -> array:
+        offsets = array('Q')
+        if isfile(self.index_path):
+            with open(self.index_path, 'rb') as f:
+                data = f.read()
+            # a partially written entry is ignored
+            offsets.frombytes(data[:len(data) - len(data) % 8])
+            if sys.byteorder == 'big':
+                offsets.byteswap()
+        return offsets
+
+    def open(self, mode: str) -> BinaryIO:
+        return SegmentStore.OPENERS[self.compression](self.data_path, mode)
+
+    def iter_lines(self, start: int = 0, stop: Optional[int] = None) -> Iterator[bytes]:
+        offsets = self.get_offsets()
+        stop = len(offsets) if stop is None else min(stop, len(offsets))
+        if start >= stop:
+            return
+        begin = offsets[start - 1] if start > 0 else 0
+        if self.compression is None:
+            with open(self.data_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for position in range(start, stop):
+                    end = offsets[position]
+                    yield mapped[begin:end]
+                    begin = end
+        else:
+            # compressed data can only be read sequentially, seeking decompresses up to the offset
+            with self.open('rb') as f:
+                if begin:
+                    f.seek(begin)
+                for position in range(start, stop):
+                    end = offsets[position]
+                    yield f.read(end - begin)
+                    begin = end
+
+    def __repr__(self) -> str:
+        return '{} - ({})'.format(self.data_path, self.count)
+
+
+class SegmentStore(MessageStore):
+
+    # append only JSON lines split into segments, every segment has a sidecar index with the line offsets
+    EXTENSIONS = {None: '', 'gzip': '.gz', 'lzma': '.xz'}
+    OPENERS = {None: open, 'gzip': gzip.open, 'lzma': lzma.open}
+    SEGMENT_PATTERN = re.compile(r'^segment-(\d{6})\.idx$')
+    # messages kept in memory before they are written
+    BUFFER_SIZE = 1000
+
+    def __init__(self, folder: str, compression: Optional[str] = None, segment_size: int = 100000):
+        super().__init__(folder)
+        if compression not in SegmentStore.EXTENSIONS:
+            raise IntelMQToolException('Compression "{}" is not supported'.format(compression))
+        self.compression = compression
+        self.segment_size = segment_size
+        self.__segments: Optional[List[Segment]] = None
+        self.__writer: Optional[Segment] = None
+        self.__data_file: Optional[BinaryIO] = None
+        self.__index_file: Optional[BinaryIO] = None
+        self.__end = 0
+        self.__written = 0
+        self.__position = 0
+        self.__lines: List[bytes] = list()
+        self.__offsets = array('Q')
+
+    @staticmethod
+    def encode(data: dict) -> bytes:
+        return json.dumps(data, separators=(',', ':')).encode('utf-8') + b'\n'
+
+    def get_segment(self, number: int) -> Segment:
+        # the compression of an existing segment is given by its file name
+        for compression in SegmentStore.EXTENSIONS.keys():
+            segment = Segment(self.folder, number, compression)
+            if isfile(segment.data_path):
+                return segment
+        return Segment(self.folder, number, self.compression)
+
+    def get_segments(self) -> List[Segment]:
+        if self.__segments is None:
+            self.__segments = list()
+            if isdir(self.folder):
+                for file_name in sorted(listdir(self.folder)):
+                    match = SegmentStore.SEGMENT_PATTERN.match(file_name)
+                    if match:
+                        self.__segments.append(self.get_segment(int(match.group(1))))
+        return self.__segments
+
+    def count(self) -> int:
+        return sum([segment.count for segment in self.get_segments()]) + len(self.__lines)
+
+    def __open_writer(self) -> None:
+        self.__close_writer()
+        segments = self.get_segments()
+        self.__position = sum([segment.count for segment in segments])
+        last = segments[-1] if segments else None
+        if last and last.compression is None and self.compression is None and last.count < self.segment_size:
+            # continue the last segment, anything behind the last indexed message is a partial write
+            offsets = last.get_offsets()
+            self.__end = offsets[-1] if offsets else 0
+            if isfile(last.data_path):
+                with open(last.data_path, 'r+b') as f:
+                    f.truncate(self.__end)
+            with open(last.index_path, 'r+b') as f:
+                f.truncate(len(offsets) * 8)
+            self.__written = len(offsets)
+            self.__data_file = last.open('ab')
+            self.__index_file = open(last.index_path, 'ab')
+            self.__writer = last
+        else:
+            # compressed segments are not continued, they are complete once closed
+            makedirs(self.folder, exist_ok=True)
+            segment = Segment(self.folder, last.number + 1 if last else 0, self.compression)
+            self.__end = 0
+            self.__written = 0
+            self.__data_file = segment.open('wb')
+            self.__index_file = open(segment.index_path, 'wb')
+            self.__writer = segment
+            segments.append(segment)
+
+    def __close_writer(self) -> None:
+        if self.__writer:
+            self.flush()
+            self.__data_file.close()
+            self.__index_file.close()
+            self.__data_file = None
+            self.__index_file = None
+            self.__writer = None
+
+    def append_raw(self, line: bytes) -> int:
+        # line has to be a single JSON document terminated by a newline
+        if self.__writer is None or self.__written >= self.segment_size:
+            self.__open_writer()
+        self.__lines.append(line)
+        self.__end += len(line)
+        self.__offsets.append(self.__end)
+        self.__written += 1
+        position = self.__position
+        self.__position += 1
+        if len(self.__lines) >= SegmentStore.BUFFER_SIZE:
+            self.flush()
+        return position
+
+    def append(self, data: dict) -> int:
+        return self.append_raw(SegmentStore.encode(data))
+
+    def flush(self) -> None:
+        if self.__lines:
+            # the data is written before the index, so the index never points behind the data
+            self.__data_file.write(b''.join(self.__lines))
+            self.__data_file.flush()
+            if sys.byteorder == 'big':
+                self.__offsets.byteswap()
+            self.__index_file.write(self.__offsets.tobytes())
+            self.__index_file.flush()
+            self.__lines = list()
+            self.__offsets = array('Q')
+
+    def close(self) -> None:
+        self.__close_writer()
+
+    def read_raw(self, start: int = 0, stop: Optional[int] = None) -> Iterator[bytes]:
+        self.__close_writer()
+        first = 0
+        for segment in self.get_segments():
+            if stop is not None and first >= stop:
+                break
+            count = segment.count
+            if first + count > start:
+                yield from segment.iter_lines(max(start - first, 0), None if stop is None else stop - first)
+            first += count
+
+    def read(self, start: int = 0, stop: Optional[int] = None) -> Iterator[dict]:
+        for line in self.read_raw(start, stop):
+            yield json.loads(line)
+
+    def move_segments(self, source: 'SegmentStore') -> int:
+        # appends the messages of the source by moving its segment files behind the ones of this store
+        self.__close_writer()
+        source.close()
+        segments = self.get_segments()
+        count = 0
+        for segment in source.get_segments():
+            if segment.count == 0:
+                continue
+            makedirs(self.folder, exist_ok=True)
+            target = Segment(self.folder, segments[-1].number + 1 if segments else 0, segment.compression)
+            rename(segment.data_path, target.data_path)
+            rename(segment.index_path, target.index_path)
+            segments.append(target)
+            count += target.count
+        source.clear()
+        return count
+
+    def clear(self) -> None:
+        self.__close_writer()
+        self.__lines = list()
+        self.__offsets = array('Q')
+        if isdir(self.folder):
+            rmtree(self.folder)
+        self.__segments = None
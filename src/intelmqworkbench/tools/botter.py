@@ -10,15 +10,14 @@ __copyright__ = 'Copyright 2019-present, Restena CSIRT'
 __license__ = 'GPL v3+'
 
 from argparse import ArgumentParser, Namespace
-from os import remove
-from os.path import join, isfile
-from shutil import rmtree
+from os.path import join
 from typing import Optional
 
 from intelmqworkbench import AbstractBaseTool, IncorrectArgumentException, IntelMQToolException
 from intelmqworkbench.classes.bots.bots import BOTS
 from intelmqworkbench.classes.intelmqbot import IntelMQBot
 from intelmqworkbench.classes.runtime.runtime import Runtime
+from intelmqworkbench.utils import is_intelmq_2
 
 
 class Botter(AbstractBaseTool):
@@ -37,6 +36,14 @@ class Botter(AbstractBaseTool):
         arg_parse.add_argument('-u', '--uninstall', default=None,
                                help='Class name or Name of the BOT to be installed e.g. ExampleParserBot, Example',
                                type=str)
+        arg_parse.add_argument('--fast-start', default=False, dest='fast_start',
+                               help='Precompiles the BOT and creates an executable with an isolated interpreter '
+                                    'startup. Use with -i',
+                               action='store_true')
+        arg_parse.add_argument('--verify', default=False,
+                               help='Reports the drift of the symlinks of the installed custom bots without '
+                                    'changing them. Use with -i to verify only one BOT (IntelMQ 3.x only)',
+                               action='store_true')
         arg_parse.add_argument('--force', default=False, help='Force', action='store_true')
         return arg_parse
 
@@ -50,13 +57,22 @@ class Botter(AbstractBaseTool):
     def start(self, args: Namespace) -> int:
         bots_conf = self.get_running_bots(args.force)
         force = args.force
-        if args.install:
+        if args.verify:
+            return self.verify_bots(args.install, force)
+        elif args.install:
             class_name = args.install
             bot = self.__get_bot(class_name, force)
             if bot:
                 if not (bot.description or bot.default_parameters):
                     raise IntelMQToolException('Bot "{}" ({}) is faulty. Verify manually'.format(bot.name, bot.module))
-                return self.output_handler.install_bot(bot, self.config.bin_folder, self.config.bot_folder, bots_conf)
+                return self.output_handler.install_bot(
+                    bot,
+                    self.config.bin_folder,
+                    self.config.bot_folder,
+                    bots_conf,
+                    args.fast_start,
+                    self.config.custom_bot_folder
+                )
             else:
                 raise IntelMQToolException('Bot "{}" cannot be found verify if it is listed.')
         elif args.uninstall:
@@ -72,6 +88,32 @@ class Botter(AbstractBaseTool):
         else:
             raise IncorrectArgumentException()
 
+    def verify_bots(self, class_name: Optional[str], force: bool) -> int:
+        if is_intelmq_2():
+            print('Symlinks are only used with IntelMQ Version > 3.0.0.')
+            return 0
+        if class_name:
+            bot = self.__get_bot(class_name, force)
+            if bot is None:
+                raise IntelMQToolException('Bot "{}" cannot be found verify if it is listed.'.format(class_name))
+            bots = [bot]
+        else:
+            bots = [bot for bot in self.get_all_bots(force) if bot.custom and bot.installed]
+        drifted = list()
+        for bot in bots:
+            source, destination = self.output_handler.get_paths(bot, self.config.bot_folder)
+            drift = self.output_handler.sync_folders(source, destination, verify=True)
+            if drift.has_drift():
+                drifted.append((bot, drift))
+        with self.workspace.metrics.span('rendering'):
+            for bot, drift in drifted:
+                self.output_handler.print_symlink_drift(bot, drift)
+        if drifted:
+            print('{} of {} BOTS have drifted.'.format(len(drifted), len(bots)))
+            return 1
+        print('No drift detected for {} BOTS.'.format(len(bots)))
+        return 0
+
     def remove_bot(
             self,
             bot: IntelMQBot,
@@ -86,7 +128,9 @@ class Botter(AbstractBaseTool):
 
         runtime_items = runtime.get_runtime_items_for_module(bot.module)
         for item in runtime_items:
-            result = self.intelmq_handler.remove_runtime_item_by_bot_id(item.bot_id)
+            result = self.intelmq_handler.remove_runtime_item_by_bot_id(
+                item.bot_id, runtime, self.get_pipeline(), self.config.bin_folder
+            )
             if result:
                 self.logger.info('Removed BOT "{}" from runtime'.format(item.bot_id))
                 removed = True
@@ -112,14 +156,12 @@ class Botter(AbstractBaseTool):
             self.logger.debug('IntelMQ 3.x uninstallation')
             # removal for IntelMQ > 3.0
             destination = self.output_handler.get_paths(bot, self.config.bot_folder)[1]
-            rmtree(destination)
+            self.output_handler.remove_path(destination)
 
         # Remove executable
         file_name = self.output_handler.get_executable_filename(bot, self.config.bin_folder)
-        path = join(self.config.bin_folder, file_name)
-        if isfile(path):
-            self.logger.debug('Executable "{}" exists'.format(path))
-            remove(path)
+        self.output_handler.remove_path(join(self.config.bin_folder, file_name))
+        bot.installed = False
 
         print('BOT "{}" ({}) removed.'.format(bot.name, bot.module))
         return 0
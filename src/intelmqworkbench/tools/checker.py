@@ -9,21 +9,36 @@ __email__ = 'jean-paul.weber@restena.lu'
 __copyright__ = 'Copyright 2019-present, Restena CSIRT'
 __license__ = 'GPL v3+'
 from argparse import ArgumentParser, Namespace
-from typing import Optional
+from logging import Logger
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from intelmqworkbench import AbstractBaseTool, IncorrectArgumentException
+from intelmqworkbench.classes.intelmqbot import IntelMQBot
+from intelmqworkbench.classes.intelmqworkbenchconfig import IntelMQWorkbenchConfig
+from intelmqworkbench.classes.issues import Issue
 from intelmqworkbench.classes.issues.intelmqbotinstallissue import IntelMQBotInstallIssue
 from intelmqworkbench.classes.issues.intelmqbotissue import IntelMQBotIssue
+from intelmqworkbench.classes.issues.issuegroup import IssueGroup
 from intelmqworkbench.classes.issues.issues import InstallIssueLocations, ReferenceIssue, AvailableExecutableIssue, \
     MissingExecutable, NotInstalledIssue, MismatchInstallIssue, MissingDescriptionIssue, \
     MissingDefaultConfigurationIssue
 from intelmqworkbench.exceptions import IntelMQToolException
+from intelmqworkbench.recordhandler import RecordHandler
+
+# bot the issue belongs to (None for general issues), id of the runtime instance and the issue
+IssueEntry = Tuple[Optional[IntelMQBot], Optional[str], Issue]
 
 
 class Checker(AbstractBaseTool):
 
+    def __init__(self, logger: Logger, config: IntelMQWorkbenchConfig):
+        super().__init__(logger, config)
+        self.record_handler = RecordHandler(logger)
+        self.aggregate = False
+        self.full = False
+
     def get_version(self) -> str:
-        return '0.3'
+        return '0.4'
 
     def get_arg_parser(self) -> ArgumentParser:
         arg_parse = ArgumentParser(prog='check', description='Check installation of bots is still applicable')
@@ -37,11 +52,21 @@ class Checker(AbstractBaseTool):
         arg_parse.add_argument('-s', '--strange', default=False,
                                help='Check if there are strange BOTS or configurations',
                                action='store_true')
+        arg_parse.add_argument('--format', default='text', choices=RecordHandler.FORMATS,
+                               help='Output format, jsonl/json/csv write one record per issue (default: text)',
+                               type=str)
+        arg_parse.add_argument('--aggregate', default=False,
+                               help='Groups the same issue of the instances of a bot and prints it once with the '
+                                    'number and ids of the affected instances (all ids with -f)',
+                               action='store_true')
         arg_parse.add_argument('--force', default=False, help='Force', action='store_true')
         self.set_default_arguments(arg_parse)
         return arg_parse
 
     def start(self, args: Namespace) -> int:
+        self.record_handler.format = args.format
+        self.aggregate = args.aggregate
+        self.full = args.full
         if args.bots:
             return self.check_bots(args.force)
         elif args.runtime:
@@ -54,119 +79,159 @@ class Checker(AbstractBaseTool):
     def get_default_argument_description(self) -> Optional[str]:
         return None
 
-    def check_bots(self, force: bool) -> int:
-        # check BOTS File which do not match their config e.g. parameters and are referenced in BOTS but do not have BOT
-        if self.config.version.startswith('3') and not force:
-            print('BOTS cannot be checked as IntelMQ Version > 3.0.0 or use --force.')
-        else:
-            issues = self.get_issues(force)
-            if issues:
-                general_issues = list()
-                for issue in issues:
-                    output_issues = list()
-                    # print('BOT "{}" has issues:'.format(issue.bot.name))
-                    if isinstance(issue, IntelMQBotInstallIssue):
-                        for item in issue.issues:
-                            if isinstance(item, ReferenceIssue):
-                                if item.location == InstallIssueLocations.BOTS:
-                                    output_issues.append(item)
-                    elif isinstance(issue, IntelMQBotIssue):
-                        if issue.bots_issues:
-                            for item in issue.bots_issues.issues:
-                                output_issues.append(item)
-                        if issue.parameter_issues:
-                            for item in issue.parameter_issues:
-                                output_issues.append(item)
-                    if len(output_issues) > 0:
-                        if isinstance(issue, IntelMQBotInstallIssue):
-                            general_issues += output_issues
-                        else:
-                            self.output_handler.print_bot_detail(issue.bot, False)
-                            for item in output_issues:
-                                self.output_handler.print_issue(item)
-                if len(general_issues) > 0:
-                    print('\nOther Issues were Detected')
-                    for item in general_issues:
-                        self.output_handler.print_issue(item)
+    @staticmethod
+    def aggregate_issues(entries: Iterator[IssueEntry]) -> List[IssueGroup]:
+        # (bot module, issue type, key, expected value) -> group, in the order the issues were found
+        groups: Dict[tuple, IssueGroup] = dict()
+        for bot, bot_id, issue in entries:
+            key = IssueGroup.get_group_key(bot, issue)
+            group = groups.get(key, None)
+            if group is None:
+                group = IssueGroup()
+                groups[key] = group
+            group.add(bot, bot_id, issue)
+        return list(groups.values())
+
+    def output_groups(self, check: str, groups: List[IssueGroup], strange: bool = False) -> int:
+        if not self.record_handler.is_text:
+            self.record_handler.start(self.record_handler.format, RecordHandler.GROUP_FIELDS)
+            for group in groups:
+                record = group.to_json()
+                record['check'] = check
+                self.record_handler.write(record)
+            self.record_handler.finish()
+            return 0
+        with self.workspace.metrics.span('rendering'):
+            general_groups = list()
+            current_bot = None
+            for group in groups:
+                if group.bot is None:
+                    general_groups.append(group)
+                    continue
+                if group.bot is not current_bot:
+                    if strange and current_bot is not None:
+                        print()
+                    current_bot = group.bot
+                    self.output_handler.print_bot_detail(group.bot, False)
+                    if strange:
+                        print('Issues Detected:')
+                self.output_handler.print_issue_group(group, self.full)
+            if strange and current_bot is not None:
+                print()
+            if len(general_groups) > 0:
+                print('\nOther Issues were Detected')
+                for group in general_groups:
+                    self.output_handler.print_issue_group(group, self.full)
         return 0
 
-    def check_runtime(self, force: bool) -> int:
-        # Bots which do not match their config e.g. parameters and references in runtime.conf which have no BOT
-        issues = self.get_issues(force)
-        if issues:
+    def output(self, check: str, entries: Iterator[IssueEntry], strange: bool = False) -> int:
+        if self.aggregate:
+            return self.output_groups(check, self.aggregate_issues(entries), strange)
+        if not self.record_handler.is_text:
+            self.record_handler.start(self.record_handler.format, RecordHandler.ISSUE_FIELDS)
+            for bot, bot_id, issue in entries:
+                self.record_handler.write(RecordHandler.get_issue_record(check, issue, bot, bot_id))
+            self.record_handler.finish()
+            return 0
+        # the issues are determined before, only the printing is timed
+        entries = list(entries)
+        with self.workspace.metrics.span('rendering'):
             general_issues = list()
-            for issue in issues:
-                output_issues = list()
-                # print('BOT "{}" has issues:'.format(issue.bot.name))
-                if isinstance(issue, IntelMQBotInstallIssue):
-                    for item in issue.issues:
-                        if isinstance(item, ReferenceIssue):
-                            if item.location == InstallIssueLocations.RUNTIME:
-                                output_issues.append(item)
-                elif isinstance(issue, IntelMQBotIssue):
-                    if issue.runtime_issues:
-                        for item in issue.runtime_issues:
-                            for sub_item in item.issues:
-                                output_issues.append(sub_item)
-                            for sub_item in item.parameter_issues:
-                                output_issues.append(sub_item)
-                if len(output_issues) > 0:
-                    if isinstance(issue, IntelMQBotInstallIssue):
-                        general_issues += output_issues
-                    else:
-                        self.output_handler.print_bot_detail(issue.bot, False)
-                        for item in output_issues:
-                            self.output_handler.print_issue(item)
+            current_bot = None
+            for bot, bot_id, issue in entries:
+                if bot is None:
+                    general_issues.append(issue)
+                    continue
+                if bot is not current_bot:
+                    if strange and current_bot is not None:
+                        print()
+                    current_bot = bot
+                    self.output_handler.print_bot_detail(bot, False)
+                    if strange:
+                        print('Issues Detected:')
+                self.output_handler.print_issue(issue)
+            if strange and current_bot is not None:
+                print()
             if len(general_issues) > 0:
                 print('\nOther Issues were Detected')
                 for item in general_issues:
                     self.output_handler.print_issue(item)
         return 0
 
+    def check_bots(self, force: bool) -> int:
+        # check BOTS File which do not match their config e.g. parameters and are referenced in BOTS but do not have BOT
+        if self.config.version.startswith('3') and not force:
+            message = 'BOTS cannot be checked as IntelMQ Version > 3.0.0 or use --force.'
+            if self.record_handler.is_text:
+                print(message)
+                return 0
+            # the consumers still get a valid but empty output
+            self.logger.warning(message)
+            return self.output('bots', iter([]))
+        return self.output('bots', self.iter_bots_issues(force))
+
+    def iter_bots_issues(self, force: bool) -> Iterator[IssueEntry]:
+        for issue in self.get_issues(force) or []:
+            if isinstance(issue, IntelMQBotInstallIssue):
+                for item in issue.issues:
+                    if isinstance(item, ReferenceIssue):
+                        if item.location == InstallIssueLocations.BOTS:
+                            yield None, None, item
+            elif isinstance(issue, IntelMQBotIssue):
+                if issue.bots_issues:
+                    for item in issue.bots_issues.issues:
+                        yield issue.bot, None, item
+                if issue.parameter_issues:
+                    for item in issue.parameter_issues:
+                        yield issue.bot, None, item
+
+    def check_runtime(self, force: bool) -> int:
+        # Bots which do not match their config e.g. parameters and references in runtime.conf which have no BOT
+        return self.output('runtime', self.iter_runtime_issues(force))
+
+    def iter_runtime_issues(self, force: bool) -> Iterator[IssueEntry]:
+        for issue in self.get_issues(force) or []:
+            if isinstance(issue, IntelMQBotInstallIssue):
+                for item in issue.issues:
+                    if isinstance(item, ReferenceIssue):
+                        if item.location == InstallIssueLocations.RUNTIME:
+                            yield None, item.reference, item
+            elif isinstance(issue, IntelMQBotIssue):
+                if issue.runtime_issues:
+                    for item in issue.runtime_issues:
+                        for sub_item in item.issues:
+                            yield issue.bot, item.bot_id, sub_item
+                        for sub_item in item.parameter_issues:
+                            yield issue.bot, item.bot_id, sub_item
+
+    def iter_all_issues(self, force: bool) -> Iterator[Tuple[str, Optional[IntelMQBot], Optional[str], Issue]]:
+        # the issues of all checks together with the name of the check
+        if not self.config.version.startswith('3') or force:
+            for bot, bot_id, issue in self.iter_bots_issues(force):
+                yield 'bots', bot, bot_id, issue
+        for bot, bot_id, issue in self.iter_runtime_issues(force):
+            yield 'runtime', bot, bot_id, issue
+        for bot, bot_id, issue in self.iter_strange_issues(force):
+            yield 'strange', bot, bot_id, issue
+
     def check_strange(self, force: bool) -> int:
         # Bots either not installed or fragments left e.g. executable references in runtime.conf or BOTS
-        issues = self.get_issues(force)
-        if issues:
-            general_issues = list()
-            for issue in issues:
-                output_issues = list()
-                # print('BOT "{}" has issues:'.format(issue.bot.name))
-                if isinstance(issue, IntelMQBotInstallIssue):
-                    for item in issue.issues:
-                        if isinstance(item, AvailableExecutableIssue):
-                            output_issues.append(item)
-                        elif isinstance(item, NotInstalledIssue):
-                            output_issues.append(item)
-                        elif isinstance(item, ReferenceIssue):
-                            output_issues.append(item)
-                elif isinstance(issue, IntelMQBotIssue):
-                    if issue.issues:
-                        for item in issue.issues:
-                            if isinstance(item, MissingExecutable):
-                                output_issues.append(item)
-                            elif isinstance(item, MismatchInstallIssue):
-                                output_issues.append(item)
-                            elif isinstance(item, MissingDescriptionIssue):
-                                output_issues.append(item)
-                            elif isinstance(item, AvailableExecutableIssue):
-                                output_issues.append(item)
-                            elif isinstance(item, MissingDefaultConfigurationIssue):
-                                output_issues.append(item)
-                            else:
-                                raise IntelMQToolException('Unknown Issue')
-                if len(output_issues) > 0:
-                    if isinstance(issue, IntelMQBotInstallIssue):
-                        general_issues += output_issues
-                    else:
-                        if issue.bot.installed:
-                            self.output_handler.print_bot_detail(issue.bot, False)
-                            print('Issues Detected:')
-                            for item in output_issues:
-                                self.output_handler.print_issue(item)
-                            print()
-            if len(general_issues) > 0:
-                print('\nOther Issues were Detected')
-                for item in general_issues:
-                    self.output_handler.print_issue(item)
-        return 0
+        return self.output('strange', self.iter_strange_issues(force), True)
 
+    def iter_strange_issues(self, force: bool) -> Iterator[IssueEntry]:
+        for issue in self.get_issues(force) or []:
+            if isinstance(issue, IntelMQBotInstallIssue):
+                for item in issue.issues:
+                    if isinstance(item, (AvailableExecutableIssue, NotInstalledIssue, ReferenceIssue)):
+                        yield None, None, item
+            elif isinstance(issue, IntelMQBotIssue):
+                output_issues: List[Issue] = list()
+                for item in issue.issues:
+                    if isinstance(item, (MissingExecutable, MismatchInstallIssue, MissingDescriptionIssue,
+                                         AvailableExecutableIssue, MissingDefaultConfigurationIssue)):
+                        output_issues.append(item)
+                    else:
+                        raise IntelMQToolException('Unknown Issue')
+                if issue.bot.installed:
+                    for item in output_issues:
+                        yield issue.bot, None, item
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+from argparse import ArgumentParser, Namespace
+from logging import Logger
+from typing import Optional
+
+from intelmqworkbench import AbstractBaseTool, IntelMQWorkbenchConfig, IntelMQToolException
+from intelmqworkbench.daemonhandler import DaemonHandler, DEFAULT_SOCKET
+
+
+class Daemon(AbstractBaseTool):
+
+    def __init__(self, logger: Logger, config: IntelMQWorkbenchConfig):
+        super().__init__(logger, config)
+        self.daemon_handler = DaemonHandler(logger)
+
+    def get_default_argument_description(self) -> Optional[str]:
+        return None
+
+    def get_version(self) -> str:
+        return '0.1'
+
+    def get_arg_parser(self) -> ArgumentParser:
+        arg_parse = ArgumentParser(prog='daemon',
+                                   description='Keeps the workspace loaded and answers commands over a Unix socket')
+        arg_parse.add_argument('--socket', default=DEFAULT_SOCKET,
+                               help='Path of the Unix socket (default: {})'.format(DEFAULT_SOCKET),
+                               type=str)
+        arg_parse.add_argument('--interval', default=2.0,
+                               help='Seconds between the checks for changed configurations and bots',
+                               type=float)
+        return arg_parse
+
+    def start(self, args: Namespace) -> int:
+        if args.interval <= 0:
+            raise IntelMQToolException('The interval must be greater than 0')
+        self.daemon_handler.tool_factory = self.tool_factory
+        self.daemon_handler.serve(args.socket, args.interval)
+        return 0
@@ -12,11 +12,20 @@ __license__ = 'GPL v3+'
 
 from logging import Logger
 
+from intelmqworkbench.classes.benchresult import BenchResult
+from intelmqworkbench.classes.comparisonresult import ComparisonResult
+from intelmqworkbench.classes.hopresult import HopResult
+from intelmqworkbench.classes.leakresult import LeakResult
+from intelmqworkbench.classes.profileresult import ProfileResult
+from intelmqworkbench.classes.shardresult import ShardResult
+from intelmqworkbench.comparehandler import CompareHandler
 from intelmqworkbench.exceptions import IntelMQToolException
 from intelmqworkbench.fiddlehandler import FiddleHandler
+from intelmqworkbench.generatorhandler import GeneratorHandler
 from intelmqworkbench import AbstractBaseTool, IncorrectArgumentException, IntelMQWorkbenchConfig
+from intelmqworkbench.utils import colorize_text, pretty_json
 from argparse import ArgumentParser, Namespace
-from typing import Optional
+from typing import Dict, List, Optional
 
 
 class Fiddler(AbstractBaseTool):
@@ -24,12 +33,14 @@ class Fiddler(AbstractBaseTool):
     def __init__(self, logger: Logger, config: IntelMQWorkbenchConfig):
         super().__init__(logger, config)
         self.fiddle_handler = FiddleHandler(logger)
+        self.compare_handler = CompareHandler(logger)
+        self.generator_handler = GeneratorHandler(logger)
 
     def get_default_argument_description(self) -> Optional[str]:
         return None
 
     def get_version(self) -> str:
-        return '0.2'
+        return '0.12'
 
     def get_arg_parser(self) -> ArgumentParser:
         arg_parse = ArgumentParser(prog='fiddler', description='Tool for developing/debugging bots')
@@ -37,20 +48,361 @@ class Fiddler(AbstractBaseTool):
                                help='bot_id of the bot to be executed',
                                type=str)
         arg_parse.add_argument('--fixes', default=False, help='Show Fixed Configuration', action='store_true')
+        arg_parse.add_argument('--import-messages', default=None, dest='import_messages',
+                               help='Replace the messages with the message-N.json files of the given folder', type=str)
+        arg_parse.add_argument('--export-messages', default=None, dest='export_messages',
+                               help='Write the messages as message-N.json files into the given folder', type=str)
+        arg_parse.add_argument('--path', default=FiddleHandler.DEFAULT_PATH,
+                               help='Path of the previous run whose messages are processed (default: _default)',
+                               type=str)
+        arg_parse.add_argument('--generate', default=None, metavar='N',
+                               help='Replace the messages with N synthetic events valid for the harmonization',
+                               type=int)
+        arg_parse.add_argument('--seed', default=0, help='Seed of --generate (default: 0)', type=int)
+        arg_parse.add_argument('--ip-ranges', default=None, nargs='+', dest='ip_ranges', metavar='CIDR',
+                               help='Ranges of the source IPs of --generate (default: the documentation ranges)',
+                               type=str)
+        arg_parse.add_argument('--fqdns', default=GeneratorHandler.DEFAULT_FQDNS,
+                               help='Number of distinct FQDNs of --generate (default: {})'.format(
+                                   GeneratorHandler.DEFAULT_FQDNS
+                               ), type=int)
+        arg_parse.add_argument('--classifications', default=None, nargs='+', metavar='TYPE=WEIGHT',
+                               help='Mix of the classification types of --generate, e.g. scanner=4 spam=1',
+                               type=str)
+        arg_parse.add_argument('--trusted', default=False,
+                               help='Create the messages from the stored ones without validating them',
+                               action='store_true')
+        arg_parse.add_argument('--trusted-validate', default=100, dest='trusted_validate', metavar='N',
+                               help='Validate every Nth message with --trusted, 0 disables it (default: 100)', type=int)
+        arg_parse.add_argument('--compression', default='none', choices=['none', 'gzip', 'lzma'],
+                               help='Compression of the written message segments (default: none)', type=str)
+        arg_parse.add_argument('-w', '--workers', default=1,
+                               help='Number of processes the messages are split across (default: 1)', type=int)
+        arg_parse.add_argument('--pipeline', default=None, metavar='BOT_ID',
+                               help='Run the bots following the destination queues from the given bot in one process',
+                               type=str)
+        arg_parse.add_argument('--bench', default=False,
+                               help='Measure the throughput and latency of the bot, the messages are not replaced',
+                               action='store_true')
+        arg_parse.add_argument('--warmup', default=100,
+                               help='Number of messages processed before measuring or profiling (default: 100)',
+                               type=int)
+        arg_parse.add_argument('--profile', default=False,
+                               help='Profile every process() call and save the slowest messages', action='store_true')
+        arg_parse.add_argument('--profile-top', default=25, dest='profile_top',
+                               help='Number of functions and allocation sites printed by --profile and --leak '
+                                    '(default: 25)',
+                               type=int)
+        arg_parse.add_argument('--profile-slowest', default=10, dest='profile_slowest',
+                               help='Number of slowest messages saved by --profile (default: 10)', type=int)
+        arg_parse.add_argument('--profile-mem', default=False, dest='profile_mem',
+                               help='Trace the memory allocations of process() with --profile', action='store_true')
+        arg_parse.add_argument('--leak', default=None, metavar='MESSAGES',
+                               help='Process the given number of messages, repeating them, and report the memory '
+                                    'growth. The messages are not replaced', type=int)
+        arg_parse.add_argument('--leak-interval', default=1000, dest='leak_interval',
+                               help='Number of messages between the memory samples of --leak (default: 1000)', type=int)
+        arg_parse.add_argument('--leak-threshold', default=1.0, dest='leak_threshold',
+                               help='Growth in bytes per message considered as leak by --leak (default: 1.0)',
+                               type=float)
+        arg_parse.add_argument('--format', default='text', choices=['text', 'json'],
+                               help='Output format of --bench, --compare, --pipeline, --profile and --leak '
+                                    '(default: text)',
+                               type=str)
+        arg_parse.add_argument('--compare', default=None, metavar='BOT_ID',
+                               help='Compare the throughput and output of the bot against an other version of it',
+                               type=str)
+        arg_parse.add_argument('--against', default=None,
+                               help='Folder holding the package of the other version or a git reference of the '
+                                    'repository of the bot', type=str)
+        arg_parse.add_argument('--rounds', default=5,
+                               help='Number of runs per version for --compare (default: 5)', type=int)
+        arg_parse.add_argument('--ignore-keys', default=['time.observation'], nargs='*', dest='ignore_keys',
+                               help='Keys not compared by --compare (default: time.observation)', type=str)
         return arg_parse
 
     def start(self, args: Namespace) -> int:
         if self.config.output_folder:
-            self.fiddle_handler.init(self.get_all_bots(False), self.config)
+            compression = None if args.compression == 'none' else args.compression
+            self.fiddle_handler.init(
+                self.get_all_bots(False), self.config, compression, args.path, args.trusted, args.trusted_validate
+            )
+            if args.import_messages:
+                count = self.fiddle_handler.import_messages(args.import_messages)
+                print('Imported {} messages from {}'.format(count, args.import_messages))
+            if args.generate is not None:
+                with self.workspace.metrics.span('generate'):
+                    count = self.generate(args)
+                print('Generated {} messages into the path {}'.format(count, args.path))
             if args.fixes:
                 return self.fiddle_handler.print_configuration()
+            elif args.pipeline:
+                pipeline = self.get_pipeline(False) if self.config.version.startswith('2') else None
+                with self.workspace.metrics.span('pipeline'):
+                    hops = self.fiddle_handler.launch_pipeline(args.pipeline, self.get_runtime(), pipeline)
+                self.output_hops(hops, args.format)
+            elif args.compare:
+                return self.compare(args)
+            elif args.bot_id and args.profile:
+                with self.workspace.metrics.span('profile'):
+                    result = self.fiddle_handler.profile(
+                        args.bot_id, args.profile_slowest, args.profile_top, args.profile_mem, args.warmup
+                    )
+                self.output_profile(result, args.format)
+                self.output_paths(self.fiddle_handler.sent, self.fiddle_handler.dropped)
+            elif args.bot_id and args.leak:
+                with self.workspace.metrics.span('leak'):
+                    result = self.fiddle_handler.check_leaks(
+                        args.bot_id, args.leak, args.leak_interval, args.warmup, args.profile_top
+                    )
+                self.output_leaks(result, args.leak_threshold, args.format)
+                if result.is_leaking(args.leak_threshold):
+                    return 1
+            elif args.bot_id and args.bench:
+                with self.workspace.metrics.span('bench'):
+                    result = self.fiddle_handler.bench(args.bot_id, args.warmup)
+                self.output_bench(result, args.format)
+            elif args.bot_id and args.workers > 1:
+                results = self.fiddle_handler.launch_workers(args.bot_id, args.workers)
+                failed = self.output_workers(results)
+                paths = dict()
+                for result in results:
+                    for path, count in result.paths.items():
+                        paths[path] = paths.get(path, 0) + count
+                self.output_paths(paths, dict())
+                if failed:
+                    return 1
             elif args.bot_id:
                 bot_name = args.bot_id
                 self.fiddle_handler.launch_bot(bot_name)
-            else:
+                self.output_paths(self.fiddle_handler.sent, self.fiddle_handler.dropped)
+            elif not args.import_messages and not args.export_messages and args.generate is None:
                 raise IncorrectArgumentException()
+            if args.export_messages:
+                count = self.fiddle_handler.export_messages(args.export_messages)
+                print('Exported {} messages to {}'.format(count, args.export_messages))
+            return 0
         else:
             raise IntelMQToolException(
                 'Not output Folder Specified use with parameter --output_folder or specify it in config.'
             )
 
+    def generate(self, args: Namespace) -> int:
+        if args.import_messages or args.generate < 1:
+            raise IncorrectArgumentException()
+        classifications = None
+        if args.classifications:
+            classifications = dict()
+            for item in args.classifications:
+                classification, separator, weight = item.partition('=')
+                try:
+                    classifications[classification] = float(weight) if separator else 1.0
+                except ValueError:
+                    raise IntelMQToolException('Invalid weight in "{}", use TYPE=WEIGHT'.format(item))
+        messages = self.generator_handler.generate(
+            self.config.harmonization_conf_file, args.generate, args.seed, args.ip_ranges, args.fqdns, classifications
+        )
+        return self.fiddle_handler.write_messages(messages)
+
+    def compare(self, args: Namespace) -> int:
+        if not args.against:
+            raise IncorrectArgumentException()
+        if args.rounds < 1:
+            raise IntelMQToolException('The number of rounds must be at least 1')
+        bots = [bot for bot in self.get_all_bots(False) if bot.get_runtime_item_by_id(args.compare)]
+        if not bots:
+            raise IntelMQToolException('Cannot find Bot with ID "{}"'.format(args.compare))
+        with self.workspace.metrics.span('compare'):
+            result = self.compare_handler.compare(
+                self.config, bots[0], args.compare, args.against, args.rounds, args.warmup, args.ignore_keys,
+                args.path, args.trusted, args.trusted_validate
+            )
+        self.output_comparison(result, args.format)
+        if result.differences:
+            return 1
+        return 0
+
+    @staticmethod
+    def output_comparison(result: ComparisonResult, format_: str, limit: int = 20) -> None:
+        if format_ == 'json':
+            print(pretty_json(result.to_json()))
+            return
+        ratio, low, high = result.get_throughput_ratio()
+        base_latencies = result.get_latencies(result.base)
+        other_latencies = result.get_latencies(result.other)
+        shift = result.get_latency_shift()
+        print('Bot ID:        {}'.format(result.bot_id))
+        print('Base:          {}'.format(result.base[0].file_path))
+        print('Against:       {}'.format(result.other[0].file_path))
+        trusted = ', trusted' if result.trusted else ''
+        print('Rounds:        {} x {} messages of {}{}'.format(
+            len(result.base), result.base[0].messages, result.path, trusted
+        ))
+        interval = ' [{:.3f}, {:.3f}]'.format(low, high) if low is not None else ''
+        print('Throughput:    {:.1f} -> {:.1f} msg/s, ratio {:.3f}{}'.format(
+            result.get_throughput(result.base), result.get_throughput(result.other), ratio, interval
+        ))
+        for key, value in base_latencies.items():
+            text = '{:+.1f}%'.format(shift[key])
+            if shift[key] > 0:
+                text = colorize_text(text, 'Red')
+            print('Latency {:<5} {:.3f}ms -> {:.3f}ms ({})'.format(key + ':', value, other_latencies[key], text))
+        if not result.differences:
+            print(colorize_text('Output:        {} messages identical'.format(result.compared), 'Green'))
+            return
+        print(colorize_text('Output:        {} of {} messages differ'.format(
+            len(result.differences), result.compared
+        ), 'Red'))
+        for difference in result.differences[:limit]:
+            print('  #{:<6} {}'.format(difference.position, difference.description))
+        if len(result.differences) > limit:
+            print('  (+{} more)'.format(len(result.differences) - limit))
+
+    @staticmethod
+    def output_hops(hops: List[HopResult], format_: str) -> None:
+        if format_ == 'json':
+            print(pretty_json([hop.to_json() for hop in hops]))
+            return
+        width = max([len(hop.bot_id) for hop in hops] + [6])
+        print('{:<{}}  {:>9}  {:>9}  {:>7}  {:>7}  {:>9}  {:>7}'.format(
+            'Bot ID', width, 'Processed', 'Sent', 'Exited', 'Dropped', 'Seconds', 'ms/msg'
+        ))
+        for hop in hops:
+            print('{:<{}}  {:>9}  {:>9}  {:>7}  {:>7}  {:>9.3f}  {:>7.3f}'.format(
+                hop.bot_id, width, hop.processed, sum(hop.sent.values()), hop.exited, hop.dropped, hop.seconds,
+                hop.milliseconds_per_message
+            ))
+        print('\nRoutes:')
+        for hop in hops:
+            for route, count in hop.routes.items():
+                print('  {} {}: {}'.format(hop.bot_id, route, count))
+        print('\nProcessed {} messages in {:.3f}s'.format(
+            hops[0].processed if hops else 0, sum([hop.seconds for hop in hops])
+        ))
+
+    @staticmethod
+    def output_workers(results: List[ShardResult]) -> int:
+        # returns the number of failed workers
+        print('{:>6}  {:>17}  {:>9}  {:>7}  {:>8}  {}'.format(
+            'Worker', 'Messages', 'Processed', 'Sent', 'Seconds', 'Status'
+        ))
+        for result in results:
+            status = colorize_text('OK', 'Green')
+            if result.failed:
+                status = colorize_text('Failed at message {}: {}'.format(result.failed_position, result.error), 'Red')
+            print('{:>6}  {:>17}  {:>9}  {:>7}  {:>8.2f}  {}'.format(
+                result.number, '{}-{}'.format(result.start, result.stop - 1), result.processed, result.sent,
+                result.seconds, status
+            ))
+        failed = [result for result in results if result.failed]
+        if failed:
+            print('The {} messages not processed are kept in the path {}'.format(
+                sum([result.stop - result.failed_position for result in failed]), FiddleHandler.ERROR_PATH
+            ))
+        return len(failed)
+
+    @staticmethod
+    def output_paths(sent: Dict[str, int], dropped: Dict[str, int]) -> None:
+        paths = sorted(set(sent.keys()) | set(dropped.keys()))
+        if not paths:
+            print('No messages sent')
+            return
+        width = max([len(path) for path in paths] + [4])
+        print('{:<{}}  {:>9}  {:>7}'.format('Path', width, 'Sent', 'Dropped'))
+        for path in paths:
+            print('{:<{}}  {:>9}  {:>7}'.format(path, width, sent.get(path, 0), dropped.get(path, 0)))
+        others = [path for path in paths if path != FiddleHandler.DEFAULT_PATH and path in sent]
+        if others:
+            print('Use --path to process the messages of {}'.format(', '.join(others)))
+
+    @staticmethod
+    def output_profile(result: ProfileResult, format_: str) -> None:
+        if format_ == 'json':
+            print(pretty_json(result.to_json()))
+            return
+        total = result.profiled_seconds or 1.0
+        print('Bot ID:        {}'.format(result.bot_id))
+        print('Messages:      {} in {:.3f}s (warm-up {})'.format(result.messages, result.seconds, result.warmup))
+        print('Time split:')
+        for category in ProfileResult.CATEGORIES:
+            print('  {:<14} {:>9.3f}s  {:>5.1f}%'.format(
+                category, result.split.get(category, 0.0), result.split.get(category, 0.0) * 100.0 / total
+            ))
+        print('\nFunctions (top {} by own time):'.format(len(result.functions)))
+        print('  {:<13}  {:>9}  {:>9}  {:>10}  {}'.format('Category', 'Calls', 'Own', 'Cumulative', 'Function'))
+        for function in result.functions:
+            print('  {:<13}  {:>9}  {:>8.3f}s  {:>9.3f}s  {}'.format(
+                function.category, function.calls, function.seconds, function.cumulative, function.name
+            ))
+        print('\nSlowest messages:')
+        for number, message in enumerate(result.slowest):
+            allocated = ''
+            if message.allocated is not None:
+                allocated = '  {:.1f} KiB allocated'.format(message.allocated / 1024)
+            print('  #{:<7} {:>9.3f}ms{}  ({})'.format(
+                message.position, message.milliseconds, allocated, 'message-{}.json'.format(number)
+            ))
+        if result.memory_peak is not None:
+            print('\nMemory: current {:.1f} KiB, peak {:.1f} KiB'.format(
+                result.memory_current / 1024, result.memory_peak / 1024
+            ))
+            for site in result.allocation_sites:
+                print('  {}:{}: {:.1f} KiB in {} blocks'.format(
+                    site.file_name, site.line, site.size / 1024, site.count
+                ))
+        print('\nThe slowest messages are saved in {}, rerun them with --import-messages {}'.format(
+            result.folder, result.folder
+        ))
+        print('Statistics saved to {} (use python -m pstats {})'.format(result.stats_file, result.stats_file))
+
+    @staticmethod
+    def output_leaks(result: LeakResult, threshold: float, format_: str, limit: int = 20) -> None:
+        if format_ == 'json':
+            output = result.to_json()
+            output['leaking'] = result.is_leaking(threshold)
+            print(pretty_json(output))
+            return
+        print('Bot ID:        {}'.format(result.bot_id))
+        print('Messages:      {} after a warm-up of {} in {:.3f}s, {} loops over the messages'.format(
+            result.messages, result.warmup, result.seconds, result.loops
+        ))
+        # at most limit samples are printed, evenly spread
+        step = max(1, -(-len(result.samples) // limit))
+        print('{:>10}  {:>14}  {:>14}'.format('Messages', 'Traced KiB', 'RSS KiB'))
+        for sample in result.samples[::step]:
+            print('{:>10}  {:>14.1f}  {:>14}'.format(
+                sample.messages, sample.traced / 1024, '{:.1f}'.format(sample.rss / 1024) if sample.rss else '-'
+            ))
+        for name, rss in [('Traced', False), ('RSS', True)]:
+            slope, r2 = result.get_trend(rss)
+            print('{:<14} {:+.2f} bytes/message (r2 {:.3f}), {:+.1f} MiB per million messages'.format(
+                name + ' trend:', slope, r2, slope / 1.024 / 1.024
+            ))
+        if result.sites:
+            print('\nAllocation sites never shrinking and growing in at least half of the intervals:')
+            for site in result.sites:
+                print('  {}:{}: {:+.1f} KiB, {:.2f} bytes/message, {} blocks'.format(
+                    site.file_name, site.line, site.growth / 1024, site.slope, site.count
+                ))
+        if result.is_leaking(threshold):
+            print(colorize_text('Memory grows by more than {} bytes/message'.format(threshold), 'Red'))
+        else:
+            print(colorize_text('No memory growth above {} bytes/message'.format(threshold), 'Green'))
+
+    @staticmethod
+    def output_bench(result: BenchResult, format_: str) -> None:
+        if format_ == 'json':
+            print(pretty_json(result.to_json()))
+            return
+        cpu = result.cpu_ns or 1
+        print('Bot ID:        {}'.format(result.bot_id))
+        print('Messages:      {} (warm-up {}), {} sent'.format(result.messages, result.warmup, result.sent))
+        print('Duration:      {:.3f}s'.format(result.seconds))
+        print('Throughput:    {:.1f} msg/s'.format(result.throughput))
+        print('Latency:       {}'.format('  '.join(
+            '{} {:.3f}ms'.format(key, value) for key, value in result.get_latencies().items()
+        )))
+        print('CPU bot:       {:.3f}s ({:.1f}%)'.format(result.bot_cpu_ns / 1e9, result.bot_cpu_ns * 100.0 / cpu))
+        print('CPU fiddler:   {:.3f}s ({:.1f}%)'.format(
+            result.fiddler_cpu_ns / 1e9, result.fiddler_cpu_ns * 100.0 / cpu
+        ))
@@ -10,13 +10,14 @@ __copyright__ = 'Copyright 2019-present, Restena CSIRT'
 __license__ = 'GPL v3+'
 
 from argparse import ArgumentParser, Namespace
-from os import remove
+from logging import Logger
 from os.path import join
 from typing import Optional, List, Union
 
 from intelmqworkbench import IntelMQToolException
 from intelmqworkbench.abstractbasetool import AbstractBaseTool
 from intelmqworkbench.classes.bots.bots import BOTS
+from intelmqworkbench.classes.intelmqworkbenchconfig import IntelMQWorkbenchConfig
 from intelmqworkbench.classes.issues.intelmqbotinstallissue import IntelMQBotInstallIssue
 from intelmqworkbench.classes.issues.intelmqbotissue import IntelMQBotIssue
 from intelmqworkbench.classes.issues.intelmqbotsissue import IntelMQBotsIssue
@@ -31,11 +32,16 @@ from intelmqworkbench.utils import colorize_text, query_yes_no
 
 class Fixer(AbstractBaseTool):
 
+    def __init__(self, logger: Logger, config: IntelMQWorkbenchConfig):
+        super().__init__(logger, config)
+        # if set the fixes are only listed
+        self.plan = False
+
     def get_default_argument_description(self) -> Optional[str]:
         return 'The same as -i'
 
     def get_version(self) -> str:
-        return '0.3'
+        return '0.4'
 
     def get_arg_parser(self) -> ArgumentParser:
         arg_parse = ArgumentParser(prog='fix', description='Tool for fixing bot configurations')
@@ -46,10 +52,44 @@ class Fixer(AbstractBaseTool):
         arg_parse.add_argument('-i', '--issues', default=False,
                                help='Fix the detected issues.',
                                action='store_true')
+        arg_parse.add_argument('--plan', default=False,
+                               help='Dry run, lists the fixes and the files they would change without writing them',
+                               action='store_true')
         arg_parse.add_argument('--force', default=False, help='Force', action='store_true')
         return arg_parse
 
+    def confirm(self, question: str, default: str = 'yes') -> bool:
+        if self.plan:
+            print('{} {}'.format(colorize_text('Plan:', 'Yellow'), question))
+            return True
+        return query_yes_no(question, default=default)
+
+    def print_fixed(self) -> None:
+        if self.plan:
+            print(colorize_text('Planned', 'Yellow'))
+        else:
+            print(colorize_text('Fixed', 'Green'))
+
     def start(self, args: Namespace) -> int:
+        self.plan = args.plan
+        if not self.plan:
+            return self.fix(args)
+        if self.output_handler.pending:
+            raise IntelMQToolException('There are pending writes, commit them before planning')
+        # every fix is accepted but only recorded, afterwards the changes done in memory are dropped
+        self.output_handler.defer_writes = True
+        try:
+            exit_code = self.fix(args)
+            planned = self.output_handler.discard()
+        finally:
+            self.output_handler.defer_writes = False
+            self.workspace.invalidate()
+        print('\n{} files would be changed:'.format(len(planned)))
+        for path in planned:
+            print('  {}'.format(path))
+        return exit_code
+
+    def fix(self, args: Namespace) -> int:
         force = args.force
         issues = self.get_issues(force)
         bots_conf = self.get_running_bots(force)
@@ -106,15 +146,15 @@ class Fixer(AbstractBaseTool):
                 if auto:
                     do_fix = True
                 else:
-                    do_fix = query_yes_no(
+                    do_fix = self.confirm(
                         'Do you want to remove the executable "{}" from {}'.format(issue.file_name, issue.path)
                     )
                 if do_fix:
-                    print(colorize_text('Fixed', 'Green'))
-                    remove(join(issue.path, issue.file_name))
+                    self.print_fixed()
+                    self.output_handler.remove_path(join(issue.path, issue.file_name))
             elif isinstance(issue, ReferenceIssue):
                 self.output_handler.print_issue(issue)
-                do_fix = query_yes_no(
+                do_fix = self.confirm(
                     'Do you want to remove the reference "{}" from {}'.format(issue.reference, issue.location),
                     default='no'
                 )
@@ -133,16 +173,16 @@ class Fixer(AbstractBaseTool):
                         raise IntelMQToolException('Unknown location')
 
                     if result:
-                        print(colorize_text('Fixed', 'Green'))
+                        self.print_fixed()
 
             elif isinstance(issue, NotInstalledIssue):
                 self.output_handler.print_issue(issue)
-                do_fix = query_yes_no(
+                do_fix = self.confirm(
                     'Do you want to install Bot "{}" ({})'.format(issue.bot.name, issue.bot.module),
                     default='no'
                 )
                 if do_fix:
-                    print(colorize_text('Fixed', 'Green'))
+                    self.print_fixed()
                     self.output_handler.install_bot(issue.bot, self.config.bin_folder, self.config.bot_folder, bots)
 
             else:
@@ -155,11 +195,11 @@ class Fixer(AbstractBaseTool):
             for issue in item.issues:
                 if isinstance(issue, MismatchIssue):
                     self.output_handler.print_issue(issue)
-                    do_fix = query_yes_no('Do you want to set the value "{}" to key "{}"'.format(
+                    do_fix = self.confirm('Do you want to set the value "{}" to key "{}"'.format(
                         issue.should_value, issue.key)
                     )
                     if do_fix:
-                        print(colorize_text('Fixed', 'Green'))
+                        self.print_fixed()
                         setattr(runtime_item, issue.key, issue.should_value)
                 elif isinstance(issue, MissingIssue):
                     raise NotImplementedError()
@@ -170,44 +210,44 @@ class Fixer(AbstractBaseTool):
             for issue in item.parameter_issues:
                 if isinstance(issue, MismatchIssue):
                     self.output_handler.print_issue(issue)
-                    do_fix = query_yes_no('Do you want to set the value "{}" to key "{}"'.format(
+                    do_fix = self.confirm('Do you want to set the value "{}" to key "{}"'.format(
                         issue.should_value, issue.key)
                     )
                     if do_fix:
-                        print(colorize_text('Fixed', 'Green'))
+                        self.print_fixed()
                         runtime_item.parameters.set_value(issue.key, issue.should_value)
                 elif isinstance(issue, MissingIssue):
                     self.output_handler.print_issue(issue)
                     if auto:
                         do_fix = True
                     else:
-                        do_fix = query_yes_no('Do you want to add the key "{}" with value "{}"'.format(
+                        do_fix = self.confirm('Do you want to add the key "{}" with value "{}"'.format(
                             issue.key, issue.default_value)
                         )
                     if do_fix:
-                        print(colorize_text('Fixed', 'Green'))
+                        self.print_fixed()
                         runtime_item.parameters.add_value(issue.key, issue.default_value)
                 elif isinstance(issue, AdditionalIssue):
                     self.output_handler.print_issue(issue)
                     if auto:
                         do_fix = True
                     else:
-                        do_fix = query_yes_no('Do you want to add the key "{}" with value "{}"'.format(
+                        do_fix = self.confirm('Do you want to add the key "{}" with value "{}"'.format(
                             issue.key, issue.value)
                         )
                     if do_fix:
-                        print(colorize_text('Fixed', 'Green'))
+                        self.print_fixed()
                         runtime_item.parameters.add_value(issue.key, issue.value)
                 elif isinstance(issue, AbsentIssue):
                     self.output_handler.print_issue(issue)
                     if auto:
                         do_fix = True
                     else:
-                        do_fix = query_yes_no('Do you want to remove the key "{}" with value "{}"'.format(
+                        do_fix = self.confirm('Do you want to remove the key "{}" with value "{}"'.format(
                             issue.key, issue.default_value)
                         )
                     if do_fix:
-                        print(colorize_text('Fixed', 'Green'))
+                        self.print_fixed()
                         runtime_item.parameters.remove_key(issue.key)
                 else:
                     raise IntelMQToolException('Issue is not known. Stopping')
@@ -235,12 +275,12 @@ class Fixer(AbstractBaseTool):
                 if auto:
                     do_fix = True
                 else:
-                    do_fix = query_yes_no(
+                    do_fix = self.confirm(
                         'Do you want to sync install of bot "{}" ({})'.format(issue.bot.class_name, issue.bot.module),
                         default='yes'
                     )
                 if do_fix:
-                    print(colorize_text('Fixed', 'Green'))
+                    self.print_fixed()
                     self.output_handler.sync_folders(issue.source, issue.destination)
 
             elif isinstance(issue, MissingExecutable):
@@ -248,12 +288,12 @@ class Fixer(AbstractBaseTool):
                 if auto:
                     do_fix = True
                 else:
-                    do_fix = query_yes_no(
+                    do_fix = self.confirm(
                         'Do you want to create executable {}'.format(join(issue.path, issue.file_name)),
                         default='yes'
                     )
                 if do_fix:
-                    print(colorize_text('Fixed', 'Green'))
+                    self.print_fixed()
                     self.output_handler.create_executable(issue.bot, self.config.bin_folder)
             elif isinstance(issue, MissingDefaultConfigurationIssue):
                 message = '{}: Cannot fix {} -> Skipping as manual action required.'.format(colorize_text('Major Issue', 'Red'), issue.description)
@@ -270,11 +310,11 @@ class Fixer(AbstractBaseTool):
         for issue in issues.issues:
             if isinstance(issue, MismatchIssue):
                 self.output_handler.print_issue(issue)
-                do_fix = query_yes_no('Do you want to set the value "{}" to key "{}"'.format(
+                do_fix = self.confirm('Do you want to set the value "{}" to key "{}"'.format(
                     issue.should_value, issue.key)
                 )
                 if do_fix:
-                    print(colorize_text('Fixed', 'Green'))
+                    self.print_fixed()
                     setattr(bots_item, issue.key, issue.should_value)
             elif isinstance(issue, MissingIssue):
                 raise NotImplementedError()
@@ -285,44 +325,44 @@ class Fixer(AbstractBaseTool):
         for issue in issues.parameter_issues:
             if isinstance(issue, MismatchIssue):
                 self.output_handler.print_issue(issue)
-                do_fix = query_yes_no('Do you want to set the value "{}" to key "{}"'.format(
+                do_fix = self.confirm('Do you want to set the value "{}" to key "{}"'.format(
                     issue.should_value, issue.key)
                 )
                 if do_fix:
-                    print(colorize_text('Fixed', 'Green'))
+                    self.print_fixed()
                     bots_item.parameters.set_value(issue.key, issue.should_value)
             elif isinstance(issue, MissingIssue):
                 self.output_handler.print_issue(issue)
                 if auto:
                     do_fix = True
                 else:
-                    do_fix = query_yes_no('Do you want to add the key "{}" with value "{}"'.format(
+                    do_fix = self.confirm('Do you want to add the key "{}" with value "{}"'.format(
                         issue.key, issue.default_value)
                     )
                 if do_fix:
-                    print(colorize_text('Fixed', 'Green'))
+                    self.print_fixed()
                     bots_item.parameters.add_value(issue.key, issue.default_value)
             elif isinstance(issue, AdditionalIssue):
                 self.output_handler.print_issue(issue)
                 if auto:
                     do_fix = True
                 else:
-                    do_fix = query_yes_no('Do you want to add the key "{}" with value "{}"'.format(
+                    do_fix = self.confirm('Do you want to add the key "{}" with value "{}"'.format(
                         issue.key, issue.value)
                     )
                 if do_fix:
-                    print(colorize_text('Fixed', 'Green'))
+                    self.print_fixed()
                     bots_item.parameters.add_value(issue.key, issue.value)
             elif isinstance(issue, AbsentIssue):
                 self.output_handler.print_issue(issue)
                 if auto:
                     do_fix = True
                 else:
-                    do_fix = query_yes_no('Do you want to remove the key "{}" with value "{}"'.format(
+                    do_fix = self.confirm('Do you want to remove the key "{}" with value "{}"'.format(
                         issue.key, issue.default_value)
                     )
                 if do_fix:
-                    print(colorize_text('Fixed', 'Green'))
+                    self.print_fixed()
                     bots_item.parameters.remove_key(issue.key)
             else:
                 raise IntelMQToolException('Issue is not known. Stopping')
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+from argparse import ArgumentParser, Namespace
+from logging import Logger
+from os.path import isfile
+from time import perf_counter
+from typing import List, Optional
+
+from intelmqworkbench import AbstractBaseTool, IncorrectArgumentException, IntelMQToolException
+from intelmqworkbench.classes.fleetresult import FleetResult
+from intelmqworkbench.classes.intelmqworkbenchconfig import IntelMQWorkbenchConfig
+from intelmqworkbench.fleethandler import FleetHandler
+from intelmqworkbench.recordhandler import RecordHandler
+from intelmqworkbench.utils import colorize_text
+
+
+class Fleet(AbstractBaseTool):
+
+    def __init__(self, logger: Logger, config: IntelMQWorkbenchConfig):
+        super().__init__(logger, config)
+        self.fleet_handler = FleetHandler(logger)
+        self.record_handler = RecordHandler(logger)
+
+    def get_default_argument_description(self) -> Optional[str]:
+        return None
+
+    def get_version(self) -> str:
+        return '0.1'
+
+    def get_arg_parser(self) -> ArgumentParser:
+        arg_parse = ArgumentParser(prog='fleet', description='Checks many mirrored IntelMQ roots in parallel')
+        arg_parse.add_argument('roots', nargs='*',
+                               help='Roots of the mirrored installations, used as fake root', type=str)
+        arg_parse.add_argument('-r', '--roots-file', default=None, dest='roots_file',
+                               help='File with one root per line', type=str)
+        arg_parse.add_argument('-w', '--workers', default=None,
+                               help='Number of processes (default: number of cores)', type=int)
+        arg_parse.add_argument('--format', default='text', choices=RecordHandler.FORMATS,
+                               help='Output format, jsonl/json/csv write one record per root (default: text)',
+                               type=str)
+        arg_parse.add_argument('--force', default=False, help='Force', action='store_true')
+        return arg_parse
+
+    def get_roots(self, args: Namespace) -> List[str]:
+        roots = list(args.roots)
+        if args.roots_file:
+            if not isfile(args.roots_file):
+                raise IntelMQToolException('File "{}" does not exist'.format(args.roots_file))
+            roots = roots + self.fleet_handler.read_roots(args.roots_file)
+        if not roots:
+            raise IncorrectArgumentException()
+        # every root is checked once
+        return list(dict.fromkeys(roots))
+
+    def start(self, args: Namespace) -> int:
+        roots = self.get_roots(args)
+        started = perf_counter()
+        discovered = self.fleet_handler.prepare(self.config, roots)
+        self.logger.info('Discovered {} distinct bot trees'.format(discovered))
+        if args.format == 'text':
+            results = self.fleet_handler.check(self.config, roots, args.force, args.workers)
+            self.output(results, perf_counter() - started)
+        else:
+            self.record_handler.start(args.format, RecordHandler.FLEET_FIELDS)
+            # the records are written as the roots finish
+            results = self.fleet_handler.check(
+                self.config, roots, args.force, args.workers,
+                lambda result: self.record_handler.write(result.to_json())
+            )
+            self.record_handler.finish()
+        self.workspace.metrics.set_counter('roots', len(roots))
+        if [result for result in results if result.error]:
+            return 1
+        return 0
+
+    def output(self, results: List[FleetResult], seconds: float) -> int:
+        width = max([len(result.root) for result in results] + [4])
+        checks = ['bots', 'runtime', 'strange']
+        print('{:<{}}  {:>6}  {:>9}  {:>6}  {:>7}  {:>7}  {:>7}  {:>7}'.format(
+            'Root', width, 'Bots', 'Instances', 'Issues', *checks, 'Seconds'
+        ))
+        for result in results:
+            if result.error:
+                print('{:<{}}  {}'.format(result.root, width, colorize_text(result.error, 'Red')))
+                continue
+            print('{:<{}}  {:>6}  {:>9}  {:>6}  {:>7}  {:>7}  {:>7}  {:>7.2f}'.format(
+                result.root, width, result.bots, result.instances, result.issues,
+                *[result.checks.get(check, 0) for check in checks], result.seconds
+            ))
+        issue_types = self.fleet_handler.get_issue_types(results)
+        if issue_types:
+            print('\n{:<32}  {:>7}  {:>6}'.format('Issue Type', 'Issues', 'Roots'))
+            for type_, count, roots in issue_types:
+                print('{:<32}  {:>7}  {:>6}'.format(type_, count, roots))
+        failed = len([result for result in results if result.error])
+        print('\nChecked {} roots in {:.2f}s{}'.format(
+            len(results), seconds, colorize_text(', {} failed'.format(failed), 'Red') if failed else ''
+        ))
+        return 0
@@ -10,20 +10,27 @@ __copyright__ = 'Copyright 2019-present, Restena CSIRT'
 __license__ = 'GPL v3+'
 
 from argparse import ArgumentParser, Namespace
+from logging import Logger
 from typing import List, Optional, Union
 
 from intelmqworkbench import AbstractBaseTool, IncorrectArgumentException
 from intelmqworkbench.classes.intelmqbot import IntelMQBot
+from intelmqworkbench.classes.intelmqworkbenchconfig import IntelMQWorkbenchConfig
 from intelmqworkbench.classes.issues.intelmqbotinstallissue import IntelMQBotInstallIssue
 from intelmqworkbench.classes.issues.intelmqbotissue import IntelMQBotIssue
 from intelmqworkbench.classes.issues.issues import MissingExecutable, MissingDefaultConfigurationIssue, \
     MissingDescriptionIssue
+from intelmqworkbench.recordhandler import RecordHandler
 
 
 class Lister(AbstractBaseTool):
 
+    def __init__(self, logger: Logger, config: IntelMQWorkbenchConfig):
+        super().__init__(logger, config)
+        self.record_handler = RecordHandler(logger)
+
     def get_version(self) -> str:
-        return '0.3'
+        return '0.4'
 
     def get_arg_parser(self) -> ArgumentParser:
         arg_parse = ArgumentParser(prog='list', description='Lists bots')
@@ -34,10 +41,14 @@ class Lister(AbstractBaseTool):
                                default=False, help='List all not installed BOTS', action='store_true')
         arg_parse.add_argument('-a', '--all', default=False, help='List all BOTS', action='store_true')
         arg_parse.add_argument('-s', '--strange', default=False, help='List strange BOTS', action='store_true')
+        arg_parse.add_argument('--format', default='text', choices=RecordHandler.FORMATS,
+                               help='Output format, jsonl/json/csv write one record per bot (default: text)',
+                               type=str)
         arg_parse.add_argument('--force', default=False, help='Force', action='store_true')
         return arg_parse
 
     def start(self, args: Namespace) -> int:
+        self.record_handler.format = args.format
         strange_bots = self.get_strange_bots(args)
         force = args.force
         if args.installed:
@@ -105,18 +116,26 @@ class Lister(AbstractBaseTool):
         internal_strange_bots = strange_bots
         if internal_strange_bots is None:
             internal_strange_bots = []
-        if len(bots) > 0:
+        if not self.record_handler.is_text:
+            self.record_handler.start(self.record_handler.format, RecordHandler.BOT_FIELDS)
+            strange_modules = set(strange_bot.module for strange_bot in internal_strange_bots)
             for bot in bots:
-                strange = False
-                for strange_bot in internal_strange_bots:
-                    if bot.module == strange_bot.module:
-                        strange = True
-                        break
-
-                self.output_handler.print_bot_detail(bot, full, strange)
-                print()
-        else:
-            print('No bots found')
+                self.record_handler.write(RecordHandler.get_bot_record(bot, bot.module in strange_modules))
+            self.record_handler.finish()
+            return 0
+        with self.workspace.metrics.span('rendering'):
+            if len(bots) > 0:
+                for bot in bots:
+                    strange = False
+                    for strange_bot in internal_strange_bots:
+                        if bot.module == strange_bot.module:
+                            strange = True
+                            break
+
+                    self.output_handler.print_bot_detail(bot, full, strange)
+                    print()
+            else:
+                print('No bots found')
 
         return 0
 
@@ -126,28 +145,47 @@ class Lister(AbstractBaseTool):
             issues: List[Union[IntelMQBotIssue, IntelMQBotInstallIssue]],
             full: bool
     ) -> int:
-        if bots:
-            for bot in bots:
-                self.output_handler.print_bot_detail(bot, full, True)
-                # get issue of bot
-                print('Issues Detected:')
-                for issue in issues:
-                    if isinstance(issue, IntelMQBotIssue):
-                        if issue.bot.module == bot.module:
-                            for item in issue.issues:
-                                if isinstance(item,
-                                              (
-                                                      MissingExecutable,
-                                                      MissingDefaultConfigurationIssue,
-                                                      MissingDescriptionIssue
-                                              )
-                                              ):
-                                    self.output_handler.print_issue(item)
-                print()
-        else:
-            print('No Strange Bots detected')
+        if not self.record_handler.is_text:
+            self.record_handler.start(self.record_handler.format, RecordHandler.BOT_FIELDS)
+            for bot in bots or []:
+                self.record_handler.write(
+                    RecordHandler.get_bot_record(bot, True, self.get_strange_issues(bot, issues))
+                )
+            self.record_handler.finish()
+            return 0
+        with self.workspace.metrics.span('rendering'):
+            if bots:
+                for bot in bots:
+                    self.output_handler.print_bot_detail(bot, full, True)
+                    # get issue of bot
+                    print('Issues Detected:')
+                    for item in self.get_strange_issues(bot, issues):
+                        self.output_handler.print_issue(item)
+                    print()
+            else:
+                print('No Strange Bots detected')
         return 0
 
+    @staticmethod
+    def get_strange_issues(
+            bot: IntelMQBot,
+            issues: List[Union[IntelMQBotIssue, IntelMQBotInstallIssue]]
+    ) -> List[Union[MissingExecutable, MissingDefaultConfigurationIssue, MissingDescriptionIssue]]:
+        output = list()
+        for issue in issues:
+            if isinstance(issue, IntelMQBotIssue):
+                if issue.bot.module == bot.module:
+                    for item in issue.issues:
+                        if isinstance(item,
+                                      (
+                                              MissingExecutable,
+                                              MissingDefaultConfigurationIssue,
+                                              MissingDescriptionIssue
+                                      )
+                                      ):
+                            output.append(item)
+        return output
+
     def get_default_argument_description(self) -> Optional[str]:
         return None
 
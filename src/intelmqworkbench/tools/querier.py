@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+from argparse import ArgumentParser, Namespace
+from logging import Logger
+from typing import List, Optional
+
+from intelmqworkbench import AbstractBaseTool
+from intelmqworkbench.classes.intelmqworkbenchconfig import IntelMQWorkbenchConfig
+from intelmqworkbench.classes.query.queryindex import QueryIndex
+from intelmqworkbench.classes.query.queryrecord import QueryRecord
+from intelmqworkbench.queryhandler import QueryHandler
+from intelmqworkbench.recordhandler import RecordHandler
+
+
+class Querier(AbstractBaseTool):
+
+    def __init__(self, logger: Logger, config: IntelMQWorkbenchConfig):
+        super().__init__(logger, config)
+        self.query_handler = QueryHandler(logger)
+        self.record_handler = RecordHandler(logger)
+
+    def get_default_argument_description(self) -> Optional[str]:
+        return None
+
+    def get_version(self) -> str:
+        return '0.1'
+
+    def get_arg_parser(self) -> ArgumentParser:
+        arg_parse = ArgumentParser(prog='query', description='Filters bots and runtime instances by an expression')
+        arg_parse.add_argument('expression',
+                               help='Filter e.g. \'group = Collector and param.rate_limit < 600\' or '
+                                    '\'module = "intelmq.bots.experts.url.expert" and '
+                                    'param.http_timeout_sec != default\'',
+                               type=str)
+        arg_parse.add_argument('-b', '--bots', default=False,
+                               help='Query the bots instead of their runtime instances', action='store_true')
+        arg_parse.add_argument('-l', '--limit', default=None, help='Maximum number of results', type=int)
+        arg_parse.add_argument('--count', default=False, help='Only print the number of results', action='store_true')
+        arg_parse.add_argument('--format', default='text', choices=RecordHandler.FORMATS,
+                               help='Output format, jsonl/json/csv write one record per result (default: text)',
+                               type=str)
+        arg_parse.add_argument('--force', default=False, help='Force', action='store_true')
+        return arg_parse
+
+    def start(self, args: Namespace) -> int:
+        # compiled before anything is loaded, an invalid query fails fast
+        expression = self.query_handler.compile(args.expression)
+        index = self.get_query_index(args.force, not args.bots)
+        with self.workspace.metrics.span('query'):
+            records = self.query_handler.execute(index, expression, args.limit)
+        if args.count:
+            print(len(records))
+            return 0
+        if args.format != 'text':
+            return self.output_records(args.format, records)
+        return self.output(records, index, args.full)
+
+    def output_records(self, format_: str, records: List[QueryRecord]) -> int:
+        self.record_handler.start(format_, RecordHandler.QUERY_FIELDS)
+        for record in records:
+            self.record_handler.write(record.to_json())
+        self.record_handler.finish()
+        return 0
+
+    def output(self, records: List[QueryRecord], index: QueryIndex, full: bool) -> int:
+        with self.workspace.metrics.span('rendering'):
+            for record in records:
+                self.output_handler.print_query_record(record, full)
+            print('{} of {} {} match'.format(len(records), len(index), 'instances' if index.instances else 'bots'))
+        return 0
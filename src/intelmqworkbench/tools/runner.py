@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import shlex
+import sys
+from argparse import ArgumentParser, Namespace
+from os.path import isfile
+from time import perf_counter
+from typing import List, Optional, Tuple, TextIO
+
+from intelmqworkbench import AbstractBaseTool, IntelMQToolException
+from intelmqworkbench.utils import colorize_text
+
+
+class Runner(AbstractBaseTool):
+
+    COMMIT = 'commit'
+    # tools which cannot be part of a script
+    EXCLUDED_TOOLS = ['run', 'shell', 'daemon']
+    # tools asking questions and the options with which they do not
+    INTERACTIVE_TOOLS = {'fix': ['-a', '--auto', '--plan']}
+
+    def get_default_argument_description(self) -> Optional[str]:
+        return None
+
+    def get_version(self) -> str:
+        return '0.1'
+
+    def get_arg_parser(self) -> ArgumentParser:
+        arg_parse = ArgumentParser(prog='run', description='Runs the commands of a script in one process')
+        arg_parse.add_argument('script', nargs='?', default='-',
+                               help='File containing one command per line or separated by ";" '
+                                    '(default: - for stdin)',
+                               type=str)
+        arg_parse.add_argument('--keep-going', default=False, dest='keep_going',
+                               help='Continue after a failing command, by default the pending writes are discarded '
+                                    'and the script is stopped',
+                               action='store_true')
+        return arg_parse
+
+    @staticmethod
+    def parse_script(stream: TextIO) -> List[Tuple[int, List[str]]]:
+        # (line number, arguments) per command, "#" starts a comment
+        output = list()
+        for number, line in enumerate(stream, start=1):
+            lexer = shlex.shlex(line, posix=True, punctuation_chars=';')
+            lexer.whitespace_split = True
+            lexer.commenters = '#'
+            try:
+                tokens = list(lexer)
+            except ValueError as error:
+                raise IntelMQToolException('Line {}: {}'.format(number, error))
+            argv = list()
+            for token in tokens + [';']:
+                if token == ';':
+                    if argv:
+                        output.append((number, argv))
+                    argv = list()
+                else:
+                    argv.append(token)
+        return output
+
+    def read_script(self, script: str) -> List[Tuple[int, List[str]]]:
+        if script == '-':
+            return self.parse_script(sys.stdin)
+        if not isfile(script):
+            raise IntelMQToolException('Script "{}" does not exist'.format(script))
+        with open(script, 'r') as f:
+            return self.parse_script(f)
+
+    @staticmethod
+    def check_interactive(steps: List[Tuple[int, List[str]]]) -> None:
+        # a script read from stdin has consumed it, nobody is left to answer the questions
+        for number, argv in steps:
+            options = Runner.INTERACTIVE_TOOLS.get(argv[0])
+            if options is not None and not any(option in argv for option in options):
+                raise IntelMQToolException(
+                    'Line {}: "{}" asks questions which cannot be answered when the script is read from stdin. '
+                    'Use {} or a script file'.format(number, ' '.join(argv), ' or '.join(options))
+                )
+
+    def commit(self) -> int:
+        written = self.output_handler.commit()
+        print('Committed {} writes'.format(len(written)))
+        for path in written:
+            self.logger.debug('Written {}'.format(path))
+        # the written files are read again by the next command
+        self.workspace.refresh()
+        return 0
+
+    def run_step(self, argv: List[str]) -> int:
+        if argv == [Runner.COMMIT]:
+            return self.commit()
+        if argv[0] in Runner.EXCLUDED_TOOLS:
+            print('Command "{}" cannot be run inside a script'.format(argv[0]))
+            return -3
+        # the workspace is kept on errors, the pending writes still refer to it
+        exit_code = self.tool_factory.execute(argv, invalidate=False)
+        if self.output_handler.pending:
+            # the configurations changed in memory only, the issues have to be determined again
+            self.workspace.invalidate(['issues'])
+        else:
+            self.workspace.refresh()
+        return exit_code
+
+    def start(self, args: Namespace) -> int:
+        steps = self.read_script(args.script)
+        if not steps:
+            print('No commands found')
+            return 0
+        if args.script == '-':
+            self.check_interactive(steps)
+        results: List[Tuple[int, List[str], Optional[int], float]] = list()
+        failed = False
+        self.output_handler.defer_writes = True
+        try:
+            for number, argv in steps:
+                if failed and not args.keep_going:
+                    results.append((number, argv, None, 0.0))
+                    continue
+                print(colorize_text('>>> {}'.format(' '.join(argv)), 'Bold'))
+                started = perf_counter()
+                exit_code = self.run_step(argv)
+                results.append((number, argv, exit_code, perf_counter() - started))
+                if exit_code != 0:
+                    failed = True
+            if failed and not args.keep_going:
+                discarded = self.output_handler.discard()
+                print(colorize_text('Discarded {} pending writes'.format(len(discarded)), 'Red'))
+                self.workspace.invalidate()
+            elif self.output_handler.pending:
+                self.commit()
+        finally:
+            self.output_handler.defer_writes = False
+        self.print_summary(results)
+        return 1 if failed else 0
+
+    @staticmethod
+    def print_summary(results: List[Tuple[int, List[str], Optional[int], float]]) -> None:
+        print()
+        print('{:>5}  {:>9}  {:>9}  {}'.format('Line', 'Exit', 'Seconds', 'Command'))
+        for number, argv, exit_code, seconds in results:
+            if exit_code is None:
+                status = colorize_text('{:>9}'.format('skipped'), 'Yellow')
+            elif exit_code == 0:
+                status = colorize_text('{:>9}'.format(exit_code), 'Green')
+            else:
+                status = colorize_text('{:>9}'.format(exit_code), 'Red')
+            print('{:>5}  {}  {:>9.3f}  {}'.format(number, status, seconds, ' '.join(argv)))
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+from argparse import ArgumentParser, Namespace
+from os.path import expanduser, join
+from typing import Optional
+
+from intelmqworkbench import AbstractBaseTool
+from intelmqworkbench.shellhandler import WorkbenchShell
+
+
+class Shell(AbstractBaseTool):
+
+    DEFAULT_HISTORY = join(expanduser('~'), '.intelmq_workbench_history')
+
+    def get_default_argument_description(self) -> Optional[str]:
+        return None
+
+    def get_version(self) -> str:
+        return '0.1'
+
+    def get_arg_parser(self) -> ArgumentParser:
+        arg_parse = ArgumentParser(prog='shell',
+                                   description='Interactive shell running the tools on one loaded workspace')
+        arg_parse.add_argument('--history', default=Shell.DEFAULT_HISTORY,
+                               help='File of the command history (default: {})'.format(Shell.DEFAULT_HISTORY),
+                               type=str)
+        arg_parse.add_argument('--no-history', default=False, dest='no_history',
+                               help='Do not read nor write the command history',
+                               action='store_true')
+        return arg_parse
+
+    def start(self, args: Namespace) -> int:
+        history_file = None if args.no_history else args.history
+        shell = WorkbenchShell(self.logger, self.tool_factory, history_file)
+        return shell.loop()
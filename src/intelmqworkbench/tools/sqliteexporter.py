@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import time
+from argparse import ArgumentParser, Namespace
+from logging import Logger
+from typing import Iterator, Optional, Tuple
+
+from intelmqworkbench import AbstractBaseTool
+from intelmqworkbench.classes.intelmqbot import IntelMQBot
+from intelmqworkbench.classes.intelmqworkbenchconfig import IntelMQWorkbenchConfig
+from intelmqworkbench.classes.issues import Issue
+from intelmqworkbench.sqlitehandler import SQLiteHandler
+from intelmqworkbench.tools.checker import Checker
+
+
+class SQLiteExporter(AbstractBaseTool):
+
+    def __init__(self, logger: Logger, config: IntelMQWorkbenchConfig):
+        super().__init__(logger, config)
+        self.sqlite_handler = SQLiteHandler(logger)
+
+    def get_default_argument_description(self) -> Optional[str]:
+        return None
+
+    def get_version(self) -> str:
+        return '0.1'
+
+    def get_arg_parser(self) -> ArgumentParser:
+        arg_parse = ArgumentParser(prog='export-sqlite',
+                                   description='Writes bots, instances, parameters, BOTS, pipeline and issues into '
+                                               'a SQLite database')
+        arg_parse.add_argument('database', help='SQLite file, created if it does not exist', type=str)
+        arg_parse.add_argument('--full-refresh', default=False, dest='full_refresh',
+                               help='Rewrite all rows instead of only the changed ones', action='store_true')
+        arg_parse.add_argument('--force', default=False, help='Force', action='store_true')
+        return arg_parse
+
+    def iter_issues(self, force: bool) -> Iterator[Tuple[str, Optional[IntelMQBot], Optional[str], Issue]]:
+        # the same issues as check reports them
+        checker = Checker(self.logger, self.config)
+        checker.workspace = self.workspace
+        return checker.iter_all_issues(force)
+
+    def start(self, args: Namespace) -> int:
+        force = args.force
+        tables = self.sqlite_handler.get_tables(
+            self.get_all_bots(force),
+            self.get_runtime(),
+            list(self.iter_issues(force)),
+            self.get_default_bots(force),
+            self.get_running_bots(force),
+            self.get_pipeline(force),
+            {'intelmq_version': self.config.version, 'exported_at': int(time.time())}
+        )
+        self.sqlite_handler.open(args.database)
+        try:
+            with self.workspace.metrics.span('writes'):
+                result = self.sqlite_handler.export(tables, args.full_refresh)
+        finally:
+            self.sqlite_handler.close()
+        print('{:<16} {:>9} {:>9} {:>9} {:>9}'.format('Table', 'Inserted', 'Updated', 'Deleted', 'Unchanged'))
+        for table, (inserted, updated, deleted, unchanged) in result.items():
+            print('{:<16} {:>9} {:>9} {:>9} {:>9}'.format(table, inserted, updated, deleted, unchanged))
+        print('Exported to {}'.format(args.database))
+        return 0
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import json
+from argparse import ArgumentParser, Namespace
+from logging import Logger
+from os.path import basename, join, isfile
+from tempfile import TemporaryDirectory
+from typing import Dict, List, Optional, Tuple
+
+from intelmqworkbench import AbstractBaseTool, IntelMQWorkbenchConfig, IntelMQToolException
+from intelmqworkbench.classes.intelmqbot import IntelMQBot
+from intelmqworkbench.classes.startupsummary import StartupSummary
+from intelmqworkbench.startuphandler import StartupHandler
+from intelmqworkbench.utils import colorize_text, pretty_json
+
+
+class StartupBencher(AbstractBaseTool):
+
+    def __init__(self, logger: Logger, config: IntelMQWorkbenchConfig):
+        super().__init__(logger, config)
+        self.startup_handler = StartupHandler(logger)
+
+    def get_default_argument_description(self) -> Optional[str]:
+        return None
+
+    def get_version(self) -> str:
+        return '0.2'
+
+    def get_arg_parser(self) -> ArgumentParser:
+        arg_parse = ArgumentParser(prog='startup-bench',
+                                   description='Measures the startup time of the installed bot executables')
+        arg_parse.add_argument('-i', '--bot_id', default=None,
+                               help='bot_id of the bot to be measured, by default all are measured',
+                               type=str)
+        arg_parse.add_argument('-n', '--repeat', default=5, help='Number of launches per executable', type=int)
+        arg_parse.add_argument('--timeout', default=60, help='Timeout in seconds per launch', type=float)
+        arg_parse.add_argument('--save-baseline', default=None, dest='save_baseline',
+                               help='Saves the results as baseline into the given file',
+                               type=str)
+        arg_parse.add_argument('--baseline', default=None,
+                               help='Compares the results against the baseline in the given file',
+                               type=str)
+        arg_parse.add_argument('--tolerance', default=20.0,
+                               help='Allowed slowdown of the p50/p95 time-to-init against the baseline in percent',
+                               type=float)
+        arg_parse.add_argument('--force', default=False, help='Force', action='store_true')
+        return arg_parse
+
+    def get_executables(self, bot_id: Optional[str], force: bool) -> List[Tuple[IntelMQBot, str, str]]:
+        output = list()
+        for bot in self.get_all_bots(force):
+            if not bot.installed or not bot.runtime_items:
+                continue
+            file_name = self.output_handler.get_executable_filename(bot, self.config.bot_folder)
+            executable_path = join(self.config.bin_folder, file_name)
+            if not isfile(executable_path):
+                self.logger.info('No executable for {} in {}'.format(bot.name, self.config.bin_folder))
+                continue
+            for runtime_item in bot.runtime_items:
+                if bot_id is None or runtime_item.bot_id == bot_id:
+                    output.append((bot, runtime_item.bot_id, executable_path))
+                    if bot_id is None:
+                        # one instance is enough as all instances share the same executable
+                        break
+        return output
+
+    def start(self, args: Namespace) -> int:
+        if args.repeat < 1:
+            raise IntelMQToolException('The number of launches must be at least 1')
+        executables = self.get_executables(args.bot_id, args.force)
+        if len(executables) == 0:
+            print('No installed executables found')
+            return 0
+        baseline = None
+        if args.baseline:
+            baseline = self.load_baseline(args.baseline)
+        summaries = list()
+        failed = 0
+        regressed = 0
+        print('{:<40} {:>17} {:>17} {:>17} {:>10}  {}'.format(
+            'Bot ID', 'Import p50/p95', 'Init p50/p95', 'Total p50/p95', 'Peak RSS', 'Baseline'
+        ))
+        for bot, bot_id, executable_path in executables:
+            summary = self.measure(bot, bot_id, executable_path, args.repeat, args.timeout)
+            summaries.append(summary)
+            if summary.failures == summary.runs:
+                failed += 1
+                print('{:<40} {}'.format(bot_id, colorize_text('; '.join(summary.errors), 'Red')))
+                continue
+            comparison = ''
+            if baseline is not None:
+                comparison, is_regression = self.compare(summary, baseline.get(bot_id), args.tolerance)
+                if is_regression:
+                    regressed += 1
+            if summary.failures:
+                failed += 1
+                comparison = '{} {}'.format(
+                    comparison, colorize_text('{} of {} launches failed'.format(summary.failures, summary.runs), 'Red')
+                )
+            print('{:<40} {:>17} {:>17} {:>17} {:>10}  {}'.format(
+                bot_id,
+                self.format_percentiles(summary, 'import_seconds'),
+                self.format_percentiles(summary, 'init_seconds'),
+                self.format_percentiles(summary, 'seconds'),
+                '{:.1f}MB'.format(summary.peak_rss / 1024.0) if summary.peak_rss else '-',
+                comparison
+            ))
+        if args.save_baseline:
+            self.save_baseline(args.save_baseline, summaries)
+            print('Baseline saved to {}'.format(args.save_baseline))
+        if failed or regressed:
+            return 1
+        return 0
+
+    def measure(
+            self,
+            bot: IntelMQBot,
+            bot_id: str,
+            executable_path: str,
+            repeat: int,
+            timeout: float
+    ) -> StartupSummary:
+        measurements = list()
+        for count in range(0, repeat, 1):
+            self.logger.debug('Launch {} of {} for {}'.format(count + 1, repeat, bot_id))
+            # every launch gets a fresh sandbox so that no run profits from files written by the previous one
+            with TemporaryDirectory(prefix='startup-bench-') as sandbox:
+                measurements.append(
+                    self.startup_handler.measure(bot, bot_id, executable_path, self.config, timeout, sandbox)
+                )
+        summary = StartupSummary()
+        summary.bot_id = bot_id
+        summary.executable = basename(executable_path)
+        summary.add_measurements(measurements)
+        return summary
+
+    @staticmethod
+    def format_percentiles(summary: StartupSummary, metric: str) -> str:
+        return '{:.3f}/{:.3f}s'.format(summary.get_value(metric, 'p50'), summary.get_value(metric, 'p95'))
+
+    @staticmethod
+    def compare(summary: StartupSummary, reference: Optional[StartupSummary], tolerance: float) -> Tuple[str, bool]:
+        if reference is None:
+            return 'not in baseline', False
+        output = list()
+        is_regression = False
+        for percentile in ['p50', 'p95']:
+            value = summary.get_value('seconds', percentile)
+            reference_value = reference.get_value('seconds', percentile)
+            if not reference_value:
+                continue
+            change = (value - reference_value) / reference_value * 100.0
+            text = '{} {:+.1f}%'.format(percentile, change)
+            if change > tolerance:
+                is_regression = True
+                text = colorize_text(text, 'Red')
+            output.append(text)
+        if is_regression:
+            output.append(colorize_text('REGRESSED', 'Red'))
+        return ' '.join(output), is_regression
+
+    @staticmethod
+    def load_baseline(file_path: str) -> Dict[str, StartupSummary]:
+        if not isfile(file_path):
+            raise IntelMQToolException('Baseline "{}" cannot be found'.format(file_path))
+        with open(file_path, 'r') as f:
+            data = json.load(f)
+        output = dict()
+        for item in data.get('bots', list()):
+            summary = StartupSummary.from_json(item)
+            output[summary.bot_id] = summary
+        return output
+
+    def save_baseline(self, file_path: str, summaries: List[StartupSummary]) -> None:
+        data = {
+            'intelmq': self.config.version,
+            'bots': [summary.to_json() for summary in summaries]
+        }
+        with open(file_path, 'w') as f:
+            f.write(pretty_json(data))
@@ -9,15 +9,19 @@ __email__ = 'jean-paul.weber@restena.lu'
 __copyright__ = 'Copyright 2019-present, Restena CSIRT'
 __license__ = 'GPL v3+'
 
+import hashlib
 import json
+import os
 import sys
-from os.path import basename, join
+from os import scandir, stat
+from os.path import basename, join, isdir, islink, realpath
 from pathlib import Path
 
 import intelmq
-from typing import Tuple
+from typing import Dict, Hashable, Iterable, List, Tuple, Optional
 
 from intelmqworkbench.classes.intelmqbot import IntelMQBot
+from intelmqworkbench.classes.symlinkdrift import SymlinkDrift
 
 TYPES = {
     'ENDC': '\033[0m',
@@ -146,3 +150,150 @@ def get_executable_filename(bot: IntelMQBot, bot_folder: str) -> str:
 
 
 
+
+
+def get_percentile(values: List[float], percentile: float) -> float:
+    # linear interpolation between the closest ranks
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * percentile / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def get_linear_fit(xs: List[float], ys: List[float]) -> Tuple[float, float, float]:
+    # least squares line, returns the slope, the intercept and the coefficient of determination
+    if len(xs) < 2:
+        return 0.0, ys[0] if ys else 0.0, 0.0
+    x_mean = sum(xs) / len(xs)
+    y_mean = sum(ys) / len(ys)
+    x_variance = sum([(x - x_mean) ** 2 for x in xs])
+    if x_variance == 0:
+        return 0.0, y_mean, 0.0
+    slope = sum([(x - x_mean) * (y - y_mean) for x, y in zip(xs, ys)]) / x_variance
+    intercept = y_mean - slope * x_mean
+    total = sum([(y - y_mean) ** 2 for y in ys])
+    if total == 0:
+        return slope, intercept, 1.0
+    residual = sum([(y - intercept - slope * x) ** 2 for x, y in zip(xs, ys)])
+    return slope, intercept, 1.0 - residual / total
+
+
+def get_components(graph: Dict[Hashable, Iterable[Hashable]]) -> List[List[Hashable]]:
+    # strongly connected components (Tarjan without recursion), a component comes after the components it points to
+    index: Dict[Hashable, int] = dict()
+    low: Dict[Hashable, int] = dict()
+    stack = list()
+    on_stack = set()
+    output = list()
+    for root in graph:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph.get(root, ())))]
+        while work:
+            node, edges = work[-1]
+            for target in edges:
+                if target not in index:
+                    index[target] = low[target] = len(index)
+                    stack.append(target)
+                    on_stack.add(target)
+                    work.append((target, iter(graph.get(target, ()))))
+                    break
+                if target in on_stack:
+                    low[node] = min(low[node], index[target])
+            else:
+                work.pop()
+                if work:
+                    low[work[-1][0]] = min(low[work[-1][0]], low[node])
+                if low[node] == index[node]:
+                    component = list()
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    output.append(component)
+    return output
+
+
+def get_rss() -> Optional[int]:
+    # current resident set size in bytes, only on linux
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, OSError, IndexError, ValueError):
+        return None
+
+
+def is_compiled(name: str) -> bool:
+    # written by python when the bots are imported or compiled, never part of an installation
+    return name == '__pycache__' or name.endswith('.pyc')
+
+
+def get_symlink_drift(source: str, destination: str) -> SymlinkDrift:
+    # one scandir pass per folder, the link targets are only resolved for entries which are links. Compiled files are
+    # neither linked nor considered as stale
+    drift = SymlinkDrift()
+    drift.source = str(source)
+    drift.destination = str(destination)
+    expected = dict()
+    with scandir(source) as entries:
+        for entry in entries:
+            if not is_compiled(entry.name):
+                expected[entry.name] = join(drift.source, entry.name)
+    drift.destination_exists = isdir(destination) and not islink(destination)
+    if drift.destination_exists:
+        with scandir(destination) as entries:
+            for entry in entries:
+                if is_compiled(entry.name):
+                    continue
+                target = expected.pop(entry.name, None)
+                if target is None:
+                    drift.stale.append(entry.name)
+                elif not entry.is_symlink() or realpath(entry.path) != realpath(target):
+                    # compared resolved, a relative target or a source reached over a link is the same file
+                    drift.wrong.append(entry.name)
+    drift.missing = sorted(expected.keys())
+    drift.stale.sort()
+    drift.wrong.sort()
+    return drift
+
+
+def get_file_stamp(path: Optional[str]) -> Optional[Tuple[int, int]]:
+    # changes whenever the file is rewritten, None if the file does not exist
+    if path is None:
+        return None
+    try:
+        stat_result = stat(path)
+    except OSError:
+        return None
+    return stat_result.st_mtime_ns, stat_result.st_size
+
+
+def get_tree_stamp(path: Optional[str]) -> Optional[str]:
+    # digest over name, mtime and size of every entry below path, links are not followed and compiled files ignored
+    if path is None or not isdir(path):
+        return None
+    digest = hashlib.sha1()
+    folders = [path]
+    while folders:
+        folder = folders.pop()
+        try:
+            with scandir(folder) as iterator:
+                entries = sorted(iterator, key=lambda item: item.name)
+        except OSError:
+            continue
+        for entry in entries:
+            if is_compiled(entry.name):
+                continue
+            stat_result = entry.stat(follow_symlinks=False)
+            digest.update('{}:{}:{}\n'.format(entry.path, stat_result.st_mtime_ns, stat_result.st_size).encode())
+            if entry.is_dir(follow_symlinks=False):
+                folders.append(entry.path)
+    return digest.hexdigest()
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import importlib
+import logging
+import sys
+from copy import deepcopy
+from os.path import abspath, join
+from typing import Dict, List, Optional, Tuple, Union
+
+from intelmqworkbench.classes.bots.bots import BOTS
+from intelmqworkbench.classes.intelmqbot import IntelMQBot
+from intelmqworkbench.classes.intelmqworkbenchconfig import IntelMQWorkbenchConfig
+from intelmqworkbench.classes.metrics import Metrics
+from intelmqworkbench.classes.issues.intelmqbotinstallissue import IntelMQBotInstallIssue
+from intelmqworkbench.classes.issues.intelmqbotissue import IntelMQBotIssue
+from intelmqworkbench.classes.pipeline.pipelinie import Pipeline
+from intelmqworkbench.classes.query.queryindex import QueryIndex
+from intelmqworkbench.classes.runtime.runtime import Runtime
+from intelmqworkbench.intelmqhandler import IntelMQHandler
+from intelmqworkbench.utils import get_file_stamp, get_tree_stamp
+
+
+class Workspace:
+
+    # part -> parts which are computed out of it and have to be dropped with it
+    DEPENDENTS = {
+        'runtime': ['bots', 'issues'],
+        'pipeline': [],
+        'running_bots': ['bots', 'issues'],
+        'default_bots': ['bots', 'issues'],
+        'discovery': ['bots', 'issues'],
+        'installation': ['issues'],
+        'bots': ['issues', 'query_bots', 'query_instances'],
+        'issues': [],
+        'query_bots': [],
+        'query_instances': [],
+    }
+
+    def __init__(self, logger: logging.Logger, config: Optional[IntelMQWorkbenchConfig]):
+        self.logger = logger
+        self.config = config
+        self.intelmq_handler = IntelMQHandler(logger)
+        self.metrics = Metrics()
+        # (part, force) -> parsed or computed object
+        self.__cache: Dict[Tuple[str, bool], object] = dict()
+        # part -> stamp of its files at the time it was read
+        self.__stamps: Dict[str, object] = dict()
+
+    def __get_runtime_path(self) -> str:
+        if self.config.version.startswith('3'):
+            return self.config.runtime_yaml_file
+        else:
+            return self.config.runtime_conf_file
+
+    def __get_stamp(self, part: str) -> object:
+        if part == 'runtime':
+            return get_file_stamp(self.__get_runtime_path())
+        elif part == 'pipeline':
+            return get_file_stamp(self.config.pipeline_conf_file)
+        elif part == 'running_bots':
+            return get_file_stamp(self.config.running_BOTS)
+        elif part == 'default_bots':
+            return get_file_stamp(self.config.default_BOTS)
+        elif part == 'discovery':
+            return get_tree_stamp(self.config.bot_folder), get_tree_stamp(self.config.custom_bot_folder)
+        elif part == 'installation':
+            return get_tree_stamp(self.config.bin_folder)
+        return None
+
+    def __get_cached(self, part: str, force: bool = False) -> Optional[object]:
+        return self.__cache.get((part, force), None)
+
+    def __set_cached(self, part: str, value: object, force: bool = False) -> None:
+        self.__cache[(part, force)] = value
+
+    def __is_cached(self, part: str, force: bool = False) -> bool:
+        return (part, force) in self.__cache
+
+    def __stamp(self, part: str) -> None:
+        # taken before reading, a change while reading results in a second read on the next refresh
+        self.__stamps[part] = self.__get_stamp(part)
+
+    def __drop(self, part: str, dropped: List[str]) -> None:
+        if part in dropped:
+            return
+        dropped.append(part)
+        self.__stamps.pop(part, None)
+        for key in [key for key in self.__cache.keys() if key[0] == part]:
+            del self.__cache[key]
+        for dependent in Workspace.DEPENDENTS.get(part, []):
+            self.__drop(dependent, dropped)
+
+    def __purge_modules(self) -> None:
+        # the bots have to be imported again, hence remove the modules living in the bot folders
+        folders = [abspath(folder) for folder in [self.config.bot_folder, self.config.custom_bot_folder] if folder]
+        for name, module in list(sys.modules.items()):
+            file_path = getattr(module, '__file__', None)
+            if file_path:
+                file_path = abspath(file_path)
+                for folder in folders:
+                    if file_path.startswith(join(folder, '')):
+                        del sys.modules[name]
+                        break
+        importlib.invalidate_caches()
+
+    def invalidate(self, parts: Optional[List[str]] = None) -> List[str]:
+        # drops the given parts, all but the discovery if none are given
+        if parts is None:
+            parts = [part for part in Workspace.DEPENDENTS.keys() if part != 'discovery']
+        dropped = list()
+        for part in parts:
+            self.__drop(part, dropped)
+        if 'discovery' in dropped:
+            self.__purge_modules()
+        return dropped
+
+    def refresh(self) -> List[str]:
+        # compares the stamps of the read files and drops only what changed
+        changed = list()
+        for part, stamp in list(self.__stamps.items()):
+            if self.__get_stamp(part) != stamp:
+                self.logger.debug('Detected changes for {}'.format(part))
+                changed.append(part)
+        if changed:
+            self.invalidate(changed)
+        return changed
+
+    def get_discovered_bots(self) -> Tuple[List[IntelMQBot], List[IntelMQBot]]:
+        if not self.__is_cached('discovery'):
+            self.__stamp('discovery')
+            with self.metrics.span('discovery'):
+                intelmq_bots = self.intelmq_handler.get_bots(self.config.bot_folder, False)
+                custom_bots = self.intelmq_handler.get_bots(self.config.custom_bot_folder, True)
+            self.metrics.set_counter('bots_imported', len(intelmq_bots) + len(custom_bots))
+            self.__set_cached('discovery', (intelmq_bots, custom_bots))
+        # the bots are modified while merging, hence the cached ones are never handed out
+        return deepcopy(self.__get_cached('discovery'))
+
+    def get_discovery_stamp(self) -> object:
+        return self.__get_stamp('discovery')
+
+    def set_discovered_bots(self, intelmq_bots: List[IntelMQBot], custom_bots: List[IntelMQBot],
+                            stamp: Optional[object] = None) -> None:
+        # discovery done by someone else e.g. once for all the roots of a fleet having the same bot trees
+        self.__stamps['discovery'] = self.__get_stamp('discovery') if stamp is None else stamp
+        self.__set_cached('discovery', (intelmq_bots, custom_bots))
+
+    def get_all_bots(self, force: bool) -> List[IntelMQBot]:
+        if not self.__is_cached('bots', force):
+            self.__set_cached('bots', self.fetch_bots(force), force)
+        return self.__get_cached('bots', force)
+
+    def fetch_bots(self, force: bool) -> List[IntelMQBot]:
+        intelmq_bots, custom_bots = self.get_discovered_bots()
+        bots = self.get_default_bots(force)
+        if bots:
+            with self.metrics.span('merge'):
+                self.intelmq_handler.merge_bots_conf_and_bots(intelmq_bots, bots)
+        # Mark bots as custom
+        for custom_bot in custom_bots:
+            custom_bot.custom = True
+        # mark custom bots and also remove them from the ones installed in the intelmq bots folder
+        all_bots = list()
+        for bot in intelmq_bots:
+            found = False
+            for custom_bot in custom_bots:
+                # the common denominator
+                if bot.class_name == custom_bot.class_name:
+                    found = True
+                    # if the bot can be found inside the installed ones then it is installed (only for IntelMQ 3.x)
+                    custom_bot.installed = True
+                    break
+            if not found:
+                all_bots.append(bot)
+        all_bots = all_bots + custom_bots
+        running_bots = self.get_running_bots(force)
+        set_install_by_path = bots is None
+        runtime = self.get_runtime()
+        with self.metrics.span('merge'):
+            if running_bots:
+                self.intelmq_handler.set_install_by_bots(all_bots, running_bots)
+            self.intelmq_handler.merge_bots_and_runtime(
+                all_bots, runtime, self.config.bot_folder, set_install_by_path
+            )
+        return all_bots
+
+    def get_runtime(self) -> Runtime:
+        if not self.__is_cached('runtime'):
+            self.__stamp('runtime')
+            path = self.__get_runtime_path()
+            with self.metrics.span('parsing'):
+                if self.config.version.startswith('3'):
+                    runtime = self.intelmq_handler.parse_runtime_yaml(path)
+                else:
+                    runtime = self.intelmq_handler.parse_runtime_conf(path)
+            runtime.location = path
+            self.metrics.set_counter('runtime_items', len(runtime.get_items()))
+            self.__set_cached('runtime', runtime)
+        return self.__get_cached('runtime')
+
+    def get_pipeline(self, force: bool = False) -> Optional[Pipeline]:
+        if self.config.version.startswith('3') and not force:
+            return None
+        if not self.__is_cached('pipeline'):
+            self.__stamp('pipeline')
+            with self.metrics.span('parsing'):
+                pipeline = self.intelmq_handler.parse_pipeline(self.config.pipeline_conf_file)
+            self.__set_cached('pipeline', pipeline)
+        return self.__get_cached('pipeline')
+
+    def __get_bots_file(self, part: str, path: str) -> BOTS:
+        if not self.__is_cached(part):
+            self.__stamp(part)
+            with self.metrics.span('parsing'):
+                bots = self.intelmq_handler.parse_bots(path)
+            bots.location = path
+            self.__set_cached(part, bots)
+        return self.__get_cached(part)
+
+    def get_running_bots(self, force: bool = False) -> Optional[BOTS]:
+        if self.config.version.startswith('3') and not force:
+            return None
+        return self.__get_bots_file('running_bots', self.config.running_BOTS)
+
+    def get_default_bots(self, force: bool = False) -> Optional[BOTS]:
+        if self.config.version.startswith('3') and not force:
+            return None
+        return self.__get_bots_file('default_bots', self.config.default_BOTS)
+
+    def get_issues(self, force: bool = False) -> Optional[List[Union[IntelMQBotIssue, IntelMQBotInstallIssue]]]:
+        if not self.__is_cached('issues', force):
+            self.__stamp('installation')
+            runtime = self.get_runtime()
+            bots = self.get_all_bots(force)
+            runtime_bots = self.get_running_bots(force)
+            with self.metrics.span('issues'):
+                issues = self.intelmq_handler.get_issues(
+                    bots, self.config.bot_folder, self.config.bin_folder, runtime, runtime_bots
+                )
+            self.metrics.set_counter('issues_found', len([issue for issue in issues or [] if issue.has_issues()]))
+            self.__set_cached('issues', issues, force)
+        return self.__get_cached('issues', force)
+
+    def get_query_index(self, force: bool = False, instances: bool = True) -> QueryIndex:
+        part = 'query_instances' if instances else 'query_bots'
+        if not self.__is_cached(part, force):
+            bots = self.get_all_bots(force)
+            with self.metrics.span('indexing'):
+                index = QueryIndex(bots, instances)
+            self.metrics.set_counter('{}_indexed'.format('instances' if instances else 'bots'), len(index))
+            self.__set_cached(part, index, force)
+        return self.__get_cached(part, force)
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import os
+import sys
+from os.path import dirname, join
+
+SOURCE_FOLDER = join(dirname(dirname(os.path.abspath(__file__))), 'src')
+
+# the workbench is not installed, it is used from the checkout
+if SOURCE_FOLDER not in sys.path:
+    sys.path.insert(0, SOURCE_FOLDER)
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import logging
+from typing import Dict, Optional
+
+import pytest
+
+from intelmqworkbench.classes.intelmqbot import IntelMQBot
+from intelmqworkbench.classes.parameters import Parameters
+from intelmqworkbench.classes.query.expressions import Comparison, FieldExpression
+from intelmqworkbench.classes.query.queryindex import QueryIndex
+from intelmqworkbench.classes.query.queryparser import QueryParser
+from intelmqworkbench.classes.runtime.runtimeitem import RuntimeItem
+from intelmqworkbench.exceptions import IntelMQQueryException
+from intelmqworkbench.queryhandler import QueryHandler
+
+QUERIES = [
+    'group = "Expert"',
+    'group = Expert',
+    'group in ["Expert", "Parser"]',
+    'group in []',
+    'module = "intelmq.bots.experts.filter.expert"',
+    'name = "Filter Expert"',
+    'bot_id = "filter-expert"',
+    'bot_id in ["filter-expert", "taxonomy-expert-2", "unknown"]',
+    'bot_id ~ "^taxonomy"',
+    'installed',
+    'not installed',
+    'installed = true',
+    'installed = false',
+    'custom and group = "Expert"',
+    'custom or group = "Collector"',
+    'not (group = "Expert" or custom)',
+    'not group = "Expert" and installed',
+    'installed or param.rate_limit > 100',
+    'param.rate_limit',
+    'param.rate_limit = 100',
+    'param.rate_limit = "200"',
+    'param.rate_limit != 100',
+    'param.rate_limit in [100, "200"]',
+    'param.rate_limit = default',
+    'param.rate_limit != default',
+    'param.rate_limit = null',
+    'default.rate_limit >= 100',
+    'param.filter_key = "classification.type" and enabled',
+    'enabled = false or run_mode = "scheduled"',
+    'instances > 1',
+    'description ~ "filter"',
+]
+
+
+def get_parameters(values: Optional[dict]) -> Optional[Parameters]:
+    if values is None:
+        return None
+    parameters = Parameters()
+    parameters.add_values(values)
+    return parameters
+
+
+def get_bot(
+        module: str,
+        group: str,
+        name: str,
+        defaults: Optional[dict],
+        instances: Dict[str, Optional[dict]],
+        installed: bool = True,
+        custom: bool = False
+) -> IntelMQBot:
+    bot = IntelMQBot()
+    bot.clazz = type(name.replace(' ', ''), (), {'__module__': module})
+    bot.group = group
+    bot.name = name
+    bot.description = '{} of the tests'.format(name.lower())
+    bot.installed = installed
+    bot.custom = custom
+    bot.default_parameters = get_parameters(defaults)
+    for position, (bot_id, parameters) in enumerate(instances.items()):
+        item = RuntimeItem()
+        item.bot_id = bot_id
+        item.module = module
+        item.group = group
+        item.enabled = position % 2 == 0
+        item.run_mode = 'scheduled' if position == 1 else 'continuous'
+        item.parameters = get_parameters(parameters)
+        bot.runtime_items.append(item)
+    return bot
+
+
+@pytest.fixture(scope='module')
+def bots():
+    return [
+        get_bot('intelmq.bots.experts.filter.expert', 'Expert', 'Filter Expert', {'rate_limit': 100}, {
+            'filter-expert': {'filter_key': 'classification.type'},
+            'filter-expert-2': {'rate_limit': '200', 'filter_key': 'source.ip'},
+            'filter-expert-3': {'rate_limit': 100}
+        }),
+        get_bot('intelmq.bots.experts.taxonomy.expert', 'Expert', 'Taxonomy Expert', None, {
+            'taxonomy-expert': None,
+            'taxonomy-expert-2': {'rate_limit': 300}
+        }, installed=False),
+        get_bot('custom.bots.experts.lookup.expert', 'Expert', 'Lookup Expert', {'rate_limit': 50}, {
+            'lookup-expert': {'rate_limit': 50}
+        }, custom=True),
+        get_bot('intelmq.bots.parsers.generic.parser_csv', 'Parser', 'Generic CSV Parser', {'columns': None}, {
+            'csv-parser': {'columns': ['source.ip']}
+        }),
+        get_bot('intelmq.bots.collectors.http.collector_http', 'Collector', 'URL Fetcher', {}, {}, custom=True)
+    ]
+
+
+def test_precedence_of_and_or_not():
+    assert QueryParser('installed or custom and enabled').parse().description == '(installed or (custom and enabled))'
+    assert QueryParser('installed and custom or enabled').parse().description == '((installed and custom) or enabled)'
+    assert QueryParser('not installed and custom').parse().description == '(not installed and custom)'
+    assert QueryParser('not (installed or custom)').parse().description == 'not (installed or custom)'
+    assert QueryParser('not not installed').parse().description == 'not not installed'
+    assert QueryParser('installed AND NOT custom Or enabled').parse().description == \
+        '((installed and not custom) or enabled)'
+
+
+def test_comparisons():
+    expression = QueryParser('param.rate_limit >= 100').parse()
+    assert isinstance(expression, Comparison)
+    assert (expression.field, expression.operator, expression.value) == ('param.rate_limit', '>=', 100)
+    expression = QueryParser('param.rate_limit!=default').parse()
+    assert (expression.operator, expression.value, expression.default) == ('!=', None, True)
+    assert isinstance(QueryParser('custom').parse(), FieldExpression)
+    assert QueryParser('param.threshold = 0.5').parse().value == 0.5
+    assert QueryParser('param.flag = TRUE').parse().value is True
+    assert QueryParser('param.flag = null').parse().value is None
+    assert QueryParser('group = Expert').parse().value == 'Expert'
+
+
+def test_quoting():
+    assert QueryParser('name = "Filter Expert"').parse().value == 'Filter Expert'
+    assert QueryParser("name = 'Filter Expert'").parse().value == 'Filter Expert'
+    # keywords, operators and brackets are no tokens within quotes
+    assert QueryParser('name = "a and (b) or [c] = d"').parse().value == 'a and (b) or [c] = d'
+    assert QueryParser(r'name = "the \"filter\""').parse().value == 'the "filter"'
+    assert QueryParser(r"name = 'it\'s'").parse().value == "it's"
+    assert QueryParser(r'name = "back\\slash"').parse().value == 'back\\slash'
+    # quoted numbers stay strings
+    assert QueryParser('param.rate_limit = "100"').parse().value == '100'
+
+
+def test_lists():
+    assert QueryParser('group in ["Expert", \'Parser\']').parse().value == ['Expert', 'Parser']
+    assert QueryParser('param.rate_limit in [1, 2.5, true, null, x]').parse().value == [1, 2.5, True, None, 'x']
+    assert QueryParser('group in []').parse().value == []
+
+
+@pytest.mark.parametrize('text', [
+    '',
+    '   ',
+    'group =',
+    'group = "Expert")',
+    '(installed',
+    '(installed or)',
+    'installed and',
+    'not',
+    'installed custom',
+    '= 1',
+    'group in "Expert"',
+    'group in ["Expert"',
+    'group in ["Expert" "Parser"]',
+    'group in [,]',
+    'group = (',
+    'name = "unterminated',
+    'unknown = 1',
+    'param = 1',
+    'name ~ "["',
+    'group = default',
+    'param.rate_limit < [1]',
+])
+def test_syntax_errors(text):
+    with pytest.raises(IntelMQQueryException):
+        QueryParser(text).parse()
+
+
+@pytest.mark.parametrize('instances', [True, False])
+@pytest.mark.parametrize('text', QUERIES)
+def test_index_matches_full_scan(bots, instances, text):
+    index = QueryIndex(bots, instances)
+    expression = QueryParser(text).parse()
+    expected = [record.position for record in index.records if expression.evaluate(record)]
+    candidates = expression.get_candidates(index)
+    if candidates is not None:
+        assert set(expected) <= candidates
+    handler = QueryHandler(logging.getLogger('test'))
+    assert [record.position for record in handler.execute(index, expression)] == expected
+
+
+def test_index_narrows_the_candidates(bots):
+    index = QueryIndex(bots)
+    assert len(index) == 7
+    for text, count in [
+        ('group = "Expert"', 6),
+        ('group in ["Parser", "Collector"]', 1),
+        ('bot_id = "filter-expert"', 1),
+        ('installed', 5),
+        ('custom and group = "Expert"', 1),
+        ('param.rate_limit > 0', 5),
+    ]:
+        candidates = QueryParser(text).parse().get_candidates(index)
+        assert candidates is not None and len(candidates) == count, text
+    # not and comparisons with numbers of indexed fields are evaluated on every record
+    assert QueryParser('not installed').parse().get_candidates(index) is None
+    assert QueryParser('installed or enabled').parse().get_candidates(index) is None
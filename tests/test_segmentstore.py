@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+from os import listdir
+
+import pytest
+
+from intelmqworkbench.stores.segmentstore import SegmentStore
+
+
+def get_messages(start: int, stop: int) -> list:
+    return [{'position': position, 'raw': 'message {}'.format(position)} for position in range(start, stop)]
+
+
+def test_append_and_read_across_segments(tmp_path):
+    folder = str(tmp_path / 'store')
+    with SegmentStore(folder, segment_size=3) as store:
+        positions = [store.append(data) for data in get_messages(0, 8)]
+    assert positions == list(range(8))
+
+    store = SegmentStore(folder, segment_size=3)
+    assert [segment.count for segment in store.get_segments()] == [3, 3, 2]
+    assert store.count() == 8
+    assert list(store.read()) == get_messages(0, 8)
+    # ranges starting and ending inside of segments
+    assert list(store.read(2, 7)) == get_messages(2, 7)
+    assert list(store.read(3, 6)) == get_messages(3, 6)
+    assert list(store.read(7, 100)) == get_messages(7, 8)
+    assert list(store.read(8)) == []
+
+
+def test_continue_last_segment(tmp_path):
+    folder = str(tmp_path / 'store')
+    with SegmentStore(folder, segment_size=3) as store:
+        store.extend(get_messages(0, 5))
+    with SegmentStore(folder, segment_size=3) as store:
+        assert store.append(get_messages(5, 6)[0]) == 5
+        store.extend(get_messages(6, 7))
+    store = SegmentStore(folder, segment_size=3)
+    assert [segment.count for segment in store.get_segments()] == [3, 3, 1]
+    assert list(store.read()) == get_messages(0, 7)
+
+
+def test_continue_after_partial_write(tmp_path):
+    folder = str(tmp_path / 'store')
+    with SegmentStore(folder) as store:
+        store.extend(get_messages(0, 3))
+    segment = store.get_segments()[-1]
+    # a write interrupted after the data and in the middle of the index entry
+    with open(segment.data_path, 'ab') as f:
+        f.write(b'{"position": 3, "raw": "mess')
+    with open(segment.index_path, 'ab') as f:
+        f.write(b'\x01\x02\x03')
+
+    store = SegmentStore(folder)
+    assert store.count() == 3
+    assert list(store.read()) == get_messages(0, 3)
+    with store:
+        assert store.append(get_messages(3, 4)[0]) == 3
+    store = SegmentStore(folder)
+    assert [segment.count for segment in store.get_segments()] == [4]
+    assert list(store.read()) == get_messages(0, 4)
+
+
+@pytest.mark.parametrize('compression, extension', [('gzip', '.gz'), ('lzma', '.xz')])
+def test_compressed_read_at_offset(tmp_path, compression, extension):
+    folder = str(tmp_path / 'store')
+    with SegmentStore(folder, compression=compression, segment_size=4) as store:
+        store.extend(get_messages(0, 10))
+    assert sorted(file_name for file_name in listdir(folder) if file_name.endswith(extension)) == [
+        'segment-000000.jsonl{}'.format(extension),
+        'segment-000001.jsonl{}'.format(extension),
+        'segment-000002.jsonl{}'.format(extension)
+    ]
+
+    store = SegmentStore(folder, compression=compression, segment_size=4)
+    assert list(store.read(5, 9)) == get_messages(5, 9)
+    assert list(store.read(9)) == get_messages(9, 10)
+    # compressed segments are complete once closed, further messages go into a new segment
+    with store:
+        store.extend(get_messages(10, 11))
+    assert [segment.count for segment in store.get_segments()] == [4, 4, 2, 1]
+    assert list(store.read()) == get_messages(0, 11)
+
+
+def test_uncompressed_store_reads_compressed_segments(tmp_path):
+    folder = str(tmp_path / 'store')
+    with SegmentStore(folder, compression='gzip') as store:
+        store.extend(get_messages(0, 2))
+    with SegmentStore(folder) as store:
+        store.extend(get_messages(2, 4))
+    store = SegmentStore(folder)
+    assert [segment.compression for segment in store.get_segments()] == ['gzip', None]
+    assert list(store.read(1, 3)) == get_messages(1, 3)
+
+
+def test_move_segments_numbering(tmp_path):
+    folder = str(tmp_path / 'store')
+    with SegmentStore(folder, segment_size=2) as store:
+        store.extend(get_messages(0, 3))
+    source = SegmentStore(str(tmp_path / 'source'), compression='gzip', segment_size=2)
+    source.extend(get_messages(3, 6))
+
+    store = SegmentStore(folder, segment_size=2)
+    assert store.move_segments(source) == 3
+    assert [segment.number for segment in store.get_segments()] == [0, 1, 2, 3]
+    assert [segment.compression for segment in store.get_segments()] == [None, None, 'gzip', 'gzip']
+    assert source.count() == 0
+    store = SegmentStore(folder, segment_size=2)
+    assert list(store.read()) == get_messages(0, 6)
+    # appended behind the moved segments
+    with store:
+        assert store.append(get_messages(6, 7)[0]) == 6
+    assert [segment.number for segment in store.get_segments()] == [0, 1, 2, 3, 4]
+
+
+def test_move_segments_into_empty_store(tmp_path):
+    source = SegmentStore(str(tmp_path / 'source'), segment_size=2)
+    source.extend(get_messages(0, 3))
+    store = SegmentStore(str(tmp_path / 'store'))
+    assert store.move_segments(source) == 3
+    assert [segment.number for segment in store.get_segments()] == [0, 1]
+    assert list(store.read()) == get_messages(0, 3)
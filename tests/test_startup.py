@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+"""
+Created on 19.10.26
+"""
+
+__author__ = 'Weber Jean-Paul'
+__email__ = 'jean-paul.weber@restena.lu'
+__copyright__ = 'Copyright 2019-present, Restena CSIRT'
+__license__ = 'GPL v3+'
+
+import json
+import os
+import subprocess
+import sys
+from os.path import dirname, join
+
+SOURCE_FOLDER = join(dirname(dirname(os.path.abspath(__file__))), 'src')
+WORKBENCH = join(SOURCE_FOLDER, 'intelmqworkbench.py')
+
+# modules which only the tools may import, --help must not pay for them
+HEAVY_MODULES = ['intelmq.lib.bot', 'ruamel', 'ruamel.yaml']
+
+# runs the CLI with --help in a fresh interpreter and reports the modules loaded afterwards
+IMPORTED_MODULES = '''
+import json
+import runpy
+import sys
+sys.argv = [{workbench!r}, '--help']
+try:
+    runpy.run_path({workbench!r}, run_name='__main__')
+except SystemExit:
+    pass
+sys.stderr.write(json.dumps(sorted(sys.modules)))
+'''
+
+
+def run_help() -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, WORKBENCH, '--help'], cwd=SOURCE_FOLDER, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+
+
+def test_help_exits_cleanly():
+    result = run_help()
+    assert result.returncode == 0, result.stderr.decode()
+    assert b'fiddler' in result.stdout
+
+
+def test_help_does_not_import_heavy_modules():
+    result = subprocess.run(
+        [sys.executable, '-c', IMPORTED_MODULES.format(workbench=WORKBENCH)],
+        cwd=SOURCE_FOLDER, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    assert result.returncode == 0, result.stderr.decode()
+    modules = json.loads(result.stderr.decode())
+    assert 'intelmqworkbench' in modules
+    for module in HEAVY_MODULES:
+        assert module not in modules, '{} is imported by --help'.format(module)
+